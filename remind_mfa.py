@@ -1,12 +1,18 @@
 import logging
+from pathlib import Path
 from typing import Annotated, Literal
 
 import typer
 from dotenv import load_dotenv
 
-from remind_mfa.cli.helper import prompt_for_config_names
+from remind_mfa.cli.batch import load_batch_spec, run_batch
+from remind_mfa.cli.helper import configure_logger, prompt_for_config_names
+from remind_mfa.cli.prepare import prepare_input_bundles
+from remind_mfa.cli.runner import run_model, run_models_in_processes
+from remind_mfa.cli.server import serve as serve_models
+from remind_mfa.cli.sweep import run_sweep, sweep_scenario_names
 from remind_mfa.common.config_loader import load_config
-from remind_mfa.common.helpers import ModelNames, init_model
+from remind_mfa.common.helpers import ModelNames
 
 app = typer.Typer()
 
@@ -14,26 +20,23 @@ app = typer.Typer()
 type ModelSelection = Literal["all"] | ModelNames
 
 
-def configure_logger():
-    logging.basicConfig(
-        format="%(asctime)s %(levelname)-8s %(message)s",
-        level=logging.INFO,
-        datefmt="%Y-%m-%d %H:%M:%S",
-        force=True,
-    )
-
+def run_remind_mfa(
+    config_names: list[str],
+    models: list[ModelNames],
+    jobs: int = 1,
+    resume: bool = False,
+    profile: bool = False,
+) -> None:
+    if jobs <= 1 or len(models) <= 1:
+        for model in models:
+            run_model(config_names, model, resume=resume, profile=profile)
+        return
 
-def run_remind_mfa(config_names: list[str], models: list[ModelNames]) -> None:
-    for model in models:
-        model_config = load_config(config_names, model)
-        model = init_model(cfg=model_config)
-        logging.info(f"{type(model).__name__} instance created.")
-        model.run()
-        logging.info("Model computations completed.")
-        model.export()
-        logging.info("Export completed.")
-        model.visualize()
-        logging.info("Visualization completed.")
+    failed = run_models_in_processes(config_names, models, jobs, resume=resume, profile=profile)
+    if failed:
+        logging.error(f"Failed models: {', '.join(model.value for model in failed)}.")
+        raise typer.Exit(code=1)
+    logging.info("All models completed.")
 
 
 def prompt_for_model() -> ModelSelection:
@@ -48,8 +51,9 @@ def prompt_for_model() -> ModelSelection:
             typer.echo(f"Invalid model {value!r}. Choose one of: {choices}.", err=True)
 
 
-@app.command()
+@app.callback(invoke_without_command=True)
 def main(
+    ctx: typer.Context,
     config_names: Annotated[
         list[str] | None,
         typer.Option(
@@ -61,8 +65,34 @@ def main(
         Literal["all", "plastics", "steel", "cement"] | None,
         typer.Option("--model", help="Model to run, or all."),
     ] = None,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs",
+            "-j",
+            min=1,
+            help="Number of worker processes. With more than one, each model runs in its own process.",
+        ),
+    ] = 1,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            "--resume",
+            help="Checkpoint each stage of the run and only recompute stages with changed inputs.",
+        ),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Record the time spent in each stage and sub-step and write it to profile.json "
+            "in the export folder.",
+        ),
+    ] = False,
 ) -> None:
     """Run REMIND-MFA with one or more layered configurations."""
+    if ctx.invoked_subcommand is not None:
+        return
     load_dotenv()
 
     if not config_names:
@@ -74,7 +104,161 @@ def main(
     models_to_run = list(ModelNames) if model_selection == "all" else [model_selection]
 
     configure_logger()
-    run_remind_mfa(config_names, models_to_run)
+    run_remind_mfa(config_names, models_to_run, jobs=jobs, resume=resume, profile=profile)
+
+
+@app.command()
+def prepare(
+    config_names: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--config",
+            help="Configuration name under config/. Repeat to stack configurations.",
+        ),
+    ] = None,
+    model: Annotated[
+        Literal["all", "plastics", "steel", "cement"],
+        typer.Option("--model", help="Model to prepare, or all."),
+    ] = "all",
+) -> None:
+    """Write the input data of the configured revision and region mapping to one bundle file.
+
+    Runs with input.use_input_bundle = true then map their dimensions and parameters from the
+    bundle instead of reading the input files. Prepare again after changing the input data.
+    """
+    load_dotenv()
+
+    if not config_names:
+        config_names = prompt_for_config_names()
+    models = list(ModelNames) if model == "all" else [ModelNames(model)]
+
+    configure_logger()
+    for path in prepare_input_bundles(config_names, models):
+        typer.echo(path)
+
+
+@app.command()
+def sweep(
+    config_names: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--config",
+            help="Configuration name under config/. Repeat to stack configurations.",
+        ),
+    ] = None,
+    model: Annotated[
+        Literal["plastics", "steel", "cement"] | None,
+        typer.Option("--model", help="Model to run."),
+    ] = None,
+    scenarios: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--scenario",
+            help="Scenario to run. Repeat for several scenarios. Defaults to all scenarios of "
+            "inheritance.csv that inherit from another one.",
+        ),
+    ] = None,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", min=1, help="Number of worker processes."),
+    ] = 1,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            "--resume",
+            help="Checkpoint each stage of the run and only recompute stages with changed inputs.",
+        ),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Record the time spent in each stage and sub-step and write it to profile.json "
+            "in the export folder.",
+        ),
+    ] = False,
+) -> None:
+    """Run one model for several scenarios, reading the input data only once.
+
+    Export and figures of each scenario are written to subfolders named after the scenario.
+    """
+    load_dotenv()
+
+    if not config_names:
+        config_names = prompt_for_config_names()
+    if model is None:
+        model_selection = prompt_for_model()
+        while model_selection == "all":
+            typer.echo("A sweep runs a single model. Choose one model.", err=True)
+            model_selection = prompt_for_model()
+    else:
+        model_selection = ModelNames(model)
+
+    configure_logger()
+    if not scenarios or scenarios == ["all"]:
+        scenarios_path = load_config(config_names, model_selection)["input"]["scenarios_path"]
+        scenarios = sweep_scenario_names(scenarios_path)
+
+    failed = run_sweep(
+        config_names, model_selection, scenarios, jobs=jobs, resume=resume, profile=profile
+    )
+    if failed:
+        logging.error(f"Failed scenarios: {', '.join(failed)}.")
+        raise typer.Exit(code=1)
+    logging.info("All scenarios completed.")
+
+
+@app.command()
+def batch(
+    spec_path: Annotated[
+        Path,
+        typer.Argument(
+            help="TOML batch file with the model, configuration layers, and a matrix and/or list "
+            "of configuration overrides.",
+        ),
+    ],
+    jobs: Annotated[
+        int | None,
+        typer.Option("--jobs", "-j", min=1, help="Number of worker processes. Overrides the file."),
+    ] = None,
+) -> None:
+    """Run all combinations of configuration overrides of a batch file.
+
+    Each run writes its export and figures to its own subfolder, and an index of all runs is
+    written to index.csv in the batch export folder. See config/batches/ for an example.
+    """
+    load_dotenv()
+    configure_logger()
+    spec = load_batch_spec(spec_path)
+    if jobs is not None:
+        spec.jobs = jobs
+
+    index = run_batch(spec)
+    failed = [row["run"] for row in index if row["status"] != "ok"]
+    if failed:
+        logging.error(f"Failed runs: {', '.join(failed)}.")
+        raise typer.Exit(code=1)
+    logging.info("All runs completed.")
+
+
+@app.command()
+def serve(
+    host: Annotated[
+        str,
+        typer.Option(
+            "--host", help="Address to listen on. Keep it local unless you trust the network."
+        ),
+    ] = "127.0.0.1",
+    port: Annotated[int, typer.Option("--port", help="Port to listen on.")] = 8765,
+) -> None:
+    """Serve model runs over HTTP, keeping input data and historic MFAs in memory between runs.
+
+    POST a JSON run request to /run, e.g. {"model": "steel", "scenario": "SSP2"}. See
+    remind_mfa/cli/server.py for all request entries.
+    """
+    load_dotenv()
+    configure_logger()
+    serve_models(host=host, port=port)
 
 
 if __name__ == "__main__":
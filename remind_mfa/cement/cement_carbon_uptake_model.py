@@ -4,6 +4,7 @@ import flodym as fd
 from pydantic import BaseModel, Field, model_validator
 
 from remind_mfa.common.assumptions_doc import add_assumption_doc
+from remind_mfa.common.profiling import profiled
 
 
 class CementCarbonUptakeModel(BaseModel):
@@ -19,6 +20,7 @@ class CementCarbonUptakeModel(BaseModel):
         self.parameters = self.mfa.parameters
         return self
 
+    @profiled
     def compute_carbon_flow(self):
         flw = self.flows
         stk = self.stocks
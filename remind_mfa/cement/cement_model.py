@@ -12,6 +12,7 @@ from remind_mfa.cement.cement_mappings import CementDimensionFiles, CementDispla
 from remind_mfa.cement.cement_export import CementDataExporter
 from remind_mfa.cement.cement_visualization import CementVisualizer
 from remind_mfa.common.common_model import CommonModel
+from remind_mfa.common.pipeline import Stage
 from remind_mfa.cement.cement_definition import scenario_parameters as cement_scn_prm_def
 from remind_mfa.cement.cement_parameter_reconciliation import CementParameterReconciliation
 
@@ -42,11 +43,42 @@ class CementModel(CommonModel):
         lifetime_std[...] = self.parameters["lifetime_mean"] * self.parameters["lifetime_rel_std"]
         self.parameters["lifetime_std"] = lifetime_std
 
+    stages = CommonModel.stages[:-2] + [
+        Stage(
+            name="reconciliation",
+            config=("model", "model_switches"),
+            consumes=(
+                "dims",
+                "parameters",
+                "historic_parameters",
+                "scenario_parameters",
+                "historic_mfa",
+                "future_mfa",
+            ),
+            produces=(
+                "td_hist_mfa",
+                "td_mfa",
+                "bu_stock",
+                "parameters",
+                "parameter_reconciliation",
+                "td_hist_mfa_reconciled",
+                "historic_mfa",
+                "td_stock_reconciled",
+                "stock_handler",
+                "sector_specific_sat_level",
+                "td_mfa_reconciled",
+                "bu_mfa_reconciled",
+                "future_mfa",
+            ),
+        ),
+        *CommonModel.stages[-2:],
+    ]
+
     def run(self):
         super().run()
 
         if self.cfg.model_switches.parameter_reconciliation.do_reconcile:
-            return self.run_with_reconciliation()
+            self.run_stage("reconciliation", self.run_with_reconciliation)
 
     def make_bottom_up_mfa(self) -> StockDrivenBottomUpCementMFASystem:
         """Construct the future bottom-up MFA."""
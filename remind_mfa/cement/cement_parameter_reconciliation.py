@@ -8,6 +8,9 @@ import random
 from copy import deepcopy
 
 from remind_mfa.common.common_mfa_system import CommonMFASystem
+from remind_mfa.common.helpers import DependencyTracker
+from remind_mfa.common.parameter_store import ParameterStore
+from remind_mfa.common.profiling import profiled
 from remind_mfa.cement.cement_mfa_system_historic import InflowDrivenHistoricCementMFASystem
 from remind_mfa.cement.cement_mfa_system_bottom_up import (
     StockDrivenBottomUpCementMFASystem,
@@ -103,7 +106,8 @@ class CementParameterReconciliation:
         self.output_dims_are_independent = output_dims_are_independent
 
         self.prepare_dims()
-        self.input_prms = deepcopy(ref_mfa.parameters)
+        # shares the arrays of ref_mfa; corrections copy only the parameters they change
+        self.input_prms = ParameterStore(ref_mfa.parameters)
         self.prepare_prms(ref_mfa.parameters)
         self.prepare_flws()
         self.prepare_stks()
@@ -174,6 +178,7 @@ class CementParameterReconciliation:
                 new_dims = new_dims.drop(letter)
         return new_dims
 
+    @profiled
     def correct_parameters(
         self,
         max_iter: int = 1,
@@ -193,7 +198,7 @@ class CementParameterReconciliation:
         Returns:
             The corrected parameters in their original dimensions.
         """
-        self.output_prms = deepcopy(self.input_prms)
+        self.output_prms = self.input_prms.snapshot()
 
         for i in range(max_iter):
             td = self.calc_top_down_stock(self.prms)
@@ -543,7 +548,8 @@ class CementParameterReconciliation:
         and re-normalize split parameters."""
         for prm_name, c in corrections.items():
             c_full = self.cast_correction_to_original_prm_dim(c)
-            self.output_prms[prm_name][...] = self.output_prms[prm_name] * c_full
+            prm = self.output_prms.writable(prm_name)
+            prm[...] = prm * c_full
             self.normalize_output_parameter(prm_name)
 
     def get_variances(self, prm_name: str) -> np.ndarray:
@@ -638,7 +644,7 @@ class CementParameterReconciliation:
         if prm_name not in self._normalization_dims:
             return
 
-        prm = self.output_prms[prm_name]
+        prm = self.output_prms.writable(prm_name)
         letter = prm.dims[self._normalization_dims[prm_name][0]].letter
 
         if prm_name in self._reconciled_split_items:
@@ -693,21 +699,6 @@ class CementParameterReconciliation:
         prm[...] = overflow * prm.get_shares_over(letter) + (1.0 - overflow) * coupled
 
 
-class DependencyTracker(dict):
-    """Dictionary that tracks accessed keys."""
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.accessed_keys = set()
-
-    def __getitem__(self, key):
-        # 1. Record that this key was used
-        self.accessed_keys.add(key)
-
-        # 2. Return the actual value so the math doesn't crash
-        return super().__getitem__(key)
-
-
 class AnalyzeParameterReconciliation:
     """Class to analyze parameter reconciliation results."""
 
@@ -718,8 +709,8 @@ class AnalyzeParameterReconciliation:
         adjusted_prms: dict[str, fd.Parameter],
     ):
         self.pr = pr
-        self.original_prms = deepcopy(original_prms)
-        self.adjusted_prms = deepcopy(adjusted_prms)
+        self.original_prms = ParameterStore(original_prms)
+        self.adjusted_prms = ParameterStore(adjusted_prms)
 
         self.original_prms["floorspace"] = self.original_prms["floorspace"][
             {"t": pr._year_of_reconciliation}
@@ -0,0 +1,230 @@
+import copy
+import csv
+import itertools
+import logging
+import os
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Optional
+
+from remind_mfa.cli.helper import configure_logger
+from remind_mfa.cli.sweep import run_scenario
+from remind_mfa.common.common_data_reader import InputData
+from remind_mfa.common.config_loader import CONFIG_DIR, load_config
+from remind_mfa.common.helpers import ModelNames, RemindMFABaseModel, get_model_class
+from remind_mfa.common.historic_mfa_cache import HistoricMFACache
+from remind_mfa.common.shared_parameters import SharedInputData
+
+# Input data by read-stage key and historic MFA cache of a worker process, set once by the pool
+# initializer and shared by all runs the worker executes.
+_worker_input_data: dict[str, InputData | SharedInputData] = {}
+_worker_historic_mfa_cache: Optional[HistoricMFACache] = None
+
+
+class BatchSpec(RemindMFABaseModel):
+    """Runs of one model with different configuration overrides, as read from a TOML batch file.
+
+    Overrides map dotted configuration paths, e.g. 'model_switches.regress_over', to values.
+    """
+
+    name: str
+    """Name of the batch. Exports and figures of its runs are written to subfolders with this
+    name."""
+    model: ModelNames
+    """Model to run."""
+    config: list[str] = ["default"]
+    """Configuration layers under config/ that the overrides are applied to."""
+    matrix: dict[str, list[Any]] = {}
+    """Values of each overridden configuration path. Every combination of values is one run."""
+    runs: list[dict[str, Any]] = []
+    """Further runs, each given by its overrides."""
+    jobs: int = 1
+    """Number of worker processes."""
+
+    def overrides(self) -> list[dict[str, Any]]:
+        """Return the overrides of all runs: the combinations of the matrix, then the explicit
+        runs."""
+        combinations = []
+        if self.matrix:
+            combinations = [
+                dict(zip(self.matrix, values))
+                for values in itertools.product(*self.matrix.values())
+            ]
+        return combinations + self.runs
+
+
+class BatchRun(RemindMFABaseModel):
+    name: str
+    """Name of the run, also the name of its export and figure subfolders."""
+    overrides: dict[str, Any]
+    config: dict
+    """Complete model configuration of the run."""
+    input_data_key: str
+    """Key of the input data of the run, see `CommonModel.input_data_key`."""
+
+
+def load_batch_spec(path: Path) -> BatchSpec:
+    """Read a batch file. The batch name defaults to the file name."""
+    with open(path, "rb") as stream:
+        data = tomllib.load(stream)
+    return BatchSpec(**{"name": path.stem, **data})
+
+
+def set_config_value(config: dict, path: str, value: Any):
+    """Set the configuration entry at a dotted `path`, e.g. 'model_switches.scenario'."""
+    *sections, name = path.split(".")
+    for section in sections:
+        config = config.setdefault(section, {})
+        if not isinstance(config, dict):
+            raise ValueError(f"Cannot override '{path}': '{section}' is not a table.")
+    config[name] = value
+
+
+def batch_runs(spec: BatchSpec, config_dir: Path = CONFIG_DIR) -> list[BatchRun]:
+    """Expand `spec` into its runs and validate their configurations, before any run starts."""
+    base_config = load_config(spec.config, spec.model, config_dir=config_dir)
+    model_class = get_model_class(spec.model)
+    overrides = spec.overrides()
+    if not overrides:
+        raise ValueError(f"Batch '{spec.name}' defines no runs; give a matrix or runs.")
+
+    runs = []
+    for i, run_overrides in enumerate(overrides):
+        name = f"run_{i:03d}"
+        config = copy.deepcopy(base_config)
+        for path, value in run_overrides.items():
+            set_config_value(config, path, value)
+        for section, key in (("export", "path"), ("visualization", "figures_path")):
+            config[section][key] = os.path.join(config[section][key], spec.name, name)
+        try:
+            cfg = model_class.ConfigCls(**config)
+        except ValueError as e:
+            raise ValueError(f"Invalid overrides {run_overrides} of {name}: {e}") from e
+        runs.append(
+            BatchRun(
+                name=name,
+                overrides=run_overrides,
+                config=config,
+                input_data_key=model_class.input_data_key(cfg),
+            )
+        )
+    return runs
+
+
+def read_batch_input_data(model: ModelNames, runs: list[BatchRun]) -> dict[str, InputData]:
+    """Read the input data once for each group of runs that can share it."""
+    model_class = get_model_class(model)
+    input_data = {}
+    for run in runs:
+        if run.input_data_key not in input_data:
+            logging.info(f"Reading input data for {run.name} and runs sharing it...")
+            cfg = model_class.ConfigCls(**run.config)
+            input_data[run.input_data_key] = model_class.read_input_data(cfg)
+    return input_data
+
+
+def _init_worker(input_data: dict[str, InputData | SharedInputData]) -> None:
+    global _worker_input_data, _worker_historic_mfa_cache
+    _worker_input_data = input_data
+    _worker_historic_mfa_cache = HistoricMFACache()
+
+
+def _timed_run(
+    run: BatchRun, input_data: InputData | SharedInputData, historic_mfa_cache: HistoricMFACache
+) -> float:
+    start = time.perf_counter()
+    run_scenario(run.config, input_data, historic_mfa_cache)
+    return time.perf_counter() - start
+
+
+def _run_in_worker(run: BatchRun) -> float:
+    """Entry point of a worker process: tag all log records with the run name first."""
+    configure_logger(prefix=run.name)
+    return _timed_run(run, _worker_input_data[run.input_data_key], _worker_historic_mfa_cache)
+
+
+def run_batch(spec: BatchSpec, config_dir: Path = CONFIG_DIR) -> list[dict]:
+    """Execute all runs of `spec` in up to `spec.jobs` worker processes, reading each distinct
+    input data only once. A failing run does not stop the others.
+
+    Writes an index of the runs with their overrides, status, run time and output folders to
+    index.csv in the batch export folder, and returns its rows.
+
+    With `input.share_parameters` set in a run's configuration, the workers map its input
+    parameters from shared memory instead of each receiving a copy.
+    """
+    runs = batch_runs(spec, config_dir=config_dir)
+    input_data = read_batch_input_data(spec.model, runs)
+    logging.info(
+        f"Batch '{spec.name}': {len(runs)} run(s) sharing {len(input_data)} input data set(s)."
+    )
+
+    results = {}
+    if spec.jobs <= 1 or len(runs) <= 1:
+        historic_mfa_cache = HistoricMFACache()
+        for run in runs:
+            logging.info(f"Running {run.name} with {run.overrides}...")
+            try:
+                results[run.name] = _timed_run(
+                    run, input_data[run.input_data_key], historic_mfa_cache
+                )
+            except Exception as e:
+                logging.exception(f"Run {run.name} failed.")
+                results[run.name] = e
+    else:
+        shared_keys = {
+            run.input_data_key for run in runs if run.config["input"].get("share_parameters")
+        }
+        worker_input_data = {
+            key: SharedInputData.publish(data) if key in shared_keys else data
+            for key, data in input_data.items()
+        }
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(spec.jobs, len(runs)),
+                initializer=_init_worker,
+                initargs=(worker_input_data,),
+            ) as executor:
+                futures = {executor.submit(_run_in_worker, run): run for run in runs}
+                for future in as_completed(futures):
+                    run = futures[future]
+                    try:
+                        results[run.name] = future.result()
+                    except Exception as e:
+                        logging.exception(f"Run {run.name} failed.")
+                        results[run.name] = e
+                    else:
+                        logging.info(f"Run {run.name} finished.")
+        finally:
+            for data in worker_input_data.values():
+                if isinstance(data, SharedInputData):
+                    data.close()
+
+    index = [index_row(run, results[run.name]) for run in runs]
+    write_index(index, os.path.dirname(runs[0].config["export"]["path"]))
+    return index
+
+
+def index_row(run: BatchRun, result: float | Exception) -> dict:
+    failed = isinstance(result, Exception)
+    return {
+        "run": run.name,
+        **run.overrides,
+        "status": f"failed: {result}" if failed else "ok",
+        "seconds": None if failed else round(result, 3),
+        "export_path": run.config["export"]["path"],
+        "figures_path": run.config["visualization"]["figures_path"],
+    }
+
+
+def write_index(index: list[dict], directory: str):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "index.csv")
+    columns = list(dict.fromkeys(column for row in index for column in row))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(index)
+    logging.info(f"Batch index written to {path}.")
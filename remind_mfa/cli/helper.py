@@ -1,3 +1,6 @@
+import logging
+from typing import Optional
+
 import typer
 
 from remind_mfa.common.config_loader import get_config_paths
@@ -9,3 +12,15 @@ def prompt_for_config_names() -> list[str]:
         f"Configs (comma-separated, available: {choices})", default="default"
     )
     return [name.strip() for name in entered_names.split(",") if name.strip()]
+
+
+def configure_logger(prefix: Optional[str] = None):
+    """Configure the root logger. A `prefix` tags every record, e.g. with the model name of a
+    worker process, so that interleaved output of parallel runs stays attributable."""
+    tag = f"[{prefix}] " if prefix else ""
+    logging.basicConfig(
+        format=f"%(asctime)s %(levelname)-8s {tag}%(message)s",
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+        force=True,
+    )
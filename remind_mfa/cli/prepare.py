@@ -0,0 +1,49 @@
+import logging
+import os
+
+from remind_mfa.common.common_config import InputCfg
+from remind_mfa.common.common_data_reader import InputData
+from remind_mfa.common.config_loader import load_config
+from remind_mfa.common.helpers import ModelNames, get_model_class
+from remind_mfa.common.input_bundle import InputBundle
+
+
+def bundle_source_files(input_cfg: InputCfg) -> dict[str, bytes]:
+    """Extracted source files to include in a bundle besides the parameters: the region mapping
+    and the validation data, by their path relative to the input data directory."""
+    files = {}
+    region_mapping_path = os.path.join(input_cfg.input_data_path, "input_data", "regionmapping.csv")
+    if os.path.exists(region_mapping_path):
+        with open(region_mapping_path, "rb") as f:
+            files["regionmapping.csv"] = f.read()
+    else:
+        logging.warning(f"No region mapping at {region_mapping_path} to include in the bundle.")
+
+    validation_path = os.path.join(input_cfg.input_data_path, "validation")
+    for root, _, filenames in os.walk(validation_path):
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, input_cfg.input_data_path).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                files[name] = f.read()
+    return files
+
+
+def prepare_input_bundles(config_names: list[str], models: list[ModelNames]) -> list[str]:
+    """Read the input data of each model and write it to the input bundle of its revision and
+    region mapping, together with the region mapping and validation data. Returns the paths of
+    the bundles written."""
+    bundles: dict[str, dict[str, tuple[str, InputData]]] = {}
+    files: dict[str, dict[str, bytes]] = {}
+    for model in models:
+        model_class = get_model_class(model)
+        cfg = model_class.ConfigCls(**load_config(config_names, model))
+        logging.info(f"Reading input data of {model.value}...")
+        input_data = model_class.read_input_files(cfg)
+        path = InputBundle.path_for(cfg.input)
+        bundles.setdefault(path, {})[model.value] = (model_class.bundle_key(cfg), input_data)
+        files.setdefault(path, {}).update(bundle_source_files(cfg.input))
+
+    for path, bundle_models in bundles.items():
+        InputBundle.write(path, bundle_models, files[path])
+    return list(bundles)
@@ -0,0 +1,85 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING
+
+from remind_mfa.cli.helper import configure_logger
+from remind_mfa.common.config_loader import load_config
+from remind_mfa.common.helpers import ModelNames, init_model
+
+if TYPE_CHECKING:
+    from remind_mfa.common.common_model import CommonModel
+
+
+def load_model_config(
+    config_names: list[str], model: ModelNames, resume: bool = False, profile: bool = False
+) -> dict:
+    """Load the configuration for one model. With `resume`, checkpointing is switched on and
+    stages with unchanged inputs are restored from their checkpoints. With `profile`, the run
+    records the time spent in each stage and sub-step."""
+    model_config = load_config(config_names, model)
+    if resume:
+        model_config.setdefault("checkpoints", {}).update(do_checkpoint=True, resume=True)
+    if profile:
+        model_config.setdefault("profiling", {}).update(do_profile=True)
+    return model_config
+
+
+def run_model(
+    config_names: list[str], model: ModelNames, resume: bool = False, profile: bool = False
+) -> None:
+    """Load the configuration for one model, then initialize, run, export and visualize it."""
+    model_config = load_model_config(config_names, model, resume=resume, profile=profile)
+    complete_run(init_model(cfg=model_config))
+
+
+def complete_run(model: CommonModel) -> None:
+    """Run, export and visualize an initialized model."""
+    logging.info(f"{type(model).__name__} instance created.")
+    try:
+        model.run()
+        logging.info("Model computations completed.")
+        model.report_parameter_usage()
+        model.export()
+        logging.info("Export completed.")
+        model.visualize()
+        logging.info("Visualization completed.")
+    finally:
+        if model.cfg.profiling.do_profile:
+            model.write_profile()
+
+
+def _run_model_in_worker(
+    config_names: list[str], model: ModelNames, resume: bool, profile: bool
+) -> None:
+    """Entry point of a worker process: tag all log records with the model name first."""
+    configure_logger(prefix=model.value)
+    run_model(config_names, model, resume=resume, profile=profile)
+
+
+def run_models_in_processes(
+    config_names: list[str],
+    models: list[ModelNames],
+    jobs: int,
+    resume: bool = False,
+    profile: bool = False,
+) -> list[ModelNames]:
+    """Run each model in its own worker process, at most `jobs` at a time.
+
+    A failing model does not stop the others. Returns the models that failed.
+    """
+    failed = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(models))) as executor:
+        futures = {
+            executor.submit(_run_model_in_worker, config_names, model, resume, profile): model
+            for model in models
+        }
+        for future in as_completed(futures):
+            model = futures[future]
+            try:
+                future.result()
+            except Exception:
+                logging.exception(f"Run of model '{model.value}' failed.")
+                failed.append(model)
+            else:
+                logging.info(f"Run of model '{model.value}' finished.")
+    return failed
@@ -0,0 +1,175 @@
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import TYPE_CHECKING, Optional
+
+import flodym as fd
+import numpy as np
+
+from remind_mfa.cli.sweep import run_scenario, scenario_config
+from remind_mfa.common.common_data_reader import InputData, clear_shared_drivers
+from remind_mfa.common.config_loader import load_config
+from remind_mfa.common.helpers import ModelNames, get_model_class
+from remind_mfa.common.historic_mfa_cache import HistoricMFACache
+
+if TYPE_CHECKING:
+    from remind_mfa.common.common_model import CommonModel
+
+
+class ModelServer:
+    """Runs models on request, keeping the input data and historic MFAs of earlier runs in memory.
+
+    A run request is a dict with the entries
+    - `model`: name of the model to run,
+    - `config`: names of the configuration layers, by default ['default'],
+    - `scenario`: scenario to run, by default the one of the configuration,
+    - `scenario_rows`: further scenario rows applied on top of the scenario, see
+      `ScenarioReader.rows`,
+    - `name`: name of the export and figure subfolders, by default the scenario name,
+    - `summary`: arrays to return, mapping names as in `CommonModel.named_arrays`, like
+      'future_mfa.flows.<flow name>', to the dimension letters to sum them to, or None to return
+      them in full.
+
+    Input data is read again if a configuration entry of the read stage changes. Changes to the
+    input-data files are not detected; clear the server to read them again.
+    """
+
+    def __init__(self):
+        self.input_data: dict[str, InputData] = {}
+        self.historic_mfa_caches: dict[ModelNames, HistoricMFACache] = {}
+
+    def run(self, request: dict) -> dict:
+        """Run the model described by `request` and return where its results were written, the
+        time the run took and the requested summary arrays."""
+        start = time.perf_counter()
+        model = ModelNames(request["model"])
+        config = load_config(request.get("config") or ["default"], model)
+        scenario = request.get("scenario") or config["model_switches"]["scenario"]
+        config = scenario_config(config, scenario, folder=request.get("name"))
+        historic_mfa_cache = self.historic_mfa_caches.setdefault(model, HistoricMFACache())
+        result = run_scenario(
+            config,
+            self.get_input_data(model, config),
+            historic_mfa_cache,
+            scenario_rows=request.get("scenario_rows"),
+        )
+        return {
+            "export_path": config["export"]["path"],
+            "figures_path": config["visualization"]["figures_path"],
+            "seconds": time.perf_counter() - start,
+            "summary": self.summarize(result, request.get("summary") or {}),
+        }
+
+    def get_input_data(self, model: ModelNames, config: dict) -> InputData:
+        """Return the input data for `config`, reading it only if no earlier run used the same
+        configuration entries of the read stage."""
+        model_class = get_model_class(model)
+        cfg = model_class.ConfigCls(**config)
+        key = model_class.input_data_key(cfg)
+        if key not in self.input_data:
+            logging.info(f"Reading input data for model '{model.value}'...")
+            self.input_data[key] = model_class.read_input_data(cfg)
+        else:
+            logging.info("Reusing input data read for an earlier run.")
+        return self.input_data[key]
+
+    @staticmethod
+    def summarize(model: CommonModel, summary: dict[str, Optional[list[str]]]) -> dict:
+        arrays = model.named_arrays()
+        unknown = [name for name in summary if name not in arrays]
+        if unknown:
+            raise ValueError(f"Unknown summary array(s) {unknown}. Available: {sorted(arrays)}.")
+        return {name: summary_array(arrays[name], letters) for name, letters in summary.items()}
+
+    def status(self) -> dict:
+        return {
+            "input_data": len(self.input_data),
+            "historic_mfas": {
+                model.value: len(cache.entries) for model, cache in self.historic_mfa_caches.items()
+            },
+        }
+
+    def clear(self):
+        """Drop all cached input data, shared drivers and historic MFAs."""
+        self.input_data.clear()
+        self.historic_mfa_caches.clear()
+        clear_shared_drivers()
+
+
+def summary_array(array: fd.FlodymArray, letters: Optional[list[str]] = None) -> dict:
+    """Return `array`, summed to the dimensions `letters` if given, as JSON-serializable dict."""
+    if letters is not None:
+        array = array.sum_to(tuple(letters))
+    return {
+        "dims": {dim.letter: [to_json(item) for item in dim.items] for dim in array.dims},
+        "values": array.values.tolist(),
+    }
+
+
+def to_json(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ModelRequestHandler(BaseHTTPRequestHandler):
+    """Serves `GET /status`, `POST /run` with a run request as JSON body, and `POST /clear`."""
+
+    server: ModelHTTPServer
+
+    def do_GET(self):
+        if self.path == "/status":
+            self.respond(200, self.server.model_server.status())
+        else:
+            self.respond(404, {"error": f"Unknown path '{self.path}'."})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self.respond(400, {"error": f"Invalid request body: {e}"})
+            return
+
+        if self.path == "/run":
+            try:
+                result = self.server.model_server.run(request)
+            except Exception as e:
+                logging.exception("Run request failed.")
+                self.respond(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+            self.respond(200, result)
+        elif self.path == "/clear":
+            self.server.model_server.clear()
+            self.respond(200, self.server.model_server.status())
+        else:
+            self.respond(404, {"error": f"Unknown path '{self.path}'."})
+
+    def respond(self, status: int, body: dict):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+
+class ModelHTTPServer(HTTPServer):
+    """HTTP server holding a `ModelServer`. Requests are handled one at a time, since a model run
+    records its assumptions and profile in module-global registries."""
+
+    def __init__(self, address: tuple[str, int], model_server: Optional[ModelServer] = None):
+        super().__init__(address, ModelRequestHandler)
+        self.model_server = model_server or ModelServer()
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765):
+    """Serve run requests at `host`:`port` until interrupted."""
+    with ModelHTTPServer((host, port)) as server:
+        logging.info(f"Serving model runs at http://{host}:{server.server_port}.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Server stopped.")
@@ -0,0 +1,196 @@
+import copy
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Optional
+
+from remind_mfa.cli.helper import configure_logger
+from remind_mfa.cli.runner import complete_run, load_model_config
+from remind_mfa.common.assumptions_doc import clear_assumptions
+from remind_mfa.common.common_data_reader import InputData
+from remind_mfa.common.extrapolation_cache import ExtrapolationCache
+from remind_mfa.common.helpers import ModelNames, get_model_class
+from remind_mfa.common.historic_mfa_cache import HistoricMFACache
+from remind_mfa.common.scenarios import ScenarioReader
+from remind_mfa.common.shared_parameters import SharedInputData
+
+if TYPE_CHECKING:
+    from remind_mfa.common.common_model import CommonModel
+
+# Input data, historic MFA cache and extrapolation cache of a worker process, set once by the
+# pool initializer and shared by all scenarios the worker runs.
+_worker_input_data: Optional[InputData | SharedInputData] = None
+_worker_historic_mfa_cache: Optional[HistoricMFACache] = None
+_worker_extrapolation_cache: Optional[ExtrapolationCache] = None
+
+
+def sweep_scenario_names(scenarios_path: str) -> list[str]:
+    """Return all scenarios of inheritance.csv that inherit from another scenario.
+
+    Root scenarios like BASE only hold defaults for their children and select no driver
+    scenario, so they cannot be run on their own.
+    """
+    inheritance = ScenarioReader.read_inheritance(scenarios_path)
+    return [name for name, parent in inheritance.items() if parent is not None]
+
+
+def scenario_config(config: dict, scenario: str, folder: Optional[str] = None) -> dict:
+    """Return a copy of the model configuration that selects `scenario` and writes the export
+    and figures into subfolders named `folder`, by default after the scenario."""
+    folder = folder or scenario
+    config = copy.deepcopy(config)
+    config["model_switches"]["scenario"] = scenario
+    config["export"]["path"] = os.path.join(config["export"]["path"], folder)
+    config["visualization"]["figures_path"] = os.path.join(
+        config["visualization"]["figures_path"], folder
+    )
+    return config
+
+
+def run_scenario(
+    config: dict,
+    input_data: InputData,
+    historic_mfa_cache: Optional[HistoricMFACache] = None,
+    scenario_rows: Optional[list[dict]] = None,
+    extrapolation_cache: Optional[ExtrapolationCache] = None,
+) -> CommonModel:
+    """Initialize, run, export and visualize one scenario from previously read input data.
+    `scenario_rows` are applied on top of the scenario, see `ScenarioReader.rows`."""
+    clear_assumptions()
+    os.makedirs(config["export"]["path"], exist_ok=True)
+    os.makedirs(config["visualization"]["figures_path"], exist_ok=True)
+    model = get_model_class(ModelNames(config["model"]))(
+        cfg=config,
+        input_data=input_data,
+        historic_mfa_cache=historic_mfa_cache,
+        scenario_rows=scenario_rows,
+        extrapolation_cache=extrapolation_cache,
+    )
+    complete_run(model)
+    return model
+
+
+def _init_worker(
+    input_data: InputData | SharedInputData,
+    historic_mfa_cache: HistoricMFACache,
+    extrapolation_cache: Optional[ExtrapolationCache] = None,
+) -> None:
+    global _worker_input_data, _worker_historic_mfa_cache, _worker_extrapolation_cache
+    _worker_input_data = input_data
+    _worker_historic_mfa_cache = historic_mfa_cache
+    _worker_extrapolation_cache = extrapolation_cache
+
+
+def _run_scenario_in_worker(config: dict) -> None:
+    """Entry point of a worker process: tag all log records with the scenario name first."""
+    configure_logger(prefix=config["model_switches"]["scenario"])
+    run_scenario(
+        config,
+        _worker_input_data,
+        _worker_historic_mfa_cache,
+        extrapolation_cache=_worker_extrapolation_cache,
+    )
+
+
+def warm_historic_mfa_cache(
+    historic_mfa_cache: HistoricMFACache, model: ModelNames, config: dict, input_data: InputData
+) -> None:
+    """Compute the historic MFA of one scenario up front, such that worker processes receive it
+    instead of each computing its own."""
+    try:
+        scenario_model = get_model_class(model)(
+            cfg=config, input_data=input_data, historic_mfa_cache=historic_mfa_cache
+        )
+        historic_mfa_cache.get_or_compute(scenario_model)
+    except Exception:
+        logging.exception("Could not compute the historic MFA up front, leaving it to the workers.")
+
+
+def read_scenario_extrapolations(
+    model: ModelNames, configs: dict[str, dict], input_data: InputData
+) -> Optional[ExtrapolationCache]:
+    """Read the extrapolation instructions of all scenarios, such that the first run in each
+    process extrapolates the parameters of all of them in one pass, see `ExtrapolationCache`.
+    Returns None if the scenarios cannot be read, leaving the extrapolation to each run."""
+    model_class = get_model_class(model)
+    try:
+        scenario_parameters = {
+            scenario: model_class.scenario_reader(
+                model_class.ConfigCls(**config), input_data.dims
+            ).get_parameters()
+            for scenario, config in configs.items()
+        }
+    except Exception:
+        logging.exception("Could not read the scenarios up front, leaving it to each run.")
+        return None
+    return ExtrapolationCache(scenario_parameters)
+
+
+def run_sweep(
+    config_names: list[str],
+    model: ModelNames,
+    scenarios: list[str],
+    jobs: int = 1,
+    resume: bool = False,
+    profile: bool = False,
+) -> list[str]:
+    """Run `model` for each of `scenarios`, reading the input data only once.
+
+    The historic MFA is computed once and reused by all scenarios with equal historic inputs.
+    The parameters of all scenarios are extrapolated together in one pass, see
+    `ExtrapolationCache`. With more than one job, the scenarios run in up to `jobs` worker
+    processes, each of which receives the input data and the historic MFA once, or maps the
+    input parameters from shared memory if `input.share_parameters` is set, and extrapolates the
+    parameters of all scenarios in its first run. A failing scenario does not stop the others.
+    Returns the scenarios that failed.
+    """
+    model_config = load_model_config(config_names, model, resume=resume, profile=profile)
+    model_class = get_model_class(model)
+    cfg = model_class.ConfigCls(**model_config)
+    logging.info(f"Reading input data for {len(scenarios)} scenario(s)...")
+    input_data = model_class.read_input_data(cfg)
+    configs = {scenario: scenario_config(model_config, scenario) for scenario in scenarios}
+    historic_mfa_cache = HistoricMFACache()
+    extrapolation_cache = None
+    if len(scenarios) > 1:
+        extrapolation_cache = read_scenario_extrapolations(model, configs, input_data)
+
+    failed = []
+    if jobs <= 1 or len(scenarios) <= 1:
+        for scenario, config in configs.items():
+            logging.info(f"Running scenario '{scenario}'...")
+            try:
+                run_scenario(
+                    config, input_data, historic_mfa_cache, extrapolation_cache=extrapolation_cache
+                )
+            except Exception:
+                logging.exception(f"Run of scenario '{scenario}' failed.")
+                failed.append(scenario)
+        return failed
+
+    warm_historic_mfa_cache(historic_mfa_cache, model, configs[scenarios[0]], input_data)
+    if cfg.input.share_parameters:
+        input_data = SharedInputData.publish(input_data)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(scenarios)),
+            initializer=_init_worker,
+            initargs=(input_data, historic_mfa_cache, extrapolation_cache),
+        ) as executor:
+            futures = {
+                executor.submit(_run_scenario_in_worker, config): scenario
+                for scenario, config in configs.items()
+            }
+            for future in as_completed(futures):
+                scenario = futures[future]
+                try:
+                    future.result()
+                except Exception:
+                    logging.exception(f"Run of scenario '{scenario}' failed.")
+                    failed.append(scenario)
+                else:
+                    logging.info(f"Run of scenario '{scenario}' finished.")
+    finally:
+        if isinstance(input_data, SharedInputData):
+            input_data.close()
+    return failed
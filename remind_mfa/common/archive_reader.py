@@ -0,0 +1,63 @@
+import os
+import tarfile
+from typing import Iterable
+
+# Member indices of the archives read so far, by path, size and modification time of the archive,
+# such that later readers of the same archive, e.g. in a model server, need not scan it again.
+_member_indices: dict[tuple[str, int, int], list[str]] = {}
+
+
+class ArchiveReader:
+    """Reads members of a .tgz archive into memory, without extracting the archive to disk.
+
+    Members are addressed by their base name, like the files of the extracted input data. Since
+    a gzip stream can only be read front to back, all members needed are read in one pass with
+    `load`. With the member index of the archive known, the pass stops after the last of them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.contents: dict[str, bytes] = {}
+
+    @property
+    def index_key(self) -> tuple[str, int, int]:
+        stat = os.stat(self.path)
+        return (os.path.abspath(self.path), stat.st_size, stat.st_mtime_ns)
+
+    def member_names(self) -> list[str]:
+        """Base names of all file members of the archive, scanning it only if not done before."""
+        if self.index_key not in _member_indices:
+            self.load([])
+        return _member_indices[self.index_key]
+
+    def load(self, names: Iterable[str]):
+        """Read the members with the given base names into memory, in a single pass."""
+        index_key = self.index_key
+        index = _member_indices.get(index_key)
+        wanted = set(names) - set(self.contents)
+        if index is not None:
+            wanted &= set(index)
+            if not wanted:
+                return
+
+        scanned = []
+        with tarfile.open(self.path, "r|gz") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                name = os.path.basename(member.name)
+                scanned.append(name)
+                if name in wanted:
+                    self.contents[name] = tar.extractfile(member).read()
+                    wanted.discard(name)
+                    if index is not None and not wanted:
+                        return
+        _member_indices[index_key] = scanned
+
+    def read(self, name: str) -> bytes:
+        """Return the content of the member with base name `name`."""
+        if name not in self.contents:
+            self.load([name])
+        if name not in self.contents:
+            raise FileNotFoundError(f"No member '{name}' in archive {self.path}.")
+        return self.contents[name]
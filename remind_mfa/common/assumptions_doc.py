@@ -37,6 +37,21 @@ def add_assumption_doc(
     _assumptions.append(assumption)
 
 
+def clear_assumptions():
+    """Remove all recorded assumptions, e.g. before the next run in the same process."""
+    _assumptions.clear()
+
+
+def recorded_assumptions() -> list["Assumption"]:
+    """Return a copy of the list of assumptions recorded so far."""
+    return list(_assumptions)
+
+
+def restore_assumptions(assumptions: list["Assumption"]):
+    """Append previously recorded assumptions, e.g. when restoring a checkpointed model state."""
+    _assumptions.extend(assumptions)
+
+
 class Assumption(RemindMFABaseModel):
     type: str
     name: str
@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import os
+import pickle
+from collections.abc import Mapping
+from typing import Any
+
+import flodym as fd
+import numpy as np
+from pydantic import BaseModel
+
+
+def fingerprint(*objects: Any) -> str:
+    """Return a hex digest identifying the content of the given objects.
+
+    Supports flodym arrays and dimension sets, numpy arrays, pydantic models and (nested)
+    dicts or other mappings, lists and tuples of these and of plain values.
+    """
+    hasher = hashlib.sha256()
+    for obj in objects:
+        _update_hash(hasher, obj)
+    return hasher.hexdigest()
+
+
+def _update_hash(hasher, obj: Any):
+    if isinstance(obj, fd.FlodymArray):
+        hasher.update(b"array")
+        _update_hash(hasher, obj.dims)
+        _update_hash(hasher, obj.values)
+    elif isinstance(obj, fd.DimensionSet):
+        hasher.update(b"dims")
+        for dim in obj:
+            _update_hash(hasher, (dim.name, dim.letter, list(dim.items)))
+    elif isinstance(obj, np.ndarray):
+        hasher.update(f"ndarray{obj.dtype}{obj.shape}".encode())
+        if obj.dtype == object:
+            hasher.update(repr(obj.tolist()).encode())
+        else:
+            hasher.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, BaseModel):
+        hasher.update(type(obj).__name__.encode())
+        for name in type(obj).model_fields:
+            _update_hash(hasher, (name, getattr(obj, name)))
+    elif isinstance(obj, Mapping):
+        hasher.update(b"dict")
+        for key in sorted(obj, key=str):
+            _update_hash(hasher, key)
+            _update_hash(hasher, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            _update_hash(hasher, item)
+    else:
+        hasher.update(f"{type(obj).__name__}:{obj!r}".encode())
+
+
+class CheckpointStore:
+    """Stores the outputs of run stages as pickle files, keyed by a fingerprint of the stage inputs.
+
+    Only the latest checkpoint of each stage is kept. Changes to the code are not part of the
+    fingerprints.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def stage_path(self, stage: str, key: str) -> str:
+        return os.path.join(self.path, stage, f"{key}.pkl")
+
+    def has(self, stage: str, key: str) -> bool:
+        return os.path.exists(self.stage_path(stage, key))
+
+    def save(self, stage: str, key: str, state: dict):
+        """Write `state` atomically, such that an interrupted run leaves no partial checkpoint,
+        and remove older checkpoints of the stage."""
+        stage_dir = os.path.join(self.path, stage)
+        os.makedirs(stage_dir, exist_ok=True)
+        path = self.stage_path(stage, key)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            os.remove(tmp_path)
+            logging.warning(f"Could not write checkpoint of stage '{stage}': {e}")
+            return
+        os.replace(tmp_path, path)
+        for filename in os.listdir(stage_dir):
+            if filename != os.path.basename(path):
+                os.remove(os.path.join(stage_dir, filename))
+        logging.info(f"Wrote checkpoint of stage '{stage}' to {path}.")
+
+    def load(self, stage: str, key: str) -> dict:
+        with open(self.stage_path(stage, key), "rb") as f:
+            return pickle.load(f)
@@ -3,7 +3,7 @@ from functools import cached_property
 
 import flodym as fd
 import pandas as pd
-from pydantic import model_validator
+from pydantic import Field, model_validator
 
 from remind_mfa.common.data_extrapolations import Extrapolation
 from remind_mfa.common.helpers import ModelNames, RegressOverModes, RemindMFABaseModel
@@ -38,6 +38,8 @@ class ModelSwitches(RemindMFABaseModel):
     """Variable to use as a predictor for stock extrapolation."""
     do_stock_extrapolation_with_time_factor: bool = False
     """Whether to include a time factor in stock extrapolation to account for innovation and associated changes in material applications over time."""
+    extrapolation_threads: int = Field(default=1, ge=1)
+    """Number of threads extrapolating independent scenario parameters concurrently. More than one may not pay off, since the extrapolations are small numpy operations."""
 
     @property
     def lifetime_model(self) -> type[fd.LifetimeModel]:
@@ -162,6 +164,8 @@ class InputCfg(RemindMFABaseModel):
     """Where to find the madrat output archives to extract input data from. If None, MADRAT_OUTPUT_FOLDER is used."""
     force_extract_tgz: bool
     """Whether to force re-extraction of input data from tgz files. If False, extraction is only performed if pre-extracted data is not up-to date."""
+    read_from_archive: bool = False
+    """Whether to read parameter files and region mapping straight from the input-data tgz in memory instead of extracting it. Validation data and documentation sources are then not extracted either."""
     input_data_path: str
     """Path to the input data directory."""
     scenarios_path: str
@@ -170,6 +174,18 @@ class InputCfg(RemindMFABaseModel):
     """Target input-data revision, corresponding to rev<revision> in tgz names."""
     region_mapping: str
     """Target region mapping, corresponding to <region> in tgz names."""
+    read_threads: int = Field(default=1, ge=1)
+    """Number of threads reading parameter files concurrently. With 1, the files are read one after another, as without threads."""
+    use_parameter_cache: bool = False
+    """Whether to store parsed parameter files in a binary cache in the input data directory and reuse them until the input data is extracted again. Writes cache files next to the input data, so it is off by default."""
+    use_scenario_cache: bool = False
+    """Whether to store the scenario parameters compiled from the scenario files in the input data directory and reuse them while the files along the inheritance chain are unchanged. Writes cache files next to the input data, so it is off by default."""
+    lazy_parameters: bool = False
+    """Whether to read each parameter only when a run first uses it, and report unused parameters after the run. Does not apply to input data shared by sweeps and batches."""
+    share_parameters: bool = False
+    """Whether the worker processes of sweeps and batches map the input parameters from files in shared memory, copying only the values a run changes, instead of each receiving a copy."""
+    use_input_bundle: bool = False
+    """Whether to map dimensions and parameters from the input bundle of the selected revision and region mapping, written by `remind_mfa.py prepare`, instead of reading the input files. Falls back to the input files if the bundle is missing or was prepared with a different configuration."""
 
     @cached_property
     def resolved_madrat_output_path(self) -> str:
@@ -194,6 +210,22 @@ class InputCfg(RemindMFABaseModel):
         return self
 
 
+class CheckpointCfg(RemindMFABaseModel):
+    do_checkpoint: bool = False
+    """Whether to save the outputs of each stage of a run."""
+    path: str = "data/checkpoints"
+    """Path to the checkpoint directory. Checkpoints are stored in subfolders by model, scenario and stage."""
+    resume: bool = False
+    """Whether to restore stages whose inputs are unchanged since their last checkpoint instead of recomputing them."""
+
+
+class ProfilingCfg(RemindMFABaseModel):
+    do_profile: bool = False
+    """Whether to record wall time, CPU time and call counts of stages and major sub-steps, written to profile.json in the export folder."""
+    do_trace_memory: bool = False
+    """Whether to also record peak and retained memory of each stage and the largest arrays alive after it. Slows down the run considerably."""
+
+
 class CommonCfg(RemindMFABaseModel):
     model: ModelNames
     """Model to use. Must be one of 'plastics', 'steel', or 'cement'."""
@@ -205,6 +237,10 @@ class CommonCfg(RemindMFABaseModel):
     """Visualization configuration."""
     export: ExportCfg
     """Data export configuration."""
+    checkpoints: CheckpointCfg = CheckpointCfg()
+    """Checkpoint configuration."""
+    profiling: ProfilingCfg = ProfilingCfg()
+    """Profiling configuration."""
 
     def to_df(self) -> pd.DataFrame:
         """Exports configuration parameters to pandas DataFrames."""
@@ -1,16 +1,53 @@
 import glob
+import hashlib
+import io
+import json
+import logging
 import os
+import shutil
 import tarfile
+import tempfile
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable
 
 import flodym as fd
+import numpy as np
 import pandas as pd
 
+from remind_mfa.common.archive_reader import ArchiveReader
 from remind_mfa.common.common_config import CommonCfg
 from remind_mfa.common.common_definition import RemindMFADefinition
 from remind_mfa.common.common_mappings import CommonDimensionFiles
-from remind_mfa.common.helpers import module_from_prefix, prefix_from_module
+from remind_mfa.common.helpers import RemindMFABaseModel, module_from_prefix, prefix_from_module
+from remind_mfa.common.parameter_cache import ParameterCache
+from remind_mfa.common.profiling import add_profile_record
+
+# Values of driver parameters read so far in this process, by key of their file content,
+# dimensions and read flags. Each model reads its own copy of a driver file, such that the models
+# of a multi-model run share the parsed values of identical copies.
+_shared_drivers: dict[str, np.ndarray] = {}
+
+
+def clear_shared_drivers():
+    """Drop the driver values shared between models, e.g. after the input data changed."""
+    _shared_drivers.clear()
+
+
+class InputData(RemindMFABaseModel):
+    """Dimensions and parameters as read from the input data, before any scenario is applied.
+
+    Several model instances, e.g. the scenarios of a sweep, can be initialized from one instance.
+    """
+
+    dims: fd.DimensionSet
+    parameters: dict[str, fd.Parameter]
+
+    def copy_parameters(self) -> dict[str, fd.Parameter]:
+        """Return copies of all parameters, such that a model run cannot alter the shared ones."""
+        return {name: prm.copy() for name, prm in self.parameters.items()}
 
 
 class CommonDataReader(fd.CompoundDataReader):
@@ -24,6 +61,10 @@ class CommonDataReader(fd.CompoundDataReader):
     MFA_SUFFIX = "_mfa"
     VALIDATION_SUFFIX = "_validationmfa"
 
+    # Parameters all models read with the same dimensions, shared between models as read-only
+    # arrays, see `MadratParameterReader`.
+    DRIVER_PARAMETERS = ("population", "gdppc")
+
     def __init__(
         self,
         cfg: CommonCfg,
@@ -39,6 +80,9 @@ class CommonDataReader(fd.CompoundDataReader):
         self.input_data_revision = cfg.input.input_data_revision
         self.region_mapping = cfg.input.region_mapping
         self.force_extract = cfg.input.force_extract_tgz
+        self.use_parameter_cache = cfg.input.use_parameter_cache
+        self.read_threads = cfg.input.read_threads
+        self.read_from_archive = cfg.input.read_from_archive
         self.definition = definition
         self.allow_missing_values = allow_missing_values
         self.allow_extra_values = allow_extra_values
@@ -48,6 +92,10 @@ class CommonDataReader(fd.CompoundDataReader):
     def shared_parameter_path(self) -> str:
         return os.path.join(self.input_data_path, "input_data")
 
+    @property
+    def parameter_cache_path(self) -> str:
+        return os.path.join(self.input_data_path, "parameter_cache")
+
     @property
     def validation_path(self) -> str:
         return os.path.join(self.input_data_path, "validation")
@@ -60,19 +108,27 @@ class CommonDataReader(fd.CompoundDataReader):
     def regions_filename(self) -> str:
         return "regions.txt"
 
+    @property
+    def manifest_filename(self) -> str:
+        return "manifest.json"
+
     def get_material_dimension_path(self, material: str) -> str:
         return os.path.join(self.input_data_path, "dimensions", material)
 
     def prepare_input_readers(self):
+        if self.read_from_archive:
+            self.prepare_archive_readers()
+            return
+
         # prepare directory for extracted input data
         os.makedirs(self.shared_parameter_path, exist_ok=True)
 
-        # extract tar file if needed
-        if self.extraction_needed(self.shared_parameter_path):
+        # extract the files of the selected model if needed
+        if self.extraction_needed(self.shared_parameter_path, self.required_members()):
             self.extract_tar_file(self.shared_parameter_path)
 
         # extract the matching validation archive (optional; warns if not found)
-        if self.extraction_needed(self.validation_path):
+        if self.extraction_needed(self.validation_path, ()):
             self.extract_validation_tar_file(self.validation_path)
 
         # dimensions
@@ -86,10 +142,42 @@ class CommonDataReader(fd.CompoundDataReader):
             parameter_files,
             allow_extra_values=self.allow_extra_values,
             allow_missing_values=self.allow_missing_values,
+            cache=ParameterCache(self.parameter_cache_path) if self.use_parameter_cache else None,
+            threads=self.read_threads,
+            shared=self.DRIVER_PARAMETERS,
         )
 
         super().__init__(dimension_reader=dimension_reader, parameter_reader=parameter_reader)
 
+    def prepare_archive_readers(self):
+        """Set up readers taking the parameter files and the region mapping straight from the
+        input-data archive, in memory. Nothing is extracted, including the validation archive."""
+        archive = ArchiveReader(self.get_target_tgz_path(self.MFA_SUFFIX))
+
+        # member names instead of paths
+        dimension_files = self.get_dimension_dict("", archive=archive)
+        parameter_files = self.get_parameter_dict("")
+        self.validate_parameter_files(parameter_files, archive=archive)
+        archive.load(list(parameter_files.values()) + ["regionmapping.csv"])
+
+        dimension_reader = CommonDimensionReader(dimension_files, archive=archive)
+        parameter_reader = MadratParameterReader(
+            parameter_files,
+            allow_extra_values=self.allow_extra_values,
+            allow_missing_values=self.allow_missing_values,
+            cache=ParameterCache(self.parameter_cache_path) if self.use_parameter_cache else None,
+            threads=self.read_threads,
+            archive=archive,
+            shared=self.DRIVER_PARAMETERS,
+        )
+        super().__init__(dimension_reader=dimension_reader, parameter_reader=parameter_reader)
+
+    def read_parameters(
+        self, parameter_definitions: list[fd.ParameterDefinition], dims: fd.DimensionSet
+    ) -> dict[str, fd.Parameter]:
+        """Read all parameters with the parameter reader, which reads files concurrently."""
+        return self.parameter_reader.read_parameters(parameter_definitions, dims)
+
     @staticmethod
     def read_text_file(path: str) -> str | None:
         if not os.path.exists(path):
@@ -129,14 +217,45 @@ class CommonDataReader(fd.CompoundDataReader):
 
         return rev, regions
 
-    def extraction_needed(self, material_parameter_path: str) -> bool:
-        if self.force_extract:
+    def extraction_needed(self, material_parameter_path: str, members: Iterable[str]) -> bool:
+        """Whether the folder lacks the configured revision of the selected model's files, or
+        of any of the given `members`."""
+        if self.force_extract or not self.is_current_revision(material_parameter_path):
+            return True
+        manifest = self.read_manifest(material_parameter_path)
+        if self.model_class.value not in manifest["models"]:
             return True
+        return any(member not in manifest["members"] for member in members)
+
+    def is_current_revision(self, material_parameter_path: str) -> bool:
         rev_path = os.path.join(material_parameter_path, self.rev_filename)
         regions_path = os.path.join(material_parameter_path, self.regions_filename)
         current_rev = self.read_text_file(rev_path)
         current_regions = self.read_text_file(regions_path)
-        return current_rev != self.input_data_revision or current_regions != self.region_mapping
+        return current_rev == self.input_data_revision and current_regions == self.region_mapping
+
+    def read_manifest(self, material_parameter_path: str) -> dict:
+        """Manifest of the folder: the models whose files are extracted from the revision in
+        `rev_filename`, and the path, size and checksum of each extracted member."""
+        content = self.read_text_file(os.path.join(material_parameter_path, self.manifest_filename))
+        if content is None:
+            return {"models": [], "members": {}}
+        return json.loads(content)
+
+    def required_members(self) -> set[str]:
+        """Names of the archive members the selected model reads."""
+        members = {os.path.basename(path) for path in self.get_parameter_dict("").values()}
+        if any(dimension.name == "Region" for dimension in self.definition.dimensions):
+            members.add("regionmapping.csv")
+        return members
+
+    def belongs_to_model(self, filename: str) -> bool:
+        """Whether an archive member is needed by the selected model: files with the prefix of
+        another model are not, files without a model prefix are shared by all models."""
+        try:
+            return module_from_prefix(filename.split("_")[0]) == self.model_class
+        except ValueError:
+            return True
 
     @staticmethod
     def build_target_tgz_pattern(
@@ -187,6 +306,9 @@ class CommonDataReader(fd.CompoundDataReader):
             )
 
         tgz_path = self.get_target_tgz_path(self.MFA_SUFFIX)
+        if not self.is_current_revision(material_parameter_path):
+            # parsed parameters of the previous revision
+            shutil.rmtree(self.parameter_cache_path, ignore_errors=True)
         self._extract_and_record(tgz_path, material_parameter_path, route_docs=True)
 
     def extract_validation_tar_file(self, validation_path: str):
@@ -238,7 +360,16 @@ class CommonDataReader(fd.CompoundDataReader):
         route_docs: bool,
         suffix: str = MFA_SUFFIX,
     ):
-        """Extract ``tgz_path`` into ``target_path`` and record its rev/regions metadata there.
+        """Extract the members of ``tgz_path`` belonging to the selected model into
+        ``target_path`` and record its rev/regions metadata there.
+
+        Only members whose content differs from the checksum in the manifest of the folder are
+        written, also across revisions, such that a new revision only rewrites changed files.
+        With ``force_extract``, the files on disk are checked against the archive instead.
+        Changed members are written to temporary files first and each moved into place
+        atomically. The manifest and then the rev/regions metadata are written last, such that an
+        interrupted extraction is completed by the next one rather than leaving files that pass
+        as extracted.
 
         If ``route_docs`` is set, documentation-source files (see ``DOC_SOURCE_FILES``) are
         flattened into this repo's ``docs/`` folder instead of ``target_path``.
@@ -249,27 +380,100 @@ class CommonDataReader(fd.CompoundDataReader):
         if route_docs:
             os.makedirs(docs_path, exist_ok=True)
 
+        # temporary files of an interrupted extraction
+        for path in glob.glob(os.path.join(target_path, "**", ".extract_*"), recursive=True):
+            os.remove(path)
+
+        manifest = self.read_manifest(target_path)
+        if not self.is_current_revision(target_path):
+            # the other models' files are still from the previous revision
+            manifest["models"] = []
+
+        n_extracted = n_unchanged = 0
         with tarfile.open(tgz_path, "r:gz") as tar:
             for member in tar.getmembers():
-                if route_docs and os.path.basename(member.name) in self.DOC_SOURCE_FILES:
+                filename = os.path.basename(member.name)
+                if route_docs and filename in self.DOC_SOURCE_FILES:
                     # flatten so the file lands directly as docs/<basename>
-                    member.name = os.path.basename(member.name)
-                    tar.extract(member, path=docs_path)
-                else:
-                    tar.extract(member, path=target_path)
+                    content = tar.extractfile(member).read()
+                    self._write_atomically(content, docs_path / filename, member.mode)
+                elif member.isfile() and self.belongs_to_model(filename):
+                    content = tar.extractfile(member).read()
+                    relative_path = self._member_path(member.name)
+                    path = os.path.join(target_path, relative_path)
+                    entry = {
+                        "path": relative_path,
+                        "size": len(content),
+                        "sha256": hashlib.sha256(content).hexdigest(),
+                    }
+                    if self._is_unchanged(path, entry, manifest["members"].get(filename)):
+                        n_unchanged += 1
+                    else:
+                        self._write_atomically(content, path, member.mode)
+                        n_extracted += 1
+                    manifest["members"][filename] = entry
+        logging.info(
+            f"Extracted {n_extracted} file(s) of {os.path.basename(tgz_path)}, "
+            f"{n_unchanged} unchanged."
+        )
 
+        if self.model_class.value not in manifest["models"]:
+            manifest["models"].append(self.model_class.value)
         rev, regions = self.parse_archive_name(os.path.basename(tgz_path), suffix)
+        self._write_atomically(
+            json.dumps(manifest, indent=1).encode(),
+            os.path.join(target_path, self.manifest_filename),
+        )
         self.write_text_file(os.path.join(target_path, self.rev_filename), rev)
         self.write_text_file(os.path.join(target_path, self.regions_filename), regions)
 
-    def validate_parameter_files(self, parameter_files: dict[str, str]):
-        """Validate that all expected parameter files for the selected model exist."""
-        missing = [
-            (name, path) for name, path in parameter_files.items() if not os.path.exists(path)
-        ]
+    def _is_unchanged(self, path: str, entry: dict, manifest_entry: dict | None) -> bool:
+        """Whether the file of a member at `path` already has the content described by `entry`,
+        by its manifest entry or, with ``force_extract``, by its content on disk."""
+        if not os.path.exists(path):
+            return False
+        if self.force_extract:
+            with open(path, "rb") as f:
+                return hashlib.file_digest(f, "sha256").hexdigest() == entry["sha256"]
+        return manifest_entry == entry
+
+    @staticmethod
+    def _member_path(name: str) -> str:
+        path = os.path.normpath(name)
+        if os.path.isabs(path) or path.startswith(".."):
+            raise ValueError(f"Archive member '{name}' lies outside the extraction folder.")
+        return path
+
+    @staticmethod
+    def _write_atomically(content: bytes, path: str | Path, mode: int = 0o644):
+        """Write `content` to a temporary file next to `path`, then move it to `path` in one
+        step."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=".extract_", delete=False) as f:
+            f.write(content)
+        os.chmod(f.name, mode)
+        os.replace(f.name, path)
+
+    def validate_parameter_files(
+        self, parameter_files: dict[str, str], archive: ArchiveReader | None = None
+    ):
+        """Validate that all expected parameter files for the selected model exist, in the
+        shared input_data folder or, if given, in the `archive`."""
+        if archive is None:
+            location = f"shared input_data folder '{self.shared_parameter_path}'"
+            missing = [
+                (name, path) for name, path in parameter_files.items() if not os.path.exists(path)
+            ]
+        else:
+            location = f"archive '{archive.path}'"
+            members = set(archive.member_names())
+            missing = [
+                (name, path) for name, path in parameter_files.items() if path not in members
+            ]
         if missing:
             raise FileNotFoundError(
-                f"Missing parameter files in shared input_data folder '{self.shared_parameter_path}' for model "
+                f"Missing parameter files in {location} for model "
                 f"'{self.model_class}': { [f'{name} -> {os.path.basename(path)}' for name, path in missing]}"
             )
 
@@ -290,7 +494,9 @@ class CommonDataReader(fd.CompoundDataReader):
                     f"Parameter file '{filename}' does not belong to selected model '{self.model_class}'."
                 )
 
-    def get_dimension_dict(self, material_parameter_path: str) -> dict[str, str]:
+    def get_dimension_dict(
+        self, material_parameter_path: str, archive: ArchiveReader | None = None
+    ) -> dict[str, str]:
         material_dimension_path = self.get_material_dimension_path(self.model_class)
 
         dimension_files: dict[str, str] = {}
@@ -302,7 +508,10 @@ class CommonDataReader(fd.CompoundDataReader):
         # Special case for Region dimensions
         if "Region" in dimension_files:
             regionmapping_path = os.path.join(material_parameter_path, "regionmapping.csv")
-            if not os.path.exists(regionmapping_path):
+            if archive is not None:
+                if regionmapping_path not in archive.member_names():
+                    raise FileNotFoundError(f"No regionmapping.csv found in archive {archive.path}")
+            elif not os.path.exists(regionmapping_path):
                 raise FileNotFoundError(
                     f"No regionmapping.csv found in shared input_data folder {material_parameter_path}"
                 )
@@ -326,11 +535,18 @@ class CommonDimensionReader(fd.CSVDimensionReader):
     """
     Custom dimension reader that reads Region dimensions from mrindustry regionmapping .csv.
     Everything else works as in flodym.CSVDimensionReader.
+    With an `archive`, the region mapping file name refers to a member of the archive.
     """
 
+    def __init__(self, dimension_files: dict, archive: ArchiveReader | None = None):
+        super().__init__(dimension_files)
+        self.archive = archive
+
     def read_dimension(self, definition: fd.DimensionDefinition):
         if definition.name == "Region":
             path = self.dimension_files[definition.name]
+            if self.archive is not None:
+                path = io.BytesIO(self.archive.read(path))
             df = pd.read_csv(path, delimiter=";")
             unique_regions = df["RegionCode"].unique()
             return fd.Dimension.from_np(unique_regions, definition)
@@ -342,35 +558,248 @@ class MadratParameterReader(fd.CSVParameterReader):
     """
     Custom parameter reader for .cs4r files that extracts header and skiprows information from the file.
     Everything else inherited from flodym.CSVParameterReader.
+    With a `cache`, parsed values are stored and reused while file, dimensions and flags are unchanged.
+    With several `threads`, parameter files are read concurrently.
+    With an `archive`, the file names refer to members of the archive, which are read in memory.
+    The values of `shared` parameters are made read-only and reused by all readers in the process
+    that read the same content with the same dimensions and flags.
+
+    Files are parsed with the dimension columns as categoricals and aligned with the dimensions
+    on their category codes. Data that needs the general conversion of flodym, e.g. with
+    duplicate or missing entries, is converted with `fd.Parameter.from_df` instead.
     """
 
-    def read_parameter_values(self, parameter_name: str, dims):
-        self.pre_read_parameter_values(parameter_name)
-        return super().read_parameter_values(parameter_name, dims)
+    def __init__(
+        self,
+        parameter_files: dict = None,
+        allow_missing_values: bool = False,
+        allow_extra_values: bool = False,
+        cache: ParameterCache | None = None,
+        threads: int = 1,
+        archive: ArchiveReader | None = None,
+        shared: Iterable[str] = (),
+    ):
+        super().__init__(
+            parameter_files,
+            allow_missing_values=allow_missing_values,
+            allow_extra_values=allow_extra_values,
+        )
+        self.cache = cache
+        self.threads = threads
+        self.archive = archive
+        self.shared = set(shared)
+
+    def read_parameters(
+        self, parameter_definitions: list[fd.ParameterDefinition], dims: fd.DimensionSet
+    ) -> dict[str, fd.Parameter]:
+        """Read the parameter files in up to `threads` threads.
+
+        The parameters are returned in the order of their definitions, and the first failing
+        definition raises, as when reading one after another. Wall and CPU time of each file are
+        logged, and added to the profile if profiling is enabled.
+        """
+
+        def read(definition: fd.ParameterDefinition) -> tuple[fd.Parameter, float, float]:
+            wall_start, cpu_start = time.perf_counter(), time.thread_time()
+            parameter = self.read_parameter_values(
+                definition.name, dims.get_subset(definition.dim_letters)
+            )
+            return parameter, time.perf_counter() - wall_start, time.thread_time() - cpu_start
+
+        if self.threads > 1:
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                results = list(executor.map(read, parameter_definitions))
+        else:
+            results = list(map(read, parameter_definitions))
+
+        parameters = {}
+        timings = []
+        for definition, (parameter, wall_time, cpu_time) in zip(parameter_definitions, results):
+            parameters[definition.name] = parameter
+            timings.append((definition.name, wall_time, cpu_time))
+            add_profile_record(f"read {definition.name}", wall_time, cpu_time)
+        timings.sort(key=lambda timing: timing[1], reverse=True)
+        logging.info(
+            f"Read {len(parameters)} parameter files in {self.threads} thread(s). Slowest: "
+            + ", ".join(f"{name} {wall_time:.2f} s" for name, wall_time, _ in timings[:5])
+        )
+        for name, wall_time, cpu_time in timings:
+            logging.debug(f"Read parameter {name} in {wall_time:.3f} s ({cpu_time:.3f} s CPU).")
+        return parameters
 
-    def pre_read_parameter_values(self, parameter_name: str):
-        """Extract header and skiprows from .cs4r file and set read_csv_kwargs accordingly."""
+    def read_source(self, parameter_name: str) -> bytes:
+        """Return the content of the .cs4r file of a parameter, from the archive if given."""
         if self.parameter_filenames is None:
             raise ValueError("No parameter files specified.")
-        datasets_path = self.parameter_filenames[parameter_name]
-        header, skiprows = self.extract_cs4r_info(datasets_path)
-        self.read_csv_kwargs = {"names": header, "skiprows": skiprows}
+        source = self.parameter_filenames[parameter_name]
+        if self.archive is not None:
+            return self.archive.read(source)
+        with open(source, "rb") as f:
+            return f.read()
+
+    def read_parameter_values(self, parameter_name: str, dims):
+        content = self.read_source(parameter_name)
+        if parameter_name not in self.shared:
+            return self.load_parameter_values(parameter_name, dims, content)
+
+        key = ParameterCache.key(content, dims, self.allow_missing_values, self.allow_extra_values)
+        if key in _shared_drivers:
+            logging.debug(f"Reusing the values of {parameter_name} read by another model.")
+            return fd.Parameter(dims=dims, name=parameter_name, values=_shared_drivers[key])
+        parameter = self.load_parameter_values(parameter_name, dims, content)
+        parameter.values.flags.writeable = False
+        _shared_drivers[key] = parameter.values
+        return parameter
+
+    def load_parameter_values(self, parameter_name: str, dims, content: bytes):
+        """Return the values of a parameter from the cache, or else parse `content`."""
+        if self.cache is None:
+            return self.parse_parameter_values(parameter_name, dims, content)
+
+        source = self.parameter_filenames[parameter_name]
+        key = self.cache.key(content, dims, self.allow_missing_values, self.allow_extra_values)
+        values = self.cache.load(source, key)
+        if values is not None and values.shape == dims.shape:
+            return fd.Parameter(dims=dims, name=parameter_name, values=values)
+        parameter = self.parse_parameter_values(parameter_name, dims, content)
+        self.cache.save(source, key, parameter.values)
+        return parameter
+
+    def parse_parameter_values(self, parameter_name: str, dims, content: bytes):
+        """Parse the .cs4r `content` of a parameter. Leaves the reader unchanged, such that
+        several files can be parsed concurrently."""
+        source = self.parameter_filenames[parameter_name]
+        # only decodes the leading comment lines
+        lines = io.TextIOWrapper(io.BytesIO(content), encoding="utf-8")
+        header, skiprows = self.parse_cs4r_header(lines, source)
+        try:
+            data = pd.read_csv(
+                io.BytesIO(content),
+                names=header,
+                skiprows=skiprows,
+                dtype={column: "category" for column in header[:-1]} | {header[-1]: np.float64},
+            )
+            values = self.align_values(data, dims)
+        except ValueError:
+            values = None
+        if values is not None:
+            return fd.Parameter(dims=dims, name=parameter_name, values=values)
+
+        logging.debug(f"Converting {source} with flodym.")
+        data = pd.read_csv(io.BytesIO(content), names=header, skiprows=skiprows)
+        return fd.Parameter.from_df(
+            dims=dims,
+            name=parameter_name,
+            df=data,
+            allow_missing_values=self.allow_missing_values,
+            allow_extra_values=self.allow_extra_values,
+        )
+
+    def align_values(self, data: pd.DataFrame, dims: fd.DimensionSet) -> np.ndarray | None:
+        """Return the values of `data`, in long format with categorical dimension columns, as an
+        array of the shape of `dims`. Returns None if the data does not map onto the dimensions
+        one to one, leaving the conversion and any errors to flodym.
+
+        As in flodym, dimension columns are found by dimension name or letter, or else by their
+        items, and dimensions with a single item need no column.
+        """
+        *dim_columns, value_column = data.columns
+        if any(self.same_items([value_column], dim) for dim in dims):
+            # wide format
+            return None
+
+        indices = {}
+        for column in dim_columns:
+            categories = data[column].cat.categories.map(str.strip)
+            dim = self.find_dimension(column, categories, dims)
+            if dim is None or dim.name in indices:
+                return None
+            positions = {item: i for i, item in enumerate(dim.items)}
+            convert = self.item_type(dim)
+            try:
+                lookup = [positions.get(convert(c), -1) for c in categories]
+            except ValueError:
+                return None
+            codes = data[column].cat.codes.to_numpy()
+            if (codes < 0).any():
+                return None
+            indices[dim.name] = np.array(lookup, dtype=np.intp)[codes]
+
+        for dim in dims:
+            if dim.name not in indices:
+                if len(dim.items) != 1:
+                    return None
+                indices[dim.name] = np.zeros(len(data), dtype=np.intp)
+
+        values = data[value_column].to_numpy()
+        index = tuple(indices[dim.name] for dim in dims)
+        valid = np.logical_and.reduce([i >= 0 for i in index])
+        if not valid.all():
+            if not self.allow_extra_values:
+                return None
+            index = tuple(i[valid] for i in index)
+            values = values[valid]
+
+        flat_index = np.ravel_multi_index(index, dims.shape)
+        if flat_index.size and np.bincount(flat_index).max() > 1:
+            return None
+        if self.allow_missing_values:
+            values = np.nan_to_num(values, nan=0.0)
+        elif flat_index.size != np.prod(dims.shape) or np.isnan(values).any():
+            return None
+
+        aligned = np.zeros(dims.shape)
+        aligned.flat[flat_index] = values
+        return aligned
+
+    @staticmethod
+    def find_dimension(
+        column: str, items: Iterable[str], dims: fd.DimensionSet
+    ) -> fd.Dimension | None:
+        """Dimension of a data column, by name or letter of the column or by its items."""
+        if column in dims.names or column in dims.letters:
+            return dims[column]
+        for dim in dims:
+            if MadratParameterReader.same_items(items, dim):
+                return dim
+        return None
+
+    @staticmethod
+    def same_items(items: Iterable[str], dim: fd.Dimension) -> bool:
+        """Whether `items`, converted to the type of the dimension, are its items."""
+        convert = MadratParameterReader.item_type(dim)
+        try:
+            items = [convert(item) for item in items]
+        except ValueError:
+            return False
+        return set(items) == set(dim.items)
+
+    @staticmethod
+    def item_type(dim: fd.Dimension) -> type:
+        """Type to convert item strings to, as pandas would infer it if not given by the
+        dimension."""
+        return dim.dtype or type(dim.items[0])
 
     @staticmethod
     def extract_cs4r_info(filepath: str):
         """Extract header and skiprows from .cs4r file."""
+        with open(filepath, "r") as file:
+            return MadratParameterReader.parse_cs4r_header(file, filepath)
+
+    @staticmethod
+    def parse_cs4r_header(lines: Iterable[str], source: str):
+        """Extract header and skiprows from the lines of a .cs4r file."""
         pre_str = "dimensions: ("
         post_str = ")"
         header = None
-        with open(filepath, "r") as file:
-            for idx, line in enumerate(file):
-                if line.startswith("*"):
-                    if pre_str in line:
-                        # extract header between pre_str and post_str
-                        header_str = line.split(pre_str)[1].split(post_str)[0]
-                        header = [dim.strip() for dim in header_str.split(",")]
-                else:
-                    if header is None:
-                        raise ValueError(f"No header line found in {filepath}")
-                    break
+        for idx, line in enumerate(lines):
+            if line.startswith("*"):
+                if pre_str in line:
+                    # extract header between pre_str and post_str
+                    header_str = line.split(pre_str)[1].split(post_str)[0]
+                    header = [dim.strip() for dim in header_str.split(",")]
+            else:
+                if header is None:
+                    raise ValueError(f"No header line found in {source}")
+                break
         return header, idx
@@ -8,8 +8,6 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, Optional
 
 import flodym as fd
-import flodym.export as fde
-import pyam
 
 from remind_mfa.common.assumptions_doc import assumptions_df, assumptions_str
 from remind_mfa.common.common_config import CommonCfg, ExportCfg
@@ -19,6 +17,9 @@ from remind_mfa.common.common_mfa_system import CommonMFASystem
 from remind_mfa.common.helpers import RemindMFABaseModel
 
 if TYPE_CHECKING:
+    # pyam and the flodym exporters are imported where they are used, such that runs without
+    # these exports do not load them.
+    import pyam
     from remind_mfa.common.common_model import CommonModel
 
 
@@ -60,6 +61,8 @@ class CommonDataExporter(RemindMFABaseModel):
         self.export_custom(model)
 
     def export_common(self, model: "CommonModel"):
+        import flodym.export as fde
+
         mfa = model.future_mfa
         if self.cfg.pickle.do_export:
             fde.export_mfa_to_pickle(mfa=mfa, export_path=self.export_path("pickle", "mfa.pickle"))
@@ -193,6 +196,8 @@ class CommonDataExporter(RemindMFABaseModel):
         instead of a plain sum (e.g. per-capita variables weighted by Population),
         mapping variable -> weight variable.
         """
+        import pyam
+
         iamc_dataframes = []
         split_parent_components: dict[str, list[str]] = {}
         region_weights: dict[str, str] = {}
@@ -250,6 +255,8 @@ class CommonDataExporter(RemindMFABaseModel):
         self, mfa: CommonMFASystem, iamc_var: IamcVariable, constants: dict
     ) -> tuple[pyam.IamDataFrame, list[str]]:
         """Build the IamDataFrame for a iamc variable and return it with the variable names it produced."""
+        import pyam
+
         df = self.to_iamc_df(iamc_var.calculation_function(mfa))
         df["variable"] = iamc_var.variable_name
         if iamc_var.split_name is not None:
@@ -1,13 +1,15 @@
-import copy
+import functools
+import glob
 import logging
-from typing import Optional
+import os
+from typing import Callable, Optional
 import flodym as fd
 import numpy as np
 
 from remind_mfa.common.common_config import CommonCfg
 from remind_mfa.common.scenarios import ScenarioReader
 from remind_mfa.common.common_definition import scenario_parameters as common_scn_prm_def
-from remind_mfa.common.common_data_reader import CommonDataReader
+from remind_mfa.common.common_data_reader import CommonDataReader, InputData
 from remind_mfa.common.common_mappings import CommonDimensionFiles, CommonDisplayNames
 from remind_mfa.common.common_export import CommonDataExporter
 from remind_mfa.common.common_visualization import CommonVisualizer
@@ -18,6 +20,14 @@ from remind_mfa.common.parameter_extrapolation import ParameterExtrapolationMana
 from remind_mfa.common.data_transformations import Bound, BoundList
 from remind_mfa.common.stock_extrapolation import StockExtrapolation
 from remind_mfa.common.helpers import RegressOverModes
+from remind_mfa.common.checkpoints import CheckpointStore, fingerprint
+from remind_mfa.common.pipeline import Pipeline, Stage, config_value
+from remind_mfa.common.profiling import enable_profiling, profile_summary, write_profile
+from remind_mfa.common.extrapolation_cache import ExtrapolationCache
+from remind_mfa.common.historic_mfa_cache import HistoricMFACache
+from remind_mfa.common.lazy_parameters import LazyParameters
+from remind_mfa.common.parameter_store import ParameterStore
+from remind_mfa.common.input_bundle import InputBundle
 
 
 class CommonModel:
@@ -32,116 +42,490 @@ class CommonModel:
     custom_scn_prm_def = []
     get_definition = staticmethod(get_definition)
 
+    # Stages of a model in order of execution. With checkpoints, a stage is only recomputed if
+    # the configuration entries or attributes it consumes have changed.
+    stages = [
+        Stage(
+            name="read",
+            config=(
+                "model",
+                "input.madrat_output_path",
+                "input.force_extract_tgz",
+                "input.input_data_path",
+                "input.input_data_revision",
+                "input.region_mapping",
+                "model_switches.lifetime_model_name",
+            ),
+            produces=("dims", "parameters"),
+        ),
+        Stage(
+            name="scenario",
+            config=("model", "input.scenarios_path", "model_switches.scenario"),
+            consumes=("dims", "parameters"),
+            produces=("scenario_parameters", "parameters"),
+        ),
+        Stage(
+            name="historic_mfa",
+            config=("model", "model_switches.lifetime_model_name"),
+            consumes=("dims", "parameters"),
+            produces=("historic_mfa", "parameters"),
+        ),
+        Stage(
+            name="extrapolate",
+            consumes=("dims", "parameters", "scenario_parameters"),
+            produces=("historic_parameters", "parameters"),
+        ),
+        Stage(
+            name="stock_projection",
+            config=("model", "model_switches"),
+            consumes=("dims", "parameters", "scenario_parameters", "historic_mfa"),
+            produces=("stock_projection", "stock_handler", "sector_specific_sat_level"),
+        ),
+        Stage(
+            name="future_mfa",
+            config=("model", "model_switches"),
+            consumes=("dims", "parameters", "historic_mfa", "stock_projection"),
+            produces=("future_mfa",),
+        ),
+        Stage(
+            name="export",
+            config=("model", "input", "model_switches", "export"),
+            consumes_all=True,
+        ),
+        Stage(
+            name="visualize",
+            config=("model", "model_switches", "visualization"),
+            consumes_all=True,
+        ),
+    ]
+
     # TODO: unify, then delete
     end_use_good_letter: str = None
     historic_stock_name: str = None
 
-    def __init__(self, cfg: dict):
+    def __init__(
+        self,
+        cfg: dict,
+        input_data: Optional[InputData] = None,
+        historic_mfa_cache: Optional[HistoricMFACache] = None,
+        scenario_rows: Optional[list[dict]] = None,
+        extrapolation_cache: Optional[ExtrapolationCache] = None,
+    ):
         self.cfg = self.ConfigCls(**cfg)
+        self.historic_mfa_cache = historic_mfa_cache
+        self.extrapolation_cache = extrapolation_cache
+        self.scenario_rows = scenario_rows or []
+        enable_profiling(
+            self.cfg.profiling.do_profile, trace_memory=self.cfg.profiling.do_trace_memory
+        )
+        self.init_pipeline()
         self.set_definition()
-        self.read_data()
-        self.check_parameters()
+        self.run_stage("read", lambda: self.read_data(input_data), inputs=self.input_files)
+        self.run_stage("scenario", self.apply_scenario, inputs=self.scenario_files)
+        self.init_export_and_visualization()
+
+    def run(self):
+        self.run_stage("historic_mfa", self.compute_historic_mfa)
+        self.run_stage("extrapolate", self.compute_extrapolation)
+        self.run_stage("stock_projection", self.compute_stock_projection)
+        self.run_stage("future_mfa", self.compute_future_mfa)
+
+    def apply_scenario(self):
         self.read_scenario_parameters()
         self.select_driver_scen()
         self.modify_parameters()
-        self.init_export_and_visualization()
 
-    def run(self):
-        self.historic_mfa = self.make_mfa(historic=True)
-        self.historic_mfa.compute()
+    def compute_historic_mfa(self):
+        if self.historic_mfa_cache is None:
+            self.historic_mfa = self.make_mfa(historic=True)
+            self.historic_mfa.compute()
+        else:
+            self.historic_mfa = self.historic_mfa_cache.get_or_compute(self)
 
         self.transfer_historic_parameters()
 
-        historic_trade = self.historic_mfa.trade_set
-
+    def compute_extrapolation(self):
         # snapshot parameters before extrapolation, then extend them into the future
-        self.historic_parameters = copy.deepcopy(self.parameters)
+        self.parameters = ParameterStore(self.parameters)
+        self.historic_parameters = self.parameters.snapshot()
         self.extrapolate_parameters()
         self.check_parameters()
 
-        stock_projection = self.get_long_term_stock()
+    def compute_stock_projection(self):
+        self.stock_projection = self.get_long_term_stock()
 
+    def compute_future_mfa(self):
         self.future_mfa = self.make_mfa(historic=False)
-        self.future_mfa.compute(stock_projection, historic_trade)
+        self.future_mfa.compute(self.stock_projection, self.historic_mfa.trade_set)
+
+    def init_pipeline(self):
+        """Set up the stage pipeline, which checkpoints stages if configured."""
+        store = None
+        if self.cfg.checkpoints.do_checkpoint:
+            path = os.path.join(
+                self.cfg.checkpoints.path, self.cfg.model.value, self.cfg.model_switches.scenario
+            )
+            store = CheckpointStore(path=path)
+        self.pipeline = Pipeline(self.stages, store=store, reuse=self.cfg.checkpoints.resume)
+
+    def run_stage(
+        self,
+        stage: str,
+        compute: Callable[[], None],
+        inputs: Optional[Callable[[], object]] = None,
+    ):
+        """Compute one stage, unless its inputs are unchanged since its last checkpoint.
+        `inputs` returns further inputs of the stage beyond configuration and attributes."""
+        self.pipeline.run(self, stage, compute, inputs=inputs)
+        self.bind_lazy_parameters()
+
+    def bind_lazy_parameters(self):
+        """Bind lazy parameters restored from a checkpoint to the input data of this run, such
+        that they read the parameters not loaded before the checkpoint, see
+        `LazyParameters.bind`."""
+        mappings = [getattr(self, "parameters", None), getattr(self, "historic_parameters", None)]
+        mappings += [mfa.parameters for mfa in vars(self).values() if isinstance(mfa, fd.MFASystem)]
+        unbound = [
+            parameters
+            for parameters in mappings
+            if isinstance(parameters, (LazyParameters, ParameterStore)) and not parameters.is_bound
+        ]
+        if not unbound:
+            return
+        if getattr(self, "input_parameters", None) is None:
+            self.read_lazy_parameters()
+        for parameters in unbound:
+            parameters.bind(self.input_parameters)
+
+    def input_files(self) -> list[tuple[str, int, int]]:
+        """Name, size and modification time of the extracted input-data and dimension files, to
+        detect changed input data. When reading from the archive, the archive replaces the
+        extracted files. A used input bundle is included as well."""
+        directories = [
+            os.path.join(self.cfg.input.input_data_path, "dimensions", self.cfg.model.value),
+        ]
+        files = []
+        bundle_path = InputBundle.path_for(self.cfg.input)
+        if self.cfg.input.use_input_bundle and os.path.exists(bundle_path):
+            stat = os.stat(bundle_path)
+            files.append((bundle_path, stat.st_size, stat.st_mtime_ns))
+        if self.cfg.input.read_from_archive:
+            pattern = CommonDataReader.build_target_tgz_pattern(
+                self.cfg.input.input_data_revision, self.cfg.input.region_mapping
+            )
+            archive_paths = glob.glob(
+                os.path.join(self.cfg.input.resolved_madrat_output_path, pattern)
+            )
+            for path in sorted(archive_paths):
+                stat = os.stat(path)
+                files.append((path, stat.st_size, stat.st_mtime_ns))
+        else:
+            directories.insert(0, os.path.join(self.cfg.input.input_data_path, "input_data"))
+        for directory in directories:
+            for root, _, filenames in os.walk(directory):
+                for filename in sorted(filenames):
+                    path = os.path.join(root, filename)
+                    stat = os.stat(path)
+                    files.append((path, stat.st_size, stat.st_mtime_ns))
+        return files
+
+    def scenario_files(self) -> list[tuple[str, str]]:
+        """Name and content of the scenario files along the inheritance chain of the selected
+        scenario, to detect changed scenario definitions."""
+        base_path = self.cfg.input.scenarios_path
+        inheritance = ScenarioReader.read_inheritance(base_path)
+        files = [("inheritance.csv", str(sorted(inheritance.items())))]
+        files += ScenarioReader.chain_files(base_path, self.cfg.model_switches.scenario)
+        files.append(("inline rows", self.scenario_rows))
+        return files
 
     def export(self):
-        self.data_writer.export(model=self)
+        self.run_stage("export", lambda: self.data_writer.export(model=self))
 
     def visualize(self):
-        self.visualizer.visualize(model=self)
+        if self.cfg.visualization.do_show_figs:
+            # figures to be shown are wanted on every run, unchanged or not
+            self.visualizer.visualize(model=self)
+        else:
+            self.run_stage("visualize", lambda: self.visualizer.visualize(model=self))
+
+    def write_profile(self):
+        """Write the profiling records of this model's run to the export folder and log them."""
+        path = os.path.join(self.cfg.export.path, "profile.json")
+        write_profile(path)
+        logging.info(f"Profile written to {path}:\n{profile_summary()}")
+
+    def named_arrays(self) -> dict[str, fd.FlodymArray]:
+        """Return the parameters of the model and the parameters, flows and stocks of all its MFA
+        systems by name. Arrays shared between them are listed once."""
+        arrays = [
+            (f"parameters.{name}", prm)
+            for name, prm in self.loaded_parameters(self.parameters).items()
+        ]
+        for attribute, mfa in vars(self).items():
+            if not isinstance(mfa, fd.MFASystem):
+                continue
+            arrays += [
+                (f"{attribute}.parameters.{name}", p)
+                for name, p in self.loaded_parameters(mfa.parameters).items()
+            ]
+            arrays += [(f"{attribute}.flows.{name}", flow) for name, flow in mfa.flows.items()]
+            for name, stock in mfa.stocks.items():
+                for part in ("stock", "inflow", "outflow"):
+                    arrays.append((f"{attribute}.stocks.{name}.{part}", getattr(stock, part)))
+        unique = {}
+        for name, array in arrays:
+            unique.setdefault(id(array), (name, array))
+        return dict(unique.values())
 
     def set_definition(self):
         self.definition_historic = self.get_definition(self.cfg, historic=True)
         self.definition_future = self.get_definition(self.cfg, historic=False)
 
-    def read_data(self):
-        self.data_reader = CommonDataReader(
-            cfg=self.cfg,
-            definition=self.definition_future,
-            dimension_file_mapping=self.DimensionFilesCls(),
+    def read_data(self, input_data: Optional[InputData] = None):
+        """Read dimensions and parameters, unless they are given as shared `input_data` or mapped
+        from the input bundle. With `input.lazy_parameters`, parameters are only read and
+        checked when first used."""
+        if input_data is None:
+            input_data = self.open_input_bundle(self.cfg)
+        if input_data is not None:
+            self.parameters = input_data.copy_parameters()
+            self.dims = input_data.dims
+        elif self.cfg.input.lazy_parameters:
+            self.dims, self.parameters = self.read_lazy_parameters()
+        else:
+            input_data = self.read_input_files(self.cfg, self.definition_future)
+            self.parameters = input_data.parameters
+            self.dims = input_data.dims
+        self.check_parameters()
+
+    def read_lazy_parameters(self) -> tuple[fd.DimensionSet, LazyParameters]:
+        """Read the dimensions, and set up the parameters of the future definition to be read
+        from the input data on first access."""
+        data_reader = self.make_data_reader(self.cfg, self.definition_future)
+        dims = data_reader.read_dimensions(self.definition_future.dimensions)
+        definitions = {prm.name: prm for prm in self.definition_future.parameters}
+
+        def load(name: str) -> fd.Parameter:
+            parameter = data_reader.read_parameter_values(
+                name, dims.get_subset(definitions[name].dim_letters)
+            )
+            self.check_parameter(name, parameter)
+            return parameter
+
+        self.input_parameters = LazyParameters(definitions, load)
+        return dims, self.input_parameters
+
+    @classmethod
+    def make_data_reader(cls, cfg: CommonCfg, definition: RemindMFADefinition) -> CommonDataReader:
+        return CommonDataReader(
+            cfg=cfg,
+            definition=definition,
+            dimension_file_mapping=cls.DimensionFilesCls(),
             allow_missing_values=True,  # needed for at least steel scrap data and for bottom-up (cement)
             allow_extra_values=False,
         )
-        self.dims = self.data_reader.read_dimensions(self.definition_future.dimensions)
-        self.parameters = self.data_reader.read_parameters(
-            self.definition_future.parameters, dims=self.dims
+
+    def report_parameter_usage(self):
+        """Log the input parameters a run never used and write all with their usage to the
+        export folder, if parameters are read on first access."""
+        input_parameters = getattr(self, "input_parameters", None)
+        if input_parameters is None:
+            return
+        unused = [name for name in input_parameters if name not in input_parameters.loaded_names]
+        logging.info(
+            f"{len(input_parameters) - len(unused)} of {len(input_parameters)} input parameters "
+            f"used. Unused: {', '.join(unused) or 'none'}."
         )
+        os.makedirs(self.cfg.export.path, exist_ok=True)
+        path = os.path.join(self.cfg.export.path, "parameter_usage.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("parameter,used\n")
+            for name in input_parameters:
+                f.write(f"{name},{name in input_parameters.loaded_names}\n")
+
+    @staticmethod
+    def loaded_parameters(parameters: dict[str, fd.Parameter]) -> dict[str, fd.Parameter]:
+        """The given parameters without those not read yet, see `LazyParameters`."""
+        if isinstance(parameters, (LazyParameters, ParameterStore)):
+            return parameters.loaded()
+        return parameters
+
+    @classmethod
+    def read_input_data(
+        cls, cfg: CommonCfg, definition: Optional[RemindMFADefinition] = None
+    ) -> InputData:
+        """Map dimensions and parameters of the future definition from the input bundle, if
+        configured and available, or else read them from the input data."""
+        input_data = cls.open_input_bundle(cfg)
+        if input_data is None:
+            input_data = cls.read_input_files(cfg, definition)
+        return input_data
+
+    @classmethod
+    def read_input_files(
+        cls, cfg: CommonCfg, definition: Optional[RemindMFADefinition] = None
+    ) -> InputData:
+        """Read dimensions and parameters of the future definition from the input data."""
+        if definition is None:
+            definition = cls.get_definition(cfg, historic=False)
+        data_reader = cls.make_data_reader(cfg, definition)
+        dims = data_reader.read_dimensions(definition.dimensions)
+        parameters = data_reader.read_parameters(definition.parameters, dims=dims)
+        return InputData(dims=dims, parameters=parameters)
+
+    @classmethod
+    def input_data_key(cls, cfg: CommonCfg) -> str:
+        """Fingerprint of the configuration entries the read stage depends on. Runs with equal
+        keys can share their input data."""
+        read_stage = next(stage for stage in cls.stages if stage.name == "read")
+        return fingerprint([(path, config_value(cfg, path)) for path in read_stage.config])
+
+    @classmethod
+    def bundle_key(cls, cfg: CommonCfg) -> str:
+        """Like `input_data_key`, but without the entries locating the input data, such that a
+        bundle prepared on one machine can be used on another."""
+        read_stage = next(stage for stage in cls.stages if stage.name == "read")
+        locating = ("input.madrat_output_path", "input.force_extract_tgz", "input.input_data_path")
+        return fingerprint(
+            [(path, config_value(cfg, path)) for path in read_stage.config if path not in locating]
+        )
+
+    @classmethod
+    def open_input_bundle(cls, cfg: CommonCfg) -> Optional[InputData]:
+        """Input data of this model mapped from the input bundle, if `input.use_input_bundle` is
+        set and the bundle holds data prepared with the same configuration."""
+        if not cfg.input.use_input_bundle:
+            return None
+        path = InputBundle.path_for(cfg.input)
+        if not os.path.exists(path):
+            logging.warning(
+                f"No input bundle at {path}, reading the input files instead. "
+                "Write it with `python remind_mfa.py prepare`."
+            )
+            return None
+        input_data = InputBundle(path).input_data(cfg.model.value, cls.bundle_key(cfg))
+        if input_data is None:
+            logging.warning(
+                f"Input bundle {path} holds no input data of {cfg.model.value} for this "
+                "configuration, reading the input files instead. Prepare it again to update it."
+            )
+        else:
+            logging.info(f"Mapping input data from bundle {path}.")
+        return input_data
 
     def check_parameters(self, exceptions: Optional[list] = None, raise_error: bool = False):
-        """Check if all parameters are free of NaN and negative values after data read-in."""
+        """Check if all parameters are free of NaN and negative values after data read-in.
+        Parameters not read yet are checked when read."""
         logging.info("Checking parameters for NaN and negative values...")
         exceptions = exceptions or []
 
         all_good = True
-        for name, prm in self.parameters.items():
+        for name, prm in self.loaded_parameters(self.parameters).items():
             if name in exceptions:
                 continue
-            if np.any(np.isnan(prm.values)):
-                msg = f"NaN values found in parameter '{name}'!"
-                if raise_error:
-                    raise ValueError(msg)
-                logging.warning(msg)
-                all_good = False
-            if np.any(prm.values < 0):
-                msg = f"Negative values found in parameter '{name}'!"
-                if raise_error:
-                    raise ValueError(msg)
-                logging.warning(msg)
-                all_good = False
+            all_good &= self.check_parameter(name, prm, raise_error=raise_error)
 
         if all_good:
             logging.info("Success - No NaN or negative values found in parameters.")
 
+    @staticmethod
+    def check_parameter(name: str, prm: fd.Parameter, raise_error: bool = False) -> bool:
+        """Check one parameter for NaN and negative values, returning whether it is free of
+        them."""
+        good = True
+        if np.any(np.isnan(prm.values)):
+            msg = f"NaN values found in parameter '{name}'!"
+            if raise_error:
+                raise ValueError(msg)
+            logging.warning(msg)
+            good = False
+        if np.any(prm.values < 0):
+            msg = f"Negative values found in parameter '{name}'!"
+            if raise_error:
+                raise ValueError(msg)
+            logging.warning(msg)
+            good = False
+        return good
+
     def select_driver_scen(self):
         """Slice every parameter carrying a driver scenario (`S`) dimension to the selected scenario."""
         scen_name = self.scenario_parameters["driver_scen"]
+        # a function of the class, such that checkpoints of lazy parameters can pickle it
+        select = functools.partial(self.select_driver_scen_of, scen_name)
+
+        if isinstance(self.parameters, LazyParameters):
+            # parameters read later are sliced when read
+            self.parameters.add_transform(select)
+            return
         for prm_name, prm in list(self.parameters.items()):
-            if "S" not in prm.dims.letters:
-                continue
-            slice = prm[{"S": scen_name}]
-            self.parameters[prm_name] = fd.Parameter(dims=prm.dims.drop("S"))
-            self.parameters[prm_name][...] = slice
+            self.parameters[prm_name] = select(prm_name, prm)
+
+    @staticmethod
+    def select_driver_scen_of(scen_name: str, prm_name: str, prm: fd.Parameter) -> fd.Parameter:
+        return CommonModel.select_scenario_slice(prm, scen_name)
+
+    @staticmethod
+    def select_scenario_slice(prm: fd.Parameter, scen_name: str) -> fd.Parameter:
+        """Slice a parameter to driver scenario `scen_name`, if it has a driver scenario (`S`)
+        dimension. Read-only values, like drivers shared between models, are sliced as a read-only
+        view sharing their memory; others are copied, such that the full array can be freed."""
+        if "S" not in prm.dims.letters:
+            return prm
+        axis = prm.dims.letters.index("S")
+        index = prm.dims["S"].items.index(scen_name)
+        values = prm.values[(slice(None),) * axis + (index,)]
+        if values.flags.writeable:
+            values = values.copy()
+        return fd.Parameter(dims=prm.dims.drop("S"), values=values, name=prm.name)
 
     def read_scenario_parameters(self):
-        scn_prm_def = common_scn_prm_def + self.custom_scn_prm_def
-        scenario_reader = ScenarioReader(
-            name=self.cfg.model_switches.scenario,
-            base_path=self.cfg.input.scenarios_path,
-            model=self.cfg.model,
-            dims=self.dims,
-            parameter_definitions=scn_prm_def,
-        )
+        scenario_reader = self.scenario_reader(self.cfg, self.dims, rows=self.scenario_rows)
         self.scenario_parameters = scenario_reader.get_parameters()
 
+    @classmethod
+    def scenario_reader(
+        cls, cfg: CommonCfg, dims: fd.DimensionSet, rows: Optional[list[dict]] = None
+    ) -> ScenarioReader:
+        """Reader of the scenario selected in `cfg`, with `rows` applied on top of it."""
+        return ScenarioReader(
+            name=cfg.model_switches.scenario,
+            base_path=cfg.input.scenarios_path,
+            model=cfg.model,
+            dims=dims,
+            parameter_definitions=common_scn_prm_def + cls.custom_scn_prm_def,
+            rows=rows or [],
+            cache_path=(
+                os.path.join(cfg.input.input_data_path, "scenario_cache")
+                if cfg.input.use_scenario_cache
+                else None
+            ),
+        )
+
     def modify_parameters(self):
         """Manual changes to parameters"""
         pass
 
     def extrapolate_parameters(self):
-        """Extend parameters into the future, applying scenario targets and factors."""
-        self.parameters = ParameterExtrapolationManager(
-            self.dims["h"], self.dims["t"]
-        ).apply_prm_extrapolation(self.parameters, self.scenario_parameters)
+        """Extend parameters into the future, applying scenario targets and factors. Parameters
+        extrapolated from equal inputs together with other scenarios of a sweep are reused."""
+        manager = ParameterExtrapolationManager(
+            self.dims["h"],
+            self.dims["t"],
+            threads=self.cfg.model_switches.extrapolation_threads,
+        )
+        extrapolated = None
+        if self.extrapolation_cache is not None:
+            extrapolated = self.extrapolation_cache.get(self)
+        if extrapolated is not None:
+            logging.info("Reusing parameters extrapolated together with the other scenarios.")
+            self.parameters = manager.apply_precomputed_extrapolation(
+                self.parameters, self.scenario_parameters, extrapolated
+            )
+        else:
+            self.parameters = manager.apply_prm_extrapolation(
+                self.parameters, self.scenario_parameters
+            )
 
     def transfer_historic_parameters(self):
         """Transfer parameters from historic to future MFA system if needed, e.g. material splits of plastics stock."""
@@ -187,15 +571,21 @@ class CommonModel:
             dims=self.dims,
         )
 
-        return mfasystem_class(
+        # validate the parameters read so far, without reading lazy ones; the MFA system then
+        # gets a shallow copy or snapshot, sharing parameters read later
+        deferred = isinstance(self.parameters, (LazyParameters, ParameterStore))
+        mfa = mfasystem_class(
             cfg=self.cfg,
-            parameters=self.parameters,
+            parameters=self.loaded_parameters(self.parameters),
             processes=processes,
             dims=self.dims,
             flows=flows,
             stocks=stocks,
             trade_set=trade_set,
         )
+        if deferred:
+            mfa.parameters = self.parameters.copy()
+        return mfa
 
     def get_stock_sector_split_limit(self):
         prm = self.parameters
@@ -270,7 +660,11 @@ class CommonModel:
             cfg=self.cfg.model_switches,
             historic_stocks=normalized_historic_stock,
             dims=self.dims,
-            parameters=self.parameters,
+            parameters={
+                name: self.parameters[name]
+                for name in StockExtrapolation.PARAMETER_NAMES
+                if name in self.parameters
+            },
             target_dim_letters="all",
             indep_fit_dim_letters=(self.end_use_good_letter,),
             bound_list=bound_list_obj,
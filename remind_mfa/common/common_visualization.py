@@ -1,13 +1,7 @@
 import os
 import numpy as np
-from matplotlib import pyplot as plt
-import plotly.graph_objects as go
-import plotly.colors as plc
-import plotly.io as pio
 from typing import Optional, TYPE_CHECKING
-from pydantic import model_validator
 import flodym as fd
-import flodym.export as fde
 
 from remind_mfa.common.helpers import RemindMFABaseModel
 from remind_mfa.common.common_config import VisualizationCfg
@@ -18,6 +12,10 @@ from remind_mfa.common.data_extrapolations import TwoPredictorExtrapolation
 from remind_mfa.common.stock_extrapolation import StockExtrapolation
 
 if TYPE_CHECKING:
+    # Plotting backends are imported where they are used, such that runs without visualization
+    # do not load them.
+    import flodym.export as fde
+    import plotly.graph_objects as go
     from remind_mfa.common.common_model import CommonModel
 
 
@@ -25,15 +23,16 @@ class CommonVisualizer(RemindMFABaseModel):
     cfg: VisualizationCfg
     display_names: CommonDisplayNames
 
-    @model_validator(mode="after")
     def set_plotly_renderer(self):
         if self.cfg.plotting_engine == "plotly":
+            import plotly.io as pio
+
             pio.renderers.default = self.cfg.plotly_renderer
-        return self
 
     def visualize(self, model: "CommonModel"):
         if not self.cfg.do_visualize:
             return
+        self.set_plotly_renderer()
         self.visualize_common(model=model)
         self.visualize_custom(model=model)
         self.stop_and_show()
@@ -68,6 +67,8 @@ class CommonVisualizer(RemindMFABaseModel):
             fig.show()
 
     def visualize_sankey(self, mfa: fd.MFASystem):
+        import flodym.export as fde
+
         plotter = fde.PlotlySankeyPlotter(
             mfa=mfa, display_names=self.display_names.dct, **self.cfg.sankey.plotter_args
         )
@@ -93,10 +94,14 @@ class CommonVisualizer(RemindMFABaseModel):
 
     def stop_and_show(self):
         if self.cfg.plotting_engine == "pyplot" and self.cfg.do_show_figs:
+            from matplotlib import pyplot as plt
+
             plt.show()
 
     @property
     def plotter_class(self):
+        import flodym.export as fde
+
         if self.cfg.plotting_engine == "plotly":
             return fde.PlotlyArrayPlotter
         elif self.cfg.plotting_engine == "pyplot":
@@ -179,6 +184,7 @@ class CommonVisualizer(RemindMFABaseModel):
         future_stock: bool = True,
         **kwargs,
     ):
+        import plotly.colors as plc
 
         colors = plc.qualitative.Dark24 * 20
         if linecolor_dim:
@@ -340,6 +346,7 @@ class CommonVisualizer(RemindMFABaseModel):
     def visualize_trade(
         self, mfa: fd.MFASystem, linecolor_dims: Optional[dict[str, Optional[str]]] = None
     ):
+        import plotly.colors as plc
 
         for name, trade in mfa.trade_set.markets.items():
             imports = trade.imports
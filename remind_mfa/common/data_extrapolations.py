@@ -7,6 +7,7 @@ from scipy.optimize import least_squares
 from pydantic import PrivateAttr
 
 from remind_mfa.common.helpers import RemindMFABaseModel
+from remind_mfa.common.profiling import profiled
 from remind_mfa.common.data_transformations import BoundList
 
 
@@ -110,6 +111,7 @@ class Extrapolation(RemindMFABaseModel):
 
         return fitting_function
 
+    @profiled
     def regress(self):
         """
         Fits the data to the predictor values using regression and returns the extrapolated values.
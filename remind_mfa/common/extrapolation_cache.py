@@ -0,0 +1,124 @@
+import logging
+from typing import TYPE_CHECKING, Optional
+
+import flodym as fd
+
+from remind_mfa.common.checkpoints import fingerprint
+from remind_mfa.common.parameter_extrapolation import ParameterExtrapolationManager
+from remind_mfa.common.scenarios import ExtrapolationScenarioParameter
+
+if TYPE_CHECKING:
+    from remind_mfa.common.common_model import CommonModel
+
+
+class ExtrapolationEntry:
+    """Extrapolated parameters of one scenario, with the inputs they were computed from."""
+
+    def __init__(self, key: str, extrapolated: dict[str, fd.Parameter]):
+        self.key = key
+        """Fingerprint of the dimensions, the extrapolation instructions and the parameters they
+        extrapolate or refer to."""
+        self.extrapolated = extrapolated
+        """Extrapolated parameters, by name."""
+
+
+class ExtrapolationCache:
+    """Parameters of all scenarios of a sweep, extrapolated in one stacked pass, for reuse by the
+    runs of these scenarios.
+
+    The sweep reads the extrapolation instructions of all its scenarios up front. The first run
+    that extrapolates its parameters extrapolates those of all scenarios at once, starting from
+    its own parameters, see `ParameterExtrapolationManager.apply_stacked_prm_extrapolation`.
+    Later runs take the parameters of their scenario if their own extrapolation inputs are equal
+    to those the scenario was extrapolated from, and extrapolate on their own otherwise, e.g.
+    with another driver scenario or after the cement parameter reconciliation. Worker processes
+    each receive a copy and extrapolate all scenarios in their first run.
+    """
+
+    def __init__(self, scenario_parameters: dict[str, dict[str, object]]):
+        self.extrapolations = {
+            scenario: self.extrapolations_of(parameters)
+            for scenario, parameters in scenario_parameters.items()
+        }
+        """Extrapolation instructions by scenario name."""
+        self.entries: dict[str, ExtrapolationEntry] = {}
+        """Entries by scenario name."""
+        self.computed = False
+
+    def get(self, model: "CommonModel") -> Optional[dict[str, fd.Parameter]]:
+        """Return the extrapolated parameters of the scenario of `model`, if extrapolated from
+        equal inputs. Extrapolates all scenarios first, if not done yet."""
+        scenario = model.cfg.model_switches.scenario
+        if scenario not in self.extrapolations:
+            return None
+        if not self.computed:
+            self.computed = True
+            try:
+                self.compute(model)
+            except Exception:
+                logging.exception(
+                    "Could not extrapolate the scenarios together, extrapolating each on its own."
+                )
+        entry = self.entries.get(scenario)
+        if entry is None:
+            return None
+        if entry.key != self.key(model, self.extrapolations_of(model.scenario_parameters)):
+            return None
+        return entry.extrapolated
+
+    def compute(self, model: "CommonModel"):
+        """Extrapolate the parameters of all scenarios in one pass, from the parameters of
+        `model`."""
+        manager = ParameterExtrapolationManager(
+            model.dims["h"],
+            model.dims["t"],
+            threads=model.cfg.model_switches.extrapolation_threads,
+        )
+        names = []
+        for extrapolations in self.extrapolations.values():
+            names += [n for n in self.input_names(model, extrapolations) if n not in names]
+        stacked = manager.apply_stacked_prm_extrapolation(
+            {name: model.parameters[name] for name in names}, self.extrapolations, document=False
+        )
+        for scenario, extrapolations in self.extrapolations.items():
+            selected = manager.select_scenario(stacked, scenario)
+            self.entries[scenario] = ExtrapolationEntry(
+                key=self.key(model, extrapolations),
+                extrapolated={
+                    extrapolation.definition.name: selected[extrapolation.definition.name]
+                    for extrapolation in extrapolations.values()
+                },
+            )
+        logging.info(f"Extrapolated the parameters of {len(self.entries)} scenarios at once.")
+
+    @staticmethod
+    def extrapolations_of(
+        scenario_parameters: dict[str, object],
+    ) -> dict[str, ExtrapolationScenarioParameter]:
+        return {
+            name: scenario_parameter
+            for name, scenario_parameter in scenario_parameters.items()
+            if isinstance(scenario_parameter, ExtrapolationScenarioParameter)
+        }
+
+    @staticmethod
+    def input_names(
+        model: "CommonModel", extrapolations: dict[str, ExtrapolationScenarioParameter]
+    ) -> list[str]:
+        """Names of the model parameters the extrapolations extend or refer to."""
+        names = []
+        for extrapolation in extrapolations.values():
+            for name in [extrapolation.definition.name, *extrapolation.referenced_parameters()]:
+                if name in model.parameters and name not in names:
+                    names.append(name)
+        return names
+
+    def key(
+        self, model: "CommonModel", extrapolations: dict[str, ExtrapolationScenarioParameter]
+    ) -> str:
+        names = self.input_names(model, extrapolations)
+        return fingerprint(
+            model.dims,
+            extrapolations,
+            [(name, model.parameters[name]) for name in names],
+        )
@@ -3,6 +3,7 @@ import numpy as np
 from scipy.optimize import minimize
 from pydantic import model_validator
 from remind_mfa.common.helpers import RemindMFABaseModel
+from remind_mfa.common.profiling import profiled
 from remind_mfa.common.data_extrapolations import Extrapolation
 
 
@@ -48,6 +49,7 @@ class StockFitter(RemindMFABaseModel):
     def goods_dim_letter(self):
         return self.historic_stocks_pc.dims.letters[2]
 
+    @profiled
     def fit(self):
         """prepare parameters for single fitting function
         loop over good and regions, call single fitting function for each of them
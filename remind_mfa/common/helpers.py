@@ -52,6 +52,21 @@ def module_from_prefix(prefix: str) -> str:
     raise ValueError(f"Unknown prefix: {prefix}")
 
 
+class DependencyTracker(dict):
+    """Dictionary that tracks accessed keys."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.accessed_keys = set()
+
+    def __getitem__(self, key):
+        # 1. Record that this key was used
+        self.accessed_keys.add(key)
+
+        # 2. Return the actual value so the math doesn't crash
+        return super().__getitem__(key)
+
+
 class RemindMFABaseModel(BaseModel):
 
     model_config = ConfigDict(
@@ -0,0 +1,212 @@
+import copy
+import logging
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, Iterator, Optional
+
+import flodym as fd
+
+from remind_mfa.common.checkpoints import fingerprint
+from remind_mfa.common.common_mfa_system import CommonMFASystem
+
+if TYPE_CHECKING:
+    from remind_mfa.common.common_model import CommonModel
+
+
+class HistoricMFAEntry:
+    """A computed historic MFA, together with what is needed to decide whether it can be reused."""
+
+    def __init__(
+        self,
+        mfa: CommonMFASystem,
+        read_parameters: list[str],
+        key: str,
+        written_parameters: list[str],
+        mutated_parameters: list[str],
+    ):
+        self.mfa = mfa
+        self.read_parameters = read_parameters
+        """Names of the model parameters read by the historic MFA computation."""
+        self.key = key
+        """Fingerprint of the configuration, dimensions and the read parameters."""
+        self.written_parameters = written_parameters
+        """Names of the parameters the computation added to or changed in the MFA parameters."""
+        self.mutated_parameters = mutated_parameters
+        """Names of the model parameters the computation changed in place."""
+
+
+class TrackedParameters(MutableMapping):
+    """Parameters of a historic MFA computation, recording which it reads and, on first read,
+    the fingerprints needed to decide whether the computation can be reused later.
+
+    Wraps the parameters without copying or reading them, such that lazy parameters stay lazy
+    and only the parameters the computation uses are fingerprinted. The fingerprints are taken
+    before the computation can change the values in place.
+    """
+
+    def __init__(self, parameters: MutableMapping, historic_time: fd.Dimension):
+        self.parameters = parameters
+        self.historic_time = historic_time
+        self.read: dict[str, fd.Parameter] = {}
+        """Parameters read before being set by the computation, as first read, by name."""
+        self.key_hashes: dict[str, str] = {}
+        """Fingerprints of the historic years of the read parameters, by name."""
+        self.full_hashes: dict[str, str] = {}
+        """Fingerprints of the read parameters, by name."""
+        self.assigned: set[str] = set()
+        """Names of the parameters set or deleted by the computation."""
+
+    def __getitem__(self, name: str) -> fd.Parameter:
+        parameter = self.parameters[name]
+        if name not in self.read and name not in self.assigned:
+            self.read[name] = parameter
+            self.full_hashes[name] = fingerprint(parameter)
+            self.key_hashes[name] = historic_fingerprint(self.historic_time, parameter)
+        return parameter
+
+    def __setitem__(self, name: str, parameter: fd.Parameter):
+        self.parameters[name] = parameter
+        self.assigned.add(name)
+
+    def __delitem__(self, name: str):
+        del self.parameters[name]
+        self.assigned.add(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.parameters
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.parameters)
+
+    def __len__(self) -> int:
+        return len(self.parameters)
+
+    def changed_in_place(self) -> set[str]:
+        """Names of the read parameters whose values the computation changed in place."""
+        return {
+            name
+            for name, parameter in self.read.items()
+            if fingerprint(parameter) != self.full_hashes[name]
+        }
+
+
+class HistoricMFACache:
+    """Historic MFA systems of earlier runs, for reuse in runs with the same historic inputs.
+
+    The historic MFA does not depend on the scenario, apart from parameters sliced to the driver
+    scenario. Each entry records which parameters the computation read. A later run reuses the
+    entry if the configuration, dimensions and the historic years of these parameters are equal.
+    At most `max_entries` entries are kept, dropping the least recently used first.
+
+    Flows and stocks of a cached MFA are shared read-only between runs. Each run gets its own
+    trade set, which the future MFA may adjust, and own copies of the parameters the historic
+    computation wrote.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.entries: list[HistoricMFAEntry] = []
+        """Entries from the least to the most recently used."""
+        self.max_entries = max_entries
+
+    def get_or_compute(self, model: CommonModel) -> CommonMFASystem:
+        # entries reading the same parameters share their fingerprints
+        hashes: dict[str, str] = {}
+        for entry in self.entries:
+            if entry.key == self.key(model, entry.read_parameters, hashes):
+                logging.info("Reusing historic MFA computed for a previous run with equal inputs.")
+                self.entries.remove(entry)
+                self.entries.append(entry)
+                return self.view(entry, model)
+        entry = self.compute(model)
+        self.entries.append(entry)
+        del self.entries[: -self.max_entries]
+        return self.view(entry, model)
+
+    def compute(self, model: CommonModel) -> HistoricMFAEntry:
+        """Compute the historic MFA of `model` and record the parameters it reads and writes."""
+        parameters_before = set(model.parameters)
+
+        mfa = model.make_mfa(historic=True)
+        parameters = mfa.parameters
+        tracked = TrackedParameters(parameters, model.dims["h"])
+        mfa.parameters = tracked
+        mfa.compute()
+        mfa.parameters = parameters
+
+        read_parameters = sorted(set(tracked.read) & parameters_before)
+        changed = tracked.changed_in_place()
+        written_parameters = [
+            name
+            for name in parameters
+            if (name in tracked.assigned and parameters[name] is not tracked.read.get(name))
+            or name in changed
+        ]
+        mutated_parameters = [
+            name for name in written_parameters if name in parameters_before and name in changed
+        ]
+        key = self._key(model, [(name, tracked.key_hashes[name]) for name in read_parameters])
+
+        # Keep the cached MFA independent of the parameters of this run.
+        shared = mfa.model_copy(
+            update={
+                "parameters": {name: mfa.parameters[name].copy() for name in written_parameters},
+                "trade_set": copy.deepcopy(mfa.trade_set),
+            }
+        )
+        for flow in shared.flows.values():
+            flow.values.flags.writeable = False
+        for stock in shared.stocks.values():
+            for array in (stock.stock, stock.inflow, stock.outflow):
+                array.values.flags.writeable = False
+        return HistoricMFAEntry(
+            mfa=shared,
+            read_parameters=read_parameters,
+            key=key,
+            written_parameters=written_parameters,
+            mutated_parameters=mutated_parameters,
+        )
+
+    def view(self, entry: HistoricMFAEntry, model: CommonModel) -> CommonMFASystem:
+        """Return the cached MFA as seen by a run of `model`, with the parameters of this run."""
+        parameters = model.parameters.copy()
+        for name in entry.written_parameters:
+            parameters[name] = entry.mfa.parameters[name].copy()
+            if name in entry.mutated_parameters:
+                model.parameters[name] = parameters[name]
+        return entry.mfa.model_copy(
+            update={"parameters": parameters, "trade_set": copy.deepcopy(entry.mfa.trade_set)}
+        )
+
+    def key(
+        self, model: CommonModel, parameter_names: list[str], hashes: Optional[dict] = None
+    ) -> str:
+        """Key of `model` for an entry reading `parameter_names`. Fingerprints of parameters
+        are taken from and added to `hashes`."""
+        hashes = {} if hashes is None else hashes
+        for name in parameter_names:
+            if name in model.parameters and name not in hashes:
+                hashes[name] = historic_fingerprint(model.dims["h"], model.parameters[name])
+        return self._key(
+            model, [(name, hashes[name]) for name in parameter_names if name in hashes]
+        )
+
+    @staticmethod
+    def _key(model: CommonModel, parameter_hashes: list[tuple[str, str]]) -> str:
+        cfg = model.cfg.model_dump(
+            mode="json",
+            exclude={
+                "input": True,
+                "export": True,
+                "visualization": True,
+                "checkpoints": True,
+                "profiling": True,
+                "model_switches": {"scenario"},
+            },
+        )
+        return fingerprint(cfg, model.dims, parameter_hashes)
+
+
+def historic_fingerprint(historic_time: fd.Dimension, prm: fd.Parameter) -> str:
+    """Fingerprint of the historic years of a parameter, which are all the historic MFA uses."""
+    if "t" in prm.dims.letters:
+        prm = prm[{"t": historic_time}]
+    return fingerprint(prm)
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Optional
+
+import flodym as fd
+import numpy as np
+
+from remind_mfa.common.common_data_reader import InputData
+from remind_mfa.common.helpers import RemindMFABaseModel
+
+if TYPE_CHECKING:
+    from remind_mfa.common.common_config import InputCfg
+
+# item types of dimensions, by the name stored in the bundle index
+_ITEM_TYPES = {"int": int, "float": float, "str": str}
+
+
+class BundledArray(RemindMFABaseModel):
+    """Location of a parameter's values in an input bundle."""
+
+    dims: tuple[str, ...]
+    """Dimension letters of the parameter."""
+    offset: int
+    """Offset of the values from the start of the data blocks."""
+    dtype: str
+    shape: tuple[int, ...]
+
+
+class BundledInputData(RemindMFABaseModel):
+    """Input data of one model whose parameter values are memory-mapped from an input bundle.
+
+    Like `SharedInputData`, it pickles as the location of the values only: `parameters` gives
+    read-only views and `copy_parameters` copy-on-write mappings, such that processes running
+    from the same bundle share its pages.
+    """
+
+    dims: fd.DimensionSet
+    path: str
+    """Path of the bundle file."""
+    data_offset: int
+    """Offset of the data blocks in the bundle file."""
+    arrays: dict[str, BundledArray]
+
+    @property
+    def parameters(self) -> dict[str, fd.Parameter]:
+        """Read-only views of all parameters."""
+        return self._attach("r")
+
+    def copy_parameters(self) -> dict[str, fd.Parameter]:
+        """Return copy-on-write views of all parameters, such that a model run cannot alter the
+        bundle."""
+        return self._attach("c")
+
+    def _attach(self, mode: str) -> dict[str, fd.Parameter]:
+        return {
+            name: fd.Parameter(
+                dims=self.dims.get_subset(array.dims),
+                name=name,
+                values=self._map(array, mode),
+            )
+            for name, array in self.arrays.items()
+        }
+
+    def _map(self, array: BundledArray, mode: str) -> np.ndarray:
+        if 0 in array.shape:
+            return np.zeros(array.shape, dtype=array.dtype)
+        # plain array on the mapping, such that parameters pickle and copy as usual
+        return np.asarray(
+            np.memmap(
+                self.path,
+                dtype=np.dtype(array.dtype),
+                mode=mode,
+                offset=self.data_offset + array.offset,
+                shape=array.shape,
+            )
+        )
+
+
+class InputBundle:
+    """One file holding the input data of an input-data revision and region mapping: the
+    dimensions and parameters of each prepared model, and further source files like the region
+    mapping and the validation data.
+
+    The file starts with `MAGIC`, followed by the length and content of a JSON index and the data
+    blocks, each aligned to `ALIGNMENT` bytes. The index holds the offsets of all blocks, such that
+    opening a bundle only reads the index, and parameter values are memory-mapped on access. Each
+    model's entry holds the key of the configuration it was prepared with, and is only used by
+    runs with an equal key.
+    """
+
+    MAGIC = b"RMFABDL1"
+    ALIGNMENT = 64
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"{path} is not an input bundle.")
+            index_length = int.from_bytes(f.read(8), "little")
+            self.index = json.loads(f.read(index_length))
+        self.data_offset = self.aligned(len(self.MAGIC) + 8 + index_length)
+
+    @staticmethod
+    def path_for(input_cfg: "InputCfg") -> str:
+        return os.path.join(
+            input_cfg.input_data_path,
+            "bundles",
+            f"rev{input_cfg.input_data_revision}_{input_cfg.region_mapping}.bundle",
+        )
+
+    @classmethod
+    def aligned(cls, position: int) -> int:
+        return -(-position // cls.ALIGNMENT) * cls.ALIGNMENT
+
+    @property
+    def models(self) -> list[str]:
+        return list(self.index["models"])
+
+    @property
+    def file_names(self) -> list[str]:
+        return list(self.index["files"])
+
+    def input_data(self, model: str, key: str) -> Optional[BundledInputData]:
+        """Return the input data of `model`, if the bundle holds it under `key`."""
+        entry = self.index["models"].get(model)
+        if entry is None or entry["key"] != key:
+            return None
+        return BundledInputData(
+            dims=fd.DimensionSet(dim_list=[self.load_dimension(dim) for dim in entry["dims"]]),
+            path=self.path,
+            data_offset=self.data_offset,
+            arrays=entry["parameters"],
+        )
+
+    def read_file(self, name: str) -> bytes:
+        """Return the content of the source file `name`, e.g. `validation/<file name>`."""
+        if name not in self.index["files"]:
+            raise FileNotFoundError(f"No file '{name}' in input bundle {self.path}.")
+        entry = self.index["files"][name]
+        with open(self.path, "rb") as f:
+            f.seek(self.data_offset + entry["offset"])
+            return f.read(entry["size"])
+
+    @staticmethod
+    def dump_dimension(dim: fd.Dimension) -> dict:
+        return {
+            "name": dim.name,
+            "letter": dim.letter,
+            "items": [item.item() if isinstance(item, np.generic) else item for item in dim.items],
+            "dtype": dim.dtype.__name__ if dim.dtype is not None else None,
+        }
+
+    @staticmethod
+    def load_dimension(entry: dict) -> fd.Dimension:
+        dtype = _ITEM_TYPES[entry["dtype"]] if entry["dtype"] is not None else None
+        return fd.Dimension(
+            name=entry["name"], letter=entry["letter"], items=entry["items"], dtype=dtype
+        )
+
+    @classmethod
+    def write(
+        cls,
+        path: str,
+        models: dict[str, tuple[str, InputData]],
+        files: Optional[dict[str, bytes]] = None,
+    ):
+        """Write a bundle atomically to `path`, holding the input data of each model under its
+        key, and the given source files."""
+        files = files or {}
+        blocks: list[tuple[int, bytes | np.ndarray]] = []
+        position = 0
+
+        def add_block(block: bytes | np.ndarray, size: int) -> int:
+            nonlocal position
+            offset = cls.aligned(position)
+            blocks.append((offset, block))
+            position = offset + size
+            return offset
+
+        index = {"models": {}, "files": {}}
+        for model, (key, input_data) in models.items():
+            arrays = {}
+            for name, prm in input_data.parameters.items():
+                values = np.require(prm.values, requirements="C")
+                if values.dtype.hasobject:
+                    raise ValueError(f"Parameter {name} of {model} has no numeric values.")
+                arrays[name] = {
+                    "dims": list(prm.dims.letters),
+                    "offset": add_block(values, values.nbytes),
+                    "dtype": values.dtype.str,
+                    "shape": list(values.shape),
+                }
+            index["models"][model] = {
+                "key": key,
+                "dims": [cls.dump_dimension(dim) for dim in input_data.dims],
+                "parameters": arrays,
+            }
+        for name, content in files.items():
+            index["files"][name] = {
+                "offset": add_block(content, len(content)),
+                "size": len(content),
+            }
+
+        header = json.dumps(index).encode()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(cls.MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            data_offset = cls.aligned(f.tell())
+            for offset, block in blocks:
+                f.write(b"\0" * (data_offset + offset - f.tell()))
+                f.write(block.data if isinstance(block, np.ndarray) else block)
+        os.replace(tmp_path, path)
+        logging.info(f"Wrote input bundle {path} with models {', '.join(models) or 'none'}.")
@@ -0,0 +1,130 @@
+import copy
+from collections.abc import MutableMapping
+from typing import Callable, Iterable, Iterator
+
+import flodym as fd
+
+
+def _not_bound(name: str) -> fd.Parameter:
+    raise RuntimeError(
+        f"Cannot read parameter '{name}': it was not loaded before the parameters were pickled, "
+        "and they are not bound to the input data yet, see `LazyParameters.bind`."
+    )
+
+
+class LazyParameters(MutableMapping):
+    """Parameters that are read from the input data on first access.
+
+    Behaves like a dict of all defined parameters: iterating over values, e.g. to convert the
+    mapping to a dict, loads all of them. Checks and summaries that should only cover the
+    parameters a run uses take `loaded()` instead.
+
+    Shallow copies, e.g. the parameters of an MFA system, share the parameters loaded by any of
+    them, like copies of a dict share its values. Deep copies load their own. All copies record
+    loaded parameters in the same `loaded_names`, such that unused parameters can be reported.
+
+    Pickles, e.g. checkpoints, hold the parameters loaded or set so far and the transforms, but
+    not the loader, which is bound to the data reader. Unpickled parameters read the others once
+    bound to the loader of the current run with `bind`.
+    """
+
+    def __init__(self, names: Iterable[str], load: Callable[[str], fd.Parameter]):
+        self._names = list(names)
+        self._values: dict[str, fd.Parameter] = {}
+        self._load = load
+        self._cache: dict[str, fd.Parameter] = {}
+        self._transforms: list[Callable[[str, fd.Parameter], fd.Parameter]] = []
+        self.loaded_names: set[str] = set()
+        """Names of all parameters loaded from the input data by this mapping or its copies."""
+
+    def __getitem__(self, name: str) -> fd.Parameter:
+        if name not in self._values:
+            if name not in self._names:
+                raise KeyError(name)
+            if name not in self._cache:
+                parameter = self._load(name)
+                for transform in self._transforms:
+                    parameter = transform(name, parameter)
+                self._cache[name] = parameter
+                self.loaded_names.add(name)
+            self._values[name] = self._cache[name]
+        return self._values[name]
+
+    def __setitem__(self, name: str, parameter: fd.Parameter):
+        if name not in self._names:
+            self._names.append(name)
+        self._values[name] = parameter
+
+    def __delitem__(self, name: str):
+        if name not in self._names:
+            raise KeyError(name)
+        self._names.remove(name)
+        self._values.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._names))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def loaded(self) -> dict[str, fd.Parameter]:
+        """Parameters accessed or set so far, without loading any others."""
+        return {name: self._values[name] for name in self._names if name in self._values}
+
+    def add_transform(self, transform: Callable[[str, fd.Parameter], fd.Parameter]):
+        """Apply `transform` to each loaded parameter now, and to the others when loaded."""
+        self._transforms.append(transform)
+        for name, parameter in self.loaded().items():
+            self._values[name] = transform(name, parameter)
+        self._cache.clear()
+        self._cache.update(self.loaded())
+
+    def copy(self) -> "LazyParameters":
+        new = object.__new__(LazyParameters)
+        new.__dict__.update(self.__dict__)
+        new._names = list(self._names)
+        new._values = dict(self._values)
+        return new
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo: dict) -> "LazyParameters":
+        new = self.copy()
+        new._values = copy.deepcopy(self._values, memo)
+        new._cache = {}
+        new._transforms = list(self._transforms)
+        return new
+
+    @property
+    def is_bound(self) -> bool:
+        """Whether parameters not loaded yet can be read, i.e. unless unpickled and not bound."""
+        return self._load is not _not_bound
+
+    def bind(self, source: "LazyParameters"):
+        """Read parameters not loaded yet with the loader of `source`, and record them in its
+        `loaded_names`. Transforms of these parameters are kept."""
+        source.loaded_names.update(self.loaded_names)
+        self.loaded_names = source.loaded_names
+        self._load = source._load
+
+    def __reduce__(self):
+        return (
+            _restore,
+            (list(self._names), self._values, self._transforms, set(self.loaded_names)),
+        )
+
+
+def _restore(
+    names: list[str],
+    values: dict[str, fd.Parameter],
+    transforms: list[Callable[[str, fd.Parameter], fd.Parameter]],
+    loaded_names: set[str],
+) -> LazyParameters:
+    parameters = LazyParameters(names, _not_bound)
+    parameters._values = values
+    parameters._transforms = transforms
+    parameters.loaded_names = loaded_names
+    return parameters
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+import flodym as fd
+import numpy as np
+
+from remind_mfa.common.checkpoints import fingerprint
+
+
+class ParameterCache:
+    """Stores the parsed, dimension-aligned values of parameter files as binary files, such that
+    unchanged files need not be parsed again.
+
+    Each cache file starts with `MAGIC`, followed by the length and content of a JSON header and
+    the values in .npy format. The header holds the key of the entry, a fingerprint of the source
+    file content, the dimensions and the read flags. An entry is only used if its key matches.
+    There is one cache file per source file, overwritten when the key changes.
+    """
+
+    MAGIC = b"RMFAPRM1"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def entry_path(self, source: str) -> str:
+        stem = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.path, f"{stem}.bin")
+
+    @staticmethod
+    def key(
+        content: bytes, dims: fd.DimensionSet, allow_missing_values: bool, allow_extra_values: bool
+    ) -> str:
+        content_hash = hashlib.sha256(content).hexdigest()
+        return fingerprint(content_hash, dims, allow_missing_values, allow_extra_values)
+
+    def load(self, source: str, key: str) -> Optional[np.ndarray]:
+        """Return the cached values of `source` if the cache holds them under `key`."""
+        path = self.entry_path(source)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(self.MAGIC)) != self.MAGIC:
+                    raise ValueError("not a parameter cache file")
+                header_length = int.from_bytes(f.read(4), "little")
+                header = json.loads(f.read(header_length))
+                if header["key"] != key:
+                    return None
+                return np.load(f, allow_pickle=False)
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable parameter cache file {path}: {e}")
+            return None
+
+    def save(self, source: str, key: str, values: np.ndarray):
+        """Write `values` atomically as the cache entry of `source` under `key`."""
+        os.makedirs(self.path, exist_ok=True)
+        path = self.entry_path(source)
+        header = json.dumps(
+            {
+                "key": key,
+                "source": os.path.basename(source),
+                "shape": list(values.shape),
+                "dtype": values.dtype.str,
+            }
+        ).encode()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.MAGIC)
+            f.write(len(header).to_bytes(4, "little"))
+            f.write(header)
+            np.save(f, values, allow_pickle=False)
+        os.replace(tmp_path, path)
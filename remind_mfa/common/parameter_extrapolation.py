@@ -1,12 +1,14 @@
+import copy
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import flodym as fd
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from numbers import Number
 
 from remind_mfa.common.assumptions_doc import add_assumption_doc
 from remind_mfa.common.data_blending import blend
-from remind_mfa.common.scenarios import ExtrapolationScenarioParameter
+from remind_mfa.common.scenarios import ExtrapolationScenarioParameter, SCENARIO_DIM_LETTER
 
 
 class ParameterExtrapolation:
@@ -35,6 +37,10 @@ class ParameterExtrapolation:
     the values of the referenced parameter at the entry's coordinates serve as the target/factor.
 
     All other entries keep the baseline. Historic values are always preserved.
+
+    Scenario parameters stacked over several scenarios (see `ExtrapolationScenarioParameter.stack`)
+    are extrapolated in one pass: the result has their leading scenario dimension, and each
+    scenario may use its own extrapolation type.
     """
 
     def __init__(
@@ -51,8 +57,18 @@ class ParameterExtrapolation:
         self.parameters = parameters or {}
 
     def extrapolate(self, parameter: fd.Parameter, name: str) -> fd.Parameter:
-        """Return the extrapolated parameter with full 't' dimension."""
+        """Return the extrapolated parameter with full 't' dimension, and document the
+        extrapolation as an assumption."""
+        new_param = self.extrapolate_values(parameter, name)
+        self.document(name)
+        return new_param
+
+    def extrapolate_values(self, parameter: fd.Parameter, name: str) -> fd.Parameter:
+        """Like `extrapolate`, but only keep the description of the extrapolation for
+        `document`, e.g. to document extrapolations run concurrently in a fixed order."""
         prepared = self._prepare_parameter(parameter, name)
+        if self.is_stacked:
+            prepared = self._add_scenario_dimension(prepared)
         last_hist = prepared[{"t": self._last_historic_time}]
 
         endpoint_year = self.scenario_parameter.extras.get("year")
@@ -65,15 +81,14 @@ class ParameterExtrapolation:
         new_values = prepared * unspec
 
         endpoint = self._resolve_endpoint(prepared, endpoint_year, name)
-        ext_type = None
-        if endpoint_year is not None:
-            ext_type = self.scenario_parameter.resolve_type()
+        type_weights = self._type_weights() if endpoint_year is not None else {}
+        for ext_type, weight in type_weights.items():
             if ext_type == "target":
-                new_values = new_values + is_specified * self._absolute_values(
+                contribution = self._absolute_values(
                     last_hist, endpoint, endpoint_year, prepared.dims
                 )
             elif ext_type == "factor":
-                new_values = new_values + is_specified * prepared * self._relative_factors(
+                contribution = prepared * self._relative_factors(
                     endpoint, endpoint_year, prepared.dims
                 )
             else:
@@ -81,21 +96,34 @@ class ParameterExtrapolation:
                 raise ValueError(
                     f"Extrapolation type of '{name}' must be 'target' or 'factor', not '{ext_type}'."
                 )
+            new_values = new_values + is_specified * weight * contribution
 
         if self.definition.split_dimension_letter is not None:
             new_values = self._renormalize_split(new_values, prepared, is_specified, name)
 
-        add_assumption_doc(
-            type="model switch",
-            name=f"Extrapolation of {name}",
-            description=self._description(name, is_specified, endpoint_year, ext_type),
-        )
+        self.description = self._description(name, is_specified, endpoint_year, list(type_weights))
 
         # preserve historical values
         new_param = fd.Parameter(values=new_values.values, dims=prepared.dims, name=name)
         new_param[{"t": self.historic_time}] = prepared[{"t": self.historic_time}]
         return new_param
 
+    def describe(self, name: str) -> str:
+        """Description of the extrapolation as documented by `extrapolate`, without computing
+        it."""
+        endpoint_year = self.scenario_parameter.extras.get("year")
+        is_specified = self._specified_mask(endpoint_year, self.scenario_parameter.value.dims)
+        ext_types = list(self._type_weights()) if endpoint_year is not None else []
+        return self._description(name, is_specified, endpoint_year, ext_types)
+
+    def document(self, name: str):
+        """Add the description of the last extrapolation to the assumptions."""
+        add_assumption_doc(
+            type="model switch",
+            name=f"Extrapolation of {name}",
+            description=self.description,
+        )
+
     def _prepare_parameter(self, parameter: fd.Parameter, name: str) -> fd.Parameter:
         """Return the baseline parameter with 't' dimension.
 
@@ -119,6 +147,40 @@ class ParameterExtrapolation:
         new_dims = parameter.dims.prepend(self.extended_time)
         return parameter.cast_to(new_dims)
 
+    @property
+    def is_stacked(self) -> bool:
+        """Whether the scenario parameter holds several scenarios along a leading dimension."""
+        return SCENARIO_DIM_LETTER in self.scenario_parameter.value.dims.letters
+
+    def _add_scenario_dimension(self, prepared: fd.Parameter) -> fd.Parameter:
+        """Broadcast the baseline to the scenarios, with the scenario dimension leading."""
+        scenario_dim = self.scenario_parameter.value.dims[SCENARIO_DIM_LETTER]
+        other_dims = prepared.dims
+        if SCENARIO_DIM_LETTER in other_dims.letters:
+            other_dims = other_dims.drop(SCENARIO_DIM_LETTER)
+        target_dims = other_dims.prepend(scenario_dim)
+        return fd.Parameter(
+            dims=target_dims, values=prepared.cast_values_to(target_dims), name=prepared.name
+        )
+
+    def _type_weights(self) -> Dict[str, float | fd.FlodymArray]:
+        """Weight of the contribution of each extrapolation type.
+
+        A single scenario has one type of weight 1. For stacked scenarios, each type weighs 1
+        in the scenarios using it and 0 in the others.
+        """
+        if not self.is_stacked:
+            return {self.scenario_parameter.resolve_type(): 1.0}
+        scenario_types = self.scenario_parameter.resolve_scenario_types()
+        scenario_dims = self.scenario_parameter.value.dims[(SCENARIO_DIM_LETTER,)]
+        return {
+            ext_type: fd.Parameter(
+                dims=scenario_dims,
+                values=np.array([float(t == ext_type) for t in scenario_types]),
+            )
+            for ext_type in dict.fromkeys(t for t in scenario_types if t is not None)
+        }
+
     @property
     def _last_historic_time(self) -> Number:
         return self.historic_time.items[-1]
@@ -374,7 +436,7 @@ class ParameterExtrapolation:
         name: str,
         is_specified: fd.FlodymArray,
         endpoint_year: Optional[fd.FlodymArray],
-        ext_type: Optional[str],
+        ext_types: List[str],
     ) -> str:
         """Short summary of the applied extrapolation; details are in the scenario config."""
         has_scenario = endpoint_year is not None and is_specified.values.any()
@@ -384,10 +446,13 @@ class ParameterExtrapolation:
                 "all entries keep their baseline."
             )
 
-        if ext_type == "target":
-            mode = "blending to absolute scenario targets"
-        else:
-            mode = "scaling the baseline by scenario factors"
+        modes = {
+            "target": "blending to absolute scenario targets",
+            "factor": "scaling the baseline by scenario factors",
+        }
+        mode = " or ".join(modes[ext_type] for ext_type in sorted(ext_types, reverse=True))
+        if len(ext_types) > 1:
+            mode += ", depending on the scenario"
         sentence = (
             f"Parameter '{name}' is extended into the future, {mode} "
             f"('{self.definition.blending_function}' blend)"
@@ -416,15 +481,21 @@ class ParameterExtrapolation:
 
 
 class ParameterExtrapolationManager:
-    """Applies extrapolation instructions defined by structured scenario parameters."""
+    """Applies extrapolation instructions defined by structured scenario parameters.
+
+    With more than one of `threads`, extrapolations independent of each other are run
+    concurrently in up to `threads` threads.
+    """
 
     def __init__(
         self,
         historic_time: fd.Dimension,
         extended_time: fd.Dimension,
+        threads: int = 1,
     ):
         self.historic_time = historic_time
         self.extended_time = extended_time
+        self.threads = threads
 
         if "h" != self.historic_time.letter:
             raise ValueError(f"Historic time dimension does not have letter 'h'")
@@ -441,9 +512,11 @@ class ParameterExtrapolationManager:
         Only ``ExtrapolationScenarioParameter`` entries are adjusted; all other scenario
         values and model parameters are returned unchanged.
 
-        Extrapolations are processed in dependency order: a parameter referenced as an
-        endpoint of another extrapolated parameter is extrapolated first, independent
-        of definition order. Ties keep the definition order. Circular references raise.
+        Extrapolations are processed in dependency levels: a parameter referenced as an
+        endpoint of another extrapolated parameter is extrapolated in an earlier level,
+        independent of definition order. The extrapolations of one level may run
+        concurrently. All are documented afterwards in the order they would be processed one
+        by one, see `_processing_order`. Circular references raise.
 
         Args:
             parameters: Dictionary of parameters to potentially extrapolate
@@ -452,37 +525,226 @@ class ParameterExtrapolationManager:
         Returns:
             Dictionary of parameters with extrapolations applied where configured
         """
-        modified_parameters = parameters.copy()
+        return self._extrapolate(parameters, self._extrapolations(scenario_parameters))
 
-        extrapolations = {
-            name: scenario_parameter
-            for name, scenario_parameter in (scenario_parameters or {}).items()
-            if isinstance(scenario_parameter, ExtrapolationScenarioParameter)
+    def apply_stacked_prm_extrapolation(
+        self,
+        parameters: Dict[str, fd.Parameter],
+        scenario_parameters_by_scenario: Dict[str, Dict[str, object]],
+        document: bool = True,
+    ) -> Dict[str, fd.Parameter]:
+        """Extrapolate parameters for several scenarios at once.
+
+        Like `apply_prm_extrapolation`, but the instructions of each extrapolated parameter are
+        stacked over the scenarios, such that each parameter is extrapolated in one pass.
+        Extrapolated parameters get a leading scenario dimension with letter
+        ``SCENARIO_DIM_LETTER``; use `select_scenario` to slice out the parameters of one
+        scenario. All scenarios must extrapolate the same parameters.
+
+        Args:
+            parameters: Dictionary of parameters to potentially extrapolate
+            scenario_parameters_by_scenario: Scenario values of each scenario, by scenario name.
+            document: Whether to add the extrapolations to the assumptions, which is not wanted
+                if the results are documented by the runs that use them.
+
+        Returns:
+            Dictionary of parameters with extrapolations applied where configured
+        """
+        extrapolations_by_scenario = {
+            scenario: self._extrapolations(scenario_parameters)
+            for scenario, scenario_parameters in scenario_parameters_by_scenario.items()
+        }
+        names = next(iter(extrapolations_by_scenario.values()), {}).keys()
+        for scenario, extrapolations in extrapolations_by_scenario.items():
+            if extrapolations.keys() != names:
+                raise ValueError(
+                    f"Scenario '{scenario}' extrapolates {sorted(extrapolations)}, but other "
+                    f"scenarios extrapolate {sorted(names)}. Stacked scenarios must extrapolate "
+                    "the same parameters."
+                )
+        stacked = {
+            name: ExtrapolationScenarioParameter.stack(
+                {
+                    scenario: extrapolations[name]
+                    for scenario, extrapolations in extrapolations_by_scenario.items()
+                }
+            )
+            for name in names
         }
+        return self._extrapolate(parameters, stacked, document=document)
 
+    def apply_precomputed_extrapolation(
+        self,
+        parameters: Dict[str, fd.Parameter],
+        scenario_parameters: Optional[Dict[str, object]],
+        extrapolated: Dict[str, fd.Parameter],
+    ) -> Dict[str, fd.Parameter]:
+        """Like `apply_prm_extrapolation`, but take the extrapolated parameters from
+        `extrapolated`, e.g. the slice of a stacked extrapolation for this scenario. The
+        extrapolations are documented as if computed here. The parameters are copied, since
+        models may change their values in place and `extrapolated` may be reused."""
+        modified_parameters = parameters.copy()
+        extrapolations = self._extrapolations(scenario_parameters)
         for name in self._processing_order(extrapolations):
-            scenario_parameter = extrapolations[name]
-            param_name = scenario_parameter.definition.name
-            if param_name not in modified_parameters:
-                if not scenario_parameter.definition.create_new:
-                    raise ValueError(
-                        f"Parameter '{param_name}' not found in parameters. Use create_new=True to create it."
-                    )
-                parameter = fd.Parameter(name=param_name, dims=scenario_parameter.value.dims)
-                parameter[...] = 1.0 if scenario_parameter.resolve_type() == "factor" else 0.0
-            else:
-                parameter = modified_parameters[param_name]
-
+            param_name = extrapolations[name].definition.name
             extrapolation = ParameterExtrapolation(
-                scenario_parameter=scenario_parameter,
+                scenario_parameter=extrapolations[name],
                 historic_time=self.historic_time,
                 extended_time=self.extended_time,
-                parameters=modified_parameters,
             )
-            modified_parameters[param_name] = extrapolation.extrapolate(parameter, param_name)
+            extrapolation.description = extrapolation.describe(param_name)
+            extrapolation.document(param_name)
+            modified_parameters[param_name] = copy.deepcopy(extrapolated[param_name])
+        return modified_parameters
 
+    @staticmethod
+    def select_scenario(
+        parameters: Dict[str, fd.Parameter], scenario: str
+    ) -> Dict[str, fd.Parameter]:
+        """Parameters of one scenario from the result of `apply_stacked_prm_extrapolation`."""
+        selected = {}
+        for name, parameter in parameters.items():
+            if SCENARIO_DIM_LETTER in parameter.dims.letters:
+                parameter = fd.Parameter(
+                    dims=parameter.dims.drop(SCENARIO_DIM_LETTER),
+                    values=parameter[{SCENARIO_DIM_LETTER: scenario}].values,
+                    name=parameter.name,
+                )
+            selected[name] = parameter
+        return selected
+
+    @staticmethod
+    def _extrapolations(
+        scenario_parameters: Optional[Dict[str, object]],
+    ) -> Dict[str, ExtrapolationScenarioParameter]:
+        return {
+            name: scenario_parameter
+            for name, scenario_parameter in (scenario_parameters or {}).items()
+            if isinstance(scenario_parameter, ExtrapolationScenarioParameter)
+        }
+
+    def _extrapolate(
+        self,
+        parameters: Dict[str, fd.Parameter],
+        extrapolations: Dict[str, ExtrapolationScenarioParameter],
+        document: bool = True,
+    ) -> Dict[str, fd.Parameter]:
+        modified_parameters = parameters.copy()
+
+        def run(task: tuple[ParameterExtrapolation, fd.Parameter]) -> fd.Parameter:
+            extrapolation, parameter = task
+            return extrapolation.extrapolate_values(parameter, extrapolation.definition.name)
+
+        computed = {}
+        executor = None
+        try:
+            for level in self._processing_levels(extrapolations):
+                # parameters are looked up before the level runs, such that lazy parameters
+                # are read once, and results are added after it
+                tasks = [
+                    self._make_task(extrapolations[name], modified_parameters) for name in level
+                ]
+                if self.threads > 1 and len(tasks) > 1:
+                    if executor is None:
+                        executor = ThreadPoolExecutor(max_workers=self.threads)
+                    results = executor.map(run, tasks)
+                else:
+                    results = map(run, tasks)
+                # results come in definition order; the first failing extrapolation raises
+                for name, (extrapolation, _), new_param in zip(level, tasks, results):
+                    computed[name] = extrapolation
+                    modified_parameters[extrapolation.definition.name] = new_param
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if document:
+            for name in self._processing_order(extrapolations):
+                computed[name].document(extrapolations[name].definition.name)
         return modified_parameters
 
+    def _make_task(
+        self,
+        scenario_parameter: ExtrapolationScenarioParameter,
+        parameters: Dict[str, fd.Parameter],
+    ) -> tuple[ParameterExtrapolation, fd.Parameter]:
+        """Set up the extrapolation of one parameter, with the parameter to extrapolate."""
+        param_name = scenario_parameter.definition.name
+        if param_name not in parameters:
+            if not scenario_parameter.definition.create_new:
+                raise ValueError(
+                    f"Parameter '{param_name}' not found in parameters. Use create_new=True to create it."
+                )
+            parameter = self._new_parameter(scenario_parameter)
+        else:
+            parameter = parameters[param_name]
+
+        references = {
+            ref_name: parameters[ref_name]
+            for ref_name in scenario_parameter.referenced_parameters()
+            if ref_name in parameters
+        }
+        extrapolation = ParameterExtrapolation(
+            scenario_parameter=scenario_parameter,
+            historic_time=self.historic_time,
+            extended_time=self.extended_time,
+            parameters=references,
+        )
+        return extrapolation, parameter
+
+    @staticmethod
+    def _new_parameter(scenario_parameter: ExtrapolationScenarioParameter) -> fd.Parameter:
+        """Baseline of a parameter created by its extrapolation: 1 for factors, 0 for targets."""
+        name = scenario_parameter.definition.name
+        dims = scenario_parameter.value.dims
+        parameter = fd.Parameter(name=name, dims=dims)
+        if SCENARIO_DIM_LETTER not in dims.letters:
+            parameter[...] = 1.0 if scenario_parameter.resolve_type() == "factor" else 0.0
+            return parameter
+        scenario_types = scenario_parameter.resolve_scenario_types()
+        if all(t is None for t in scenario_types):
+            scenario_types = [scenario_parameter.resolve_type()] * len(scenario_types)
+        baseline = fd.Parameter(
+            dims=dims[(SCENARIO_DIM_LETTER,)],
+            values=np.array([1.0 if t == "factor" else 0.0 for t in scenario_types]),
+        )
+        parameter[...] = baseline.cast_values_to(dims)
+        return parameter
+
+    @staticmethod
+    def _processing_levels(extrapolations: Dict[str, "ExtrapolationScenarioParameter"]) -> list:
+        """Group extrapolations into levels, such that referenced parameters are processed
+        in an earlier level than their referrers.
+
+        Each level holds (in definition order) the remaining parameters whose referenced
+        extrapolated parameters are all in earlier levels, so the extrapolations of one level
+        are independent of each other. References to plain model parameters impose no
+        ordering. Raises if a circular reference prevents progress.
+        """
+        remaining = dict(extrapolations)
+        done = set()
+        levels = []
+        while remaining:
+            level = [
+                name
+                for name, scenario_parameter in remaining.items()
+                if all(
+                    ref not in extrapolations or ref in done
+                    for ref in scenario_parameter.referenced_parameters()
+                )
+            ]
+            if not level:
+                names = ", ".join(f"'{n}'" for n in remaining)
+                raise ValueError(
+                    f"Circular reference between extrapolated parameters: {names}. "
+                    "Parameters cannot use each other (or themselves) as endpoints."
+                )
+            levels.append(level)
+            done.update(level)
+            for name in level:
+                del remaining[name]
+        return levels
+
     @staticmethod
     def _processing_order(extrapolations: Dict[str, "ExtrapolationScenarioParameter"]) -> list:
         """Order extrapolations so referenced parameters are processed before referrers.
@@ -490,19 +752,18 @@ class ParameterExtrapolationManager:
         Repeatedly picks (in definition order) the parameters whose referenced
         extrapolated parameters are all done. References to plain model parameters
         impose no ordering. Raises if a circular reference prevents progress.
+        Extrapolations are documented in this order, independent of their levels.
         """
-        remaining = dict(extrapolations)
-        done = set()
         order = []
+        done = set()
+        remaining = dict(extrapolations)
         while remaining:
             progress = False
             for name, scenario_parameter in list(remaining.items()):
-                open_dependencies = [
-                    ref
+                if all(
+                    ref not in extrapolations or ref in done
                     for ref in scenario_parameter.referenced_parameters()
-                    if ref in extrapolations and ref not in done
-                ]
-                if not open_dependencies:
+                ):
                     order.append(name)
                     done.add(name)
                     del remaining[name]
@@ -0,0 +1,87 @@
+import copy
+from collections.abc import Mapping, MutableMapping
+from typing import Iterator
+
+import flodym as fd
+
+from remind_mfa.common.lazy_parameters import LazyParameters
+
+
+class ParameterStore(MutableMapping):
+    """Parameters with copy-on-write snapshots.
+
+    A snapshot shares all parameters with the store it is taken from, so taking one copies no
+    values. Setting a parameter in either store only replaces its own entry. Code that changes
+    the values of a parameter in place takes it from `writable`, which first replaces a shared
+    parameter by a private copy, such that the other stores keep the original values.
+
+    Wraps any mapping of parameters. `LazyParameters` stay lazy: snapshots share the parameters
+    loaded by any of them, and parameters not used are never read, also not when pickled.
+    """
+
+    def __init__(self, parameters: Mapping[str, fd.Parameter]):
+        if isinstance(parameters, ParameterStore):
+            # the parameters the source owned are shared from now on
+            parameters._owned.clear()
+            parameters = parameters._parameters
+        self._parameters = copy.copy(parameters)
+        self._owned: set[str] = set()
+        self.diverged: set[str] = set()
+        """Names of the parameters set, deleted or copied since this store was created."""
+
+    def __getitem__(self, name: str) -> fd.Parameter:
+        return self._parameters[name]
+
+    def __setitem__(self, name: str, parameter: fd.Parameter):
+        # the parameter may be referenced elsewhere, so it is not owned
+        self._parameters[name] = parameter
+        self._owned.discard(name)
+        self.diverged.add(name)
+
+    def __delitem__(self, name: str):
+        del self._parameters[name]
+        self._owned.discard(name)
+        self.diverged.add(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._parameters
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._parameters)
+
+    def __len__(self) -> int:
+        return len(self._parameters)
+
+    def writable(self, name: str) -> fd.Parameter:
+        """Return parameter `name` for changing its values in place, copying it on first use."""
+        if name not in self._owned:
+            self._parameters[name] = copy.deepcopy(self._parameters[name])
+            self._owned.add(name)
+            self.diverged.add(name)
+        return self._parameters[name]
+
+    def snapshot(self) -> "ParameterStore":
+        """Return a store sharing all parameters with this one."""
+        return ParameterStore(self)
+
+    copy = snapshot
+    __copy__ = snapshot
+
+    def loaded(self) -> dict[str, fd.Parameter]:
+        """Parameters read so far, see `LazyParameters.loaded`."""
+        if isinstance(self._parameters, LazyParameters):
+            return self._parameters.loaded()
+        return dict(self._parameters)
+
+    @property
+    def is_bound(self) -> bool:
+        """See `LazyParameters.is_bound`."""
+        return not isinstance(self._parameters, LazyParameters) or self._parameters.is_bound
+
+    def bind(self, source: LazyParameters):
+        """See `LazyParameters.bind`."""
+        self._parameters.bind(source)
+
+    def __reduce__(self):
+        # pickles, e.g. checkpoints, share no values; lazy parameters hold those loaded so far
+        return (ParameterStore, (self._parameters,))
@@ -0,0 +1,109 @@
+import logging
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel
+
+from remind_mfa.common.assumptions_doc import recorded_assumptions, restore_assumptions
+from remind_mfa.common.checkpoints import CheckpointStore, fingerprint
+from remind_mfa.common.helpers import RemindMFABaseModel
+from remind_mfa.common.profiling import profile_section, trace_memory
+
+
+class Stage(RemindMFABaseModel):
+    """A named step of a model run, with the inputs that decide whether it must be recomputed."""
+
+    name: str
+    config: tuple[str, ...] = ()
+    """Dotted paths of the configuration entries the stage depends on, e.g. 'model_switches'."""
+    consumes: tuple[str, ...] = ()
+    """Model attributes set by earlier stages that the stage reads."""
+    consumes_all: bool = False
+    """Whether the stage reads all attributes set by earlier stages, e.g. to export them."""
+    produces: tuple[str, ...] = ()
+    """Model attributes the stage sets or changes."""
+
+
+def config_value(cfg: BaseModel, path: str) -> Any:
+    """Return the configuration entry at a dotted `path`, with nested sections as dicts."""
+    value = cfg
+    for name in path.split("."):
+        value = getattr(value, name)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
+
+
+class Pipeline:
+    """Runs the stages of a model and skips those whose inputs are unchanged since they were
+    last checkpointed.
+
+    The key of a stage is a fingerprint of its configuration entries, any further inputs like
+    files, and the versions of the attributes it consumes. The version of an attribute is the
+    fingerprint of its content for the small attributes in `CONTENT_ATTRIBUTES`, such that a
+    stage reproducing them unchanged does not make later stages dirty. Other attributes, like MFA
+    systems and the parameters, are versioned by the key of the stage that produced them, which
+    covers all their inputs without hashing, or reading lazy, parameter values.
+    """
+
+    CONTENT_ATTRIBUTES = {"dims", "scenario_parameters"}
+
+    def __init__(self, stages: list[Stage], store: Optional[CheckpointStore], reuse: bool):
+        self.stages = {stage.name: stage for stage in stages}
+        self.store = store
+        self.reuse = reuse
+        self.versions: dict[str, str] = {}
+
+    def run(
+        self,
+        model: object,
+        name: str,
+        compute: Callable[[], None],
+        inputs: Optional[Callable[[], Any]] = None,
+    ):
+        """Run stage `name` of `model` by calling `compute`, or restore its outputs from the
+        checkpoint matching its key. `inputs` returns further inputs to include in the key."""
+        with profile_section(name), trace_memory(name, getattr(model, "named_arrays", None)):
+            self._run(model, name, compute, inputs)
+
+    def _run(
+        self,
+        model: object,
+        name: str,
+        compute: Callable[[], None],
+        inputs: Optional[Callable[[], Any]],
+    ):
+        if self.store is None:
+            compute()
+            return
+
+        stage = self.stages[name]
+        consumed = self.versions if stage.consumes_all else stage.consumes
+        key = fingerprint(
+            name,
+            [(path, config_value(model.cfg, path)) for path in stage.config],
+            [(attribute, self.versions.get(attribute)) for attribute in sorted(consumed)],
+            inputs() if inputs is not None else None,
+        )
+
+        if self.reuse and self.store.has(name, key):
+            state = self.store.load(name, key)
+            restore_assumptions(state.pop("_assumptions"))
+            for attribute, value in state.items():
+                setattr(model, attribute, value)
+            logging.info(f"Inputs of stage '{name}' unchanged, restored it from checkpoint.")
+        else:
+            n_assumptions = len(recorded_assumptions())
+            compute()
+            state = {
+                attribute: getattr(model, attribute)
+                for attribute in stage.produces
+                if hasattr(model, attribute)
+            }
+            state["_assumptions"] = recorded_assumptions()[n_assumptions:]
+            self.store.save(name, key, state)
+
+        for attribute in stage.produces:
+            if attribute in self.CONTENT_ATTRIBUTES:
+                self.versions[attribute] = fingerprint(getattr(model, attribute))
+            else:
+                self.versions[attribute] = fingerprint(key, attribute)
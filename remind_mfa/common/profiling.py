@@ -0,0 +1,186 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Optional
+
+import flodym as fd
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Profiling records are kept in module globals, like the assumptions in assumptions_doc, such that
+# sub-steps deep inside the model can be timed without passing a profiler around.
+_enabled = False
+_trace_memory = False
+_records: dict[str, dict] = {}
+_memory_records: dict[str, dict] = {}
+_active_sections: list[str] = []
+
+N_LARGEST_ARRAYS = 10
+"""Number of largest arrays listed in the memory record of each stage."""
+
+
+def enable_profiling(enabled: bool = True, trace_memory: bool = False):
+    """Switch profiling on or off and discard all previous records.
+
+    With `trace_memory`, memory allocations are traced with tracemalloc, which slows down the run
+    considerably.
+    """
+    global _enabled, _trace_memory
+    _enabled = enabled
+    _trace_memory = enabled and trace_memory
+    _records.clear()
+    _memory_records.clear()
+    _active_sections.clear()
+    if _trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_profiling_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def profile_section(name: str):
+    """Record wall time, CPU time and call count of the enclosed code under `name`.
+
+    Sections nest: a section entered within another is recorded as 'outer > inner'.
+    Does nothing unless profiling is enabled.
+    """
+    if not _enabled:
+        yield
+        return
+    _active_sections.append(name)
+    path = " > ".join(_active_sections)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        record = _records.setdefault(path, {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0})
+        record["calls"] += 1
+        record["wall_time"] += time.perf_counter() - wall_start
+        record["cpu_time"] += time.process_time() - cpu_start
+        _active_sections.pop()
+
+
+@contextmanager
+def trace_memory(name: str, arrays: Optional[Callable[[], dict[str, fd.FlodymArray]]] = None):
+    """Record the peak and retained memory of the enclosed code under `name`, and the largest of
+    the arrays returned by `arrays` afterwards.
+
+    Peak and retained memory are the maximum and final increase of the memory traced by
+    tracemalloc. Sections must not nest, since each resets the traced peak. Does nothing unless
+    memory tracing is enabled.
+    """
+    if not _trace_memory:
+        yield
+        return
+    start, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        record = _memory_records.setdefault(
+            name, {"calls": 0, "peak_memory": 0, "retained_memory": 0}
+        )
+        record["calls"] += 1
+        record["peak_memory"] = max(record["peak_memory"], peak - start)
+        record["retained_memory"] += current - start
+        if resource is not None:
+            # kilobytes on Linux, bytes on macOS
+            record["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if arrays is not None:
+            record["largest_arrays"] = largest_arrays(arrays())
+
+
+def largest_arrays(arrays: dict[str, fd.FlodymArray], n: int = N_LARGEST_ARRAYS) -> list[dict]:
+    """Return name, dimension letters and size in bytes of the `n` largest arrays."""
+    sizes = [
+        {"name": name, "dims": "".join(array.dims.letters), "nbytes": array.values.nbytes}
+        for name, array in arrays.items()
+    ]
+    return sorted(sizes, key=lambda size: size["nbytes"], reverse=True)[:n]
+
+
+def add_profile_record(name: str, wall_time: float, cpu_time: float):
+    """Record a section timed elsewhere, e.g. in a worker thread, under the current section.
+    Does nothing unless profiling is enabled."""
+    if not _enabled:
+        return
+    path = " > ".join(_active_sections + [name])
+    record = _records.setdefault(path, {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0})
+    record["calls"] += 1
+    record["wall_time"] += wall_time
+    record["cpu_time"] += cpu_time
+
+
+def profiled(func):
+    """Decorator recording each call of `func` as a profile section named by its qualified name."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with profile_section(func.__qualname__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def profile_records() -> list[dict]:
+    """Return all records, sorted by decreasing wall time."""
+    records = [{"section": path, **record} for path, record in _records.items()]
+    return sorted(records, key=lambda record: record["wall_time"], reverse=True)
+
+
+def memory_records() -> list[dict]:
+    """Return all memory records, sorted by decreasing peak memory."""
+    records = [{"section": name, **record} for name, record in _memory_records.items()]
+    return sorted(records, key=lambda record: record["peak_memory"], reverse=True)
+
+
+def profile_summary() -> str:
+    """Return the records as tables for the console."""
+    records = profile_records()
+    width = max([len("Section")] + [len(record["section"]) for record in records])
+    lines = [f"{'Section':<{width}}  {'Calls':>6}  {'Wall [s]':>10}  {'CPU [s]':>10}"]
+    for record in records:
+        lines.append(
+            f"{record['section']:<{width}}  {record['calls']:>6}  "
+            f"{record['wall_time']:>10.3f}  {record['cpu_time']:>10.3f}"
+        )
+    if _memory_records:
+        lines += ["", memory_summary()]
+    return "\n".join(lines)
+
+
+def memory_summary() -> str:
+    """Return the memory records as a table for the console, with the largest arrays alive after
+    the stage of highest peak memory."""
+    records = memory_records()
+    width = max([len("Stage")] + [len(record["section"]) for record in records])
+    lines = [f"{'Stage':<{width}}  {'Peak [MB]':>10}  {'Retained [MB]':>14}"]
+    for record in records:
+        lines.append(
+            f"{record['section']:<{width}}  {record['peak_memory'] / 1e6:>10.1f}  "
+            f"{record['retained_memory'] / 1e6:>14.1f}"
+        )
+    if records and records[0].get("largest_arrays"):
+        lines += ["", f"Largest arrays after stage '{records[0]['section']}':"]
+        for array in records[0]["largest_arrays"]:
+            lines.append(f"  {array['name']} ({array['dims']}): {array['nbytes'] / 1e6:.1f} MB")
+    return "\n".join(lines)
+
+
+def write_profile(path: str):
+    """Write the records to a JSON file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"sections": profile_records(), "memory": memory_records()}, f, indent=2)
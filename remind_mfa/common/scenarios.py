@@ -1,9 +1,13 @@
 import os
 import ast
 import csv
+import itertools
+import logging
+import pickle
+import tempfile
 import numpy as np
 import flodym as fd
-from pydantic import Field, field_validator, model_validator
+from pydantic import Field, PrivateAttr, field_validator, model_validator
 from typing import Any, Dict, List, Optional
 
 from remind_mfa.common.common_definition import (
@@ -11,6 +15,7 @@ from remind_mfa.common.common_definition import (
     PlainDataPointDefinition,
     RemindMFAParameterDefinition,
 )
+from remind_mfa.common.checkpoints import fingerprint
 from remind_mfa.common.helpers import ModelNames, RemindMFABaseModel
 
 # Declares the numpy dtype of each `extra:` column on an extrapolation parameter.
@@ -19,6 +24,101 @@ EXTRA_DTYPES = {"year": float, "type": "<U32"}
 
 VALID_TYPES = ("factor", "target")
 
+# Letter of the leading dimension of scenario parameters stacked over several scenarios, see
+# `ExtrapolationScenarioParameter.stack`.
+SCENARIO_DIM_LETTER = "x"
+
+
+def scenario_dimension(scenarios: List[str]) -> fd.Dimension:
+    """Leading dimension of parameters stacked over the given scenarios."""
+    return fd.Dimension(name="Scenario", letter=SCENARIO_DIM_LETTER, items=list(scenarios))
+
+
+def assign_rows(parameter: fd.Parameter, values: list, indices: List[Dict[str, Any]]):
+    """Write each of `values` into `parameter` at its index, in order, such that later rows
+    override earlier ones.
+
+    Consecutive rows indexing the same dimensions with single items are converted to integer
+    coordinates and written with one fancy-indexing assignment. Other rows, e.g. selecting
+    several items of a dimension, are written one by one through flodym.
+    """
+    lookup = DimensionLookup(parameter.dims)
+    coordinates = [lookup.coordinates(index) for index in indices]
+    rows = zip(values, indices, coordinates)
+    for axes, group in itertools.groupby(rows, key=lambda row: _axes(row[2])):
+        group = list(group)
+        if axes is None:
+            for value, index, _ in group:
+                ExtrapolationScenarioParameter._set(parameter, value, index)
+        elif not axes:
+            parameter.values[...] = group[-1][0]
+        else:
+            _assign_coordinates(
+                parameter.values,
+                axes,
+                [[row[2][axis] for row in group] for axis in axes],
+                [row[0] for row in group],
+            )
+
+
+class DimensionLookup:
+    """Axis of each dimension, by letter and name, and position of each item of a dimension set,
+    to convert many indices of scenario rows without searching the dimensions each time."""
+
+    def __init__(self, dims: fd.DimensionSet):
+        self.names = [dim.name for dim in dims]
+        self.axes = {dim.letter: axis for axis, dim in enumerate(dims)}
+        self.axes.update({dim.name: axis for axis, dim in enumerate(dims)})
+        self.positions = [{item: i for i, item in enumerate(dim.items)} for dim in dims]
+
+    def position(self, key: str, item: Any) -> Optional[int]:
+        """Position of `item` in the dimension with letter or name `key`, if it is one."""
+        try:
+            return self.positions[self.axes[key]].get(item)
+        except (KeyError, TypeError):  # unknown dimension or unhashable item, e.g. a list
+            return None
+
+    def coordinates(self, index: Dict[str, Any]) -> Optional[Dict[int, int]]:
+        """Position of the indexed item by axis, or None if the index does not select single
+        items of distinct dimensions."""
+        coordinates = {}
+        for key, item in index.items():
+            position = self.position(key, item)
+            if position is None or self.axes[key] in coordinates:
+                return None
+            coordinates[self.axes[key]] = position
+        return coordinates
+
+
+def _axes(coordinates: Optional[Dict[int, int]]) -> Optional[tuple[int, ...]]:
+    return None if coordinates is None else tuple(sorted(coordinates))
+
+
+def _assign_coordinates(
+    array: np.ndarray, axes: tuple[int, ...], coordinates: List[List[int]], values: list
+):
+    coordinates = [np.asarray(c) for c in coordinates]
+    # keep the last row writing to each coordinate
+    flat = np.ravel_multi_index(coordinates, [array.shape[axis] for axis in axes])
+    _, last_reversed = np.unique(flat[::-1], return_index=True)
+    keep = np.sort(len(flat) - 1 - last_reversed)
+    if array.dtype == object:
+        row_values = np.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            row_values[i] = value
+    else:
+        row_values = np.asarray(values, dtype=array.dtype)
+    # indexed axes first, such that the row values broadcast over the others
+    view = np.moveaxis(array, axes, range(len(axes)))
+    view[tuple(c[keep] for c in coordinates)] = row_values[keep].reshape(
+        (-1,) + (1,) * (array.ndim - len(axes))
+    )
+
+
+# Pickled parameters compiled from scenario files in this process, by compile key, such that
+# repeated runs of a scenario, e.g. in a model server, need not read the cache file again.
+_compiled_scenarios: dict[str, bytes] = {}
+
 
 class ExtrapolationScenarioParameter(RemindMFABaseModel):
     """Scenario values and metadata for one parameter extrapolation.
@@ -34,6 +134,7 @@ class ExtrapolationScenarioParameter(RemindMFABaseModel):
     """0/1 mask marking coordinates where a scenario row has set a value; distinguishes
     an explicit 0 from an untouched entry."""
     extras: Dict[str, fd.Parameter] = Field(default_factory=dict)
+    _lookup: Optional[DimensionLookup] = PrivateAttr(default=None)
 
     @model_validator(mode="after")
     def init_is_set(self):
@@ -54,11 +155,22 @@ class ExtrapolationScenarioParameter(RemindMFABaseModel):
         return self
 
     def set_value(self, value: float | str, index: Dict[str, Any]):
+        for parameter, row_value in self.writes(value, {}, index):
+            self._set(parameter, row_value, index)
+
+    def writes(
+        self, value: float | str, extras: Dict[str, Any], index: Dict[str, Any]
+    ) -> List[tuple[fd.Parameter, Any]]:
+        """Arrays a scenario row writes to, with the value for each. Checks the row first."""
         if value is None:
             raise ValueError(f"Scenario row for '{self.definition.name}' has an empty value.")
         self._check_index(index)
-        self._set(self.value, value, index)
-        self._set(self.is_set, 1.0, index)
+        writes = [(self.value, value), (self.is_set, 1.0)]
+        for name, extra_value in extras.items():
+            if name not in self.extras:
+                self.extras[name] = self._new_extra(name)
+            writes.append((self.extras[name], extra_value))
+        return writes
 
     def set_extra(self, name: str, value: float | str, index: Dict[str, Any]):
         self._check_index(index)
@@ -87,21 +199,65 @@ class ExtrapolationScenarioParameter(RemindMFABaseModel):
 
     def _check_index(self, index: Dict[str, Any]):
         """Check that index keys are valid dimension names and index values are valid items."""
-        valid_names = set(self.value.dims.names)
-        invalid = [name for name in index if name not in valid_names]
+        lookup = self._lookup
+        if lookup is None:
+            lookup = self._lookup = DimensionLookup(self.value.dims)
+        invalid = [name for name in index if name not in lookup.names]
         if invalid:
             raise ValueError(
                 f"Scenario row for '{self.definition.name}' indexes dimension(s) {invalid}, "
-                f"which are not among its scenario dimensions {sorted(valid_names)}."
+                f"which are not among its scenario dimensions {sorted(lookup.names)}."
             )
         for dim_name, item in index.items():
-            dim = self.value.dims[dim_name]
-            if item not in dim.items:
+            if lookup.position(dim_name, item) is None:
+                dim = self.value.dims[dim_name]
                 raise ValueError(
                     f"Scenario row for '{self.definition.name}': '{item}' is not a valid "
                     f"item of dimension '{dim_name}'. Valid items: {dim.items}."
                 )
 
+    @classmethod
+    def stack(
+        cls, scenario_parameters: Dict[str, "ExtrapolationScenarioParameter"]
+    ) -> "ExtrapolationScenarioParameter":
+        """Combine the parameters of the same definition from several scenarios, by scenario
+        name, into one with a leading scenario dimension. Extras missing in a scenario are
+        filled with zeros."""
+        parameters = list(scenario_parameters.values())
+        first = parameters[0]
+        for parameter in parameters[1:]:
+            if parameter.definition != first.definition or parameter.value.dims != first.value.dims:
+                raise ValueError(
+                    f"Cannot stack scenario parameters '{first.definition.name}' and "
+                    f"'{parameter.definition.name}' with different definitions or dimensions."
+                )
+        dims = first.value.dims.prepend(scenario_dimension(list(scenario_parameters)))
+
+        def stacked(name: str, arrays: List[np.ndarray]) -> fd.Parameter:
+            return fd.Parameter(name=name, dims=dims, values=np.stack(arrays))
+
+        extras = {}
+        for extra in sorted({extra for parameter in parameters for extra in parameter.extras}):
+            extras[extra] = stacked(
+                f"{first.definition.name}_{extra}",
+                [
+                    (
+                        parameter.extras[extra].values
+                        if extra in parameter.extras
+                        else parameter._new_extra(extra).values
+                    )
+                    for parameter in parameters
+                ],
+            )
+        return cls(
+            definition=first.definition,
+            value=stacked(first.definition.name, [p.value.values for p in parameters]),
+            is_set=stacked(
+                f"{first.definition.name}_is_set", [p.is_set.values for p in parameters]
+            ),
+            extras=extras,
+        )
+
     def referenced_parameters(self) -> list:
         """Sorted unique names of model parameters referenced as endpoints in the scenario values."""
         return sorted({v for v in self.value.values.flat if isinstance(v, str)})
@@ -113,9 +269,27 @@ class ExtrapolationScenarioParameter(RemindMFABaseModel):
         declaration (e.g. in the base scenario) suffices. Mixed types are not
         supported: raises unless exactly one valid type is declared.
         """
-        name = self.definition.name
         type_extra = self.extras.get("type")
         declared = type_extra.values[self.is_set.values > 0] if type_extra is not None else []
+        return self._resolve_declared_type(declared)
+
+    def resolve_scenario_types(self) -> List[Optional[str]]:
+        """Extrapolation type of each scenario of a stacked parameter, see `stack`. Scenarios
+        without endpoint years need no type and give None."""
+        type_extra = self.extras.get("type")
+        year_extra = self.extras.get("year")
+        types = []
+        for i in range(self.value.dims.shape[0]):
+            if year_extra is None or not (year_extra.values[i] > 0).any():
+                types.append(None)
+                continue
+            is_set = self.is_set.values[i] > 0
+            declared = type_extra.values[i][is_set] if type_extra is not None else []
+            types.append(self._resolve_declared_type(declared))
+        return types
+
+    def _resolve_declared_type(self, declared) -> str:
+        name = self.definition.name
         types = {str(t) for t in declared if t}
         if not types:
             raise ValueError(
@@ -144,16 +318,77 @@ class ScenarioReader(RemindMFABaseModel):
     parameter_definitions: List[
         ExtrapolationDefinition | RemindMFAParameterDefinition | PlainDataPointDefinition
     ]
+    rows: List[Dict[str, Any]] = []
+    """Further scenario rows, applied after the scenario and its parents. Each row maps the
+    columns of a scenario CSV file to values, e.g. {"parameter": "stock_factor", "value": 0.8}."""
+    cache_path: Optional[str] = None
+    """Directory to store the parameters compiled from the scenario files in, in a subdirectory per
+    model. They are reused while the files along the inheritance chain, the dimensions and the
+    definitions are unchanged. Further `rows` are applied after."""
     _scenarios: List["Scenario"] = []
     _parameters: dict = {}
 
     def get_parameters(self) -> dict:
+        if self.cache_path is None:
+            self._parameters = self.compile_parameters()
+        else:
+            self._parameters = self.load_compiled_parameters()
+        if self.rows:
+            self.inline_scenario().apply(self._parameters)
+        return self._parameters
+
+    def compile_parameters(self) -> dict:
+        """Parameters resulting from the scenario files along the inheritance chain."""
         self.read_all()
         self.init_parameters()
         for scenario in self._scenarios:
             scenario.apply(self._parameters)
         return self._parameters
 
+    def compile_key(self) -> str:
+        chain = self.chain_files(self.base_path, self.name)
+        inheritance = self.read_inheritance(self.base_path)
+        return fingerprint(
+            self.model, self.dims, self.parameter_definitions, chain, sorted(inheritance.items())
+        )
+
+    def load_compiled_parameters(self) -> dict:
+        """Return the compiled parameters from memory or the cache file if their key matches, or
+        else compile and store them."""
+        key = self.compile_key()
+        if key not in _compiled_scenarios:
+            path = self.compiled_path
+            try:
+                with open(path, "rb") as f:
+                    cached_key, content = pickle.load(f)
+                if cached_key == key:
+                    _compiled_scenarios[key] = content
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, pickle.UnpicklingError, EOFError) as e:
+                logging.warning(f"Ignoring unreadable scenario cache file {path}: {e}")
+        if key in _compiled_scenarios:
+            return pickle.loads(_compiled_scenarios[key])
+
+        content = pickle.dumps(self.compile_parameters())
+        _compiled_scenarios[key] = content
+        self.save_compiled(key, content)
+        return pickle.loads(content)
+
+    @property
+    def compiled_path(self) -> str:
+        """Cache file of the compiled parameters, separate per model such that runs of several
+        models with the same scenario do not replace each other's."""
+        return os.path.join(self.cache_path, self.model.value, f"{self.name}.pkl")
+
+    def save_compiled(self, key: str, content: bytes):
+        directory = os.path.dirname(self.compiled_path)
+        os.makedirs(directory, exist_ok=True)
+        # unique temporary file, as the workers of a sweep may compile the same scenario
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+            pickle.dump((key, content), f)
+        os.replace(f.name, self.compiled_path)
+
     def init_parameters(self):
         for param_def in self.parameter_definitions:
             name = param_def.name
@@ -181,6 +416,13 @@ class ScenarioReader(RemindMFABaseModel):
                 break
             name = scenario.parent
 
+    def inline_scenario(self) -> "Scenario":
+        """Scenario of the further `rows`."""
+        data_points = [self._parse_inline_row(row) for row in self.rows]
+        inline = Scenario(name=f"{self.name} (inline)", parent=self.name, data=data_points)
+        inline.filter_data_by_model(self.model)
+        return inline
+
     def read_single(self, name: str) -> "Scenario":
         csv_file = os.path.join(self.base_path, f"{name}.csv")
         if os.path.exists(csv_file):
@@ -226,6 +468,16 @@ class ScenarioReader(RemindMFABaseModel):
             extra=extra,
         )
 
+    @staticmethod
+    def _parse_inline_row(row: Dict[str, Any]) -> "ScenarioDataPoint":
+        """Parse a row given as dict like a row of a scenario CSV file."""
+        if "parameter" not in row or "value" not in row:
+            raise ValueError(f"Inline scenario row {row} needs a 'parameter' and a 'value'.")
+        row = {"models": "", **row}
+        return ScenarioReader._parse_csv_row(
+            {col: "" if val is None else str(val) for col, val in row.items()}
+        )
+
     @staticmethod
     def _parse_csv_value(val: str):
         val = val.strip() if val else ""
@@ -237,16 +489,37 @@ class ScenarioReader(RemindMFABaseModel):
             return val
 
     def _read_parent_from_inheritance(self, name: str) -> Optional[str]:
-        inheritance_file = os.path.join(self.base_path, "inheritance.csv")
+        return self.read_inheritance(self.base_path).get(name)
+
+    @classmethod
+    def chain_files(cls, base_path: str, name: str) -> List[tuple[str, Optional[str]]]:
+        """Name and content of the scenario files along the inheritance chain of scenario
+        `name`, starting with it. The content of missing files is None."""
+        inheritance = cls.read_inheritance(base_path)
+        files = []
+        while name is not None:
+            path = os.path.join(base_path, f"{name}.csv")
+            content = None
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    content = f.read()
+            files.append((name, content))
+            name = inheritance.get(name)
+        return files
+
+    @classmethod
+    def read_inheritance(cls, base_path: str) -> Dict[str, Optional[str]]:
+        """Map every scenario listed in inheritance.csv to its parent (None for root scenarios)."""
+        inheritance_file = os.path.join(base_path, "inheritance.csv")
         if not os.path.exists(inheritance_file):
-            raise FileNotFoundError(f"inheritance.csv not found in {self.base_path}")
+            raise FileNotFoundError(f"inheritance.csv not found in {base_path}")
+        inheritance = {}
         with open(inheritance_file, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(self._iter_active_csv_lines(f))
+            reader = csv.DictReader(cls._iter_active_csv_lines(f))
             for row in reader:
-                if row["scenario"] == name:
-                    parent = row.get("parent", "").strip()
-                    return parent if parent else None
-        return None
+                parent = (row.get("parent") or "").strip()
+                inheritance.setdefault(row["scenario"], parent if parent else None)
+        return inheritance
 
 
 class Scenario(RemindMFABaseModel):
@@ -258,8 +531,27 @@ class Scenario(RemindMFABaseModel):
         self.data = [p for p in self.data if model_name in p.models]
 
     def apply(self, parameters: dict):
+        """Apply the data points in order. The rows writing to the same array are written
+        together, see `assign_rows`. Invalid rows are reported together."""
+        targets: Dict[int, tuple[fd.Parameter, list, list]] = {}
+        errors = []
         for data_point in self.data:
-            data_point.apply(parameters)
+            try:
+                writes = data_point.writes(parameters)
+            except ValueError as e:
+                errors.append(str(e))
+                continue
+            for parameter, value in writes:
+                _, values, indices = targets.setdefault(id(parameter), (parameter, [], []))
+                values.append(value)
+                indices.append(data_point.index)
+        if errors:
+            raise ValueError(
+                f"{len(errors)} invalid row(s) in scenario '{self.name}':\n"
+                + "\n".join(f"- {error}" for error in errors)
+            )
+        for parameter, values, indices in targets.values():
+            assign_rows(parameter, values, indices)
 
 
 class ScenarioDataPoint(RemindMFABaseModel):
@@ -280,17 +572,26 @@ class ScenarioDataPoint(RemindMFABaseModel):
         return value
 
     def apply(self, parameters: dict):
+        for parameter, value in self.writes(parameters):
+            assign_rows(parameter, [value], [self.index])
+
+    def writes(self, parameters: dict) -> List[tuple[fd.Parameter, Any]]:
+        """Arrays this data point writes to, with the value for each. Values of plain data
+        points are set right away."""
         parameter = parameters.get(self.parameter)
         if isinstance(parameter, ExtrapolationScenarioParameter):
-            parameter.set_value(self.value, self.index)
-            parameter.set_extras(self.extra, self.index)
-            return
+            return parameter.writes(self.value, self.extra, self.index)
 
-        self.apply_single(parameters, self.parameter, self.value)
+        writes = [self.write_single(parameters, self.parameter, self.value)]
         for extra_name, extra_val in self.extra.items():
-            self.apply_single(parameters, f"{self.parameter}_{extra_name}", extra_val)
+            writes.append(
+                self.write_single(parameters, f"{self.parameter}_{extra_name}", extra_val)
+            )
+        return [write for write in writes if write is not None]
 
-    def apply_single(self, parameters: dict, param_name: str, val: float):
+    def write_single(
+        self, parameters: dict, param_name: str, val: float
+    ) -> Optional[tuple[fd.Parameter, Any]]:
         if param_name not in parameters:
             raise ValueError(
                 f"Scenario data point refers to undefined scenario parameter '{param_name}'. "
@@ -298,11 +599,8 @@ class ScenarioDataPoint(RemindMFABaseModel):
             )
         parameter = parameters[param_name]
         if isinstance(parameter, fd.Parameter):
-            if self.index:
-                parameter[self.index] = val
-            else:
-                parameter[...] = val
-        else:
-            if self.index:
-                raise ValueError("Index should be empty for plain parameters.")
-            parameters[param_name] = val
+            return parameter, val
+        if self.index:
+            raise ValueError("Index should be empty for plain parameters.")
+        parameters[param_name] = val
+        return None
@@ -0,0 +1,74 @@
+import logging
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import flodym as fd
+import numpy as np
+
+from remind_mfa.common.common_data_reader import InputData
+from remind_mfa.common.helpers import RemindMFABaseModel
+
+# RAM-backed file system shared by all processes, where available
+SHARED_MEMORY_PATH = "/dev/shm"
+
+
+class SharedInputData(RemindMFABaseModel):
+    """Input data whose parameter values are published once as .npy files, by default in shared
+    memory, for the worker processes of a sweep or batch.
+
+    Unlike `InputData`, it pickles as the file paths only. The parameters are memory-mapped on
+    access: `parameters` gives read-only views, and `copy_parameters` gives copy-on-write
+    mappings, such that all workers share the pages of the files until a model run changes
+    values, which then only copies the changed pages for that run.
+    """
+
+    dims: fd.DimensionSet
+    path: str
+    """Directory of the published parameter files."""
+    parameter_dims: dict[str, tuple[str, ...]]
+    """Dimension letters of each parameter."""
+
+    @classmethod
+    def publish(cls, input_data: InputData, directory: Optional[str] = None) -> "SharedInputData":
+        """Write the parameter values of `input_data` to a new directory in `directory`, by
+        default in shared memory or else the temporary directory."""
+        if directory is None and os.path.isdir(SHARED_MEMORY_PATH):
+            directory = SHARED_MEMORY_PATH
+        path = tempfile.mkdtemp(prefix="remind_mfa_parameters_", dir=directory)
+        for name, prm in input_data.parameters.items():
+            np.save(os.path.join(path, f"{name}.npy"), prm.values, allow_pickle=False)
+        logging.info(f"Published {len(input_data.parameters)} parameters to {path}.")
+        return cls(
+            dims=input_data.dims,
+            path=path,
+            parameter_dims={name: prm.dims.letters for name, prm in input_data.parameters.items()},
+        )
+
+    @property
+    def parameters(self) -> dict[str, fd.Parameter]:
+        """Read-only views of all parameters."""
+        return self._attach("r")
+
+    def copy_parameters(self) -> dict[str, fd.Parameter]:
+        """Return copy-on-write views of all parameters, such that a model run cannot alter the
+        shared ones."""
+        return self._attach("c")
+
+    def _attach(self, mmap_mode: str) -> dict[str, fd.Parameter]:
+        return {
+            name: fd.Parameter(
+                dims=self.dims.get_subset(letters),
+                name=name,
+                # plain array on the mapping, such that parameters pickle and copy as usual
+                values=np.asarray(
+                    np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode=mmap_mode)
+                ),
+            )
+            for name, letters in self.parameter_dims.items()
+        }
+
+    def close(self):
+        """Remove the published files. Processes attached to them keep their mappings."""
+        shutil.rmtree(self.path, ignore_errors=True)
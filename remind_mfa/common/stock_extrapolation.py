@@ -3,7 +3,7 @@ import logging
 import flodym as fd
 import numpy as np
 from remind_mfa.common.data_blending import CriticallyDampedBlender
-from typing import Tuple, Union, Optional
+from typing import ClassVar, Tuple, Union, Optional
 from pydantic import ConfigDict
 
 from remind_mfa.common.data_transformations import broadcast_trailing_dimensions, BoundList
@@ -20,6 +20,9 @@ class StockExtrapolation(RemindMFABaseModel):
 
     model_config = ConfigDict(extra="allow")
 
+    PARAMETER_NAMES: ClassVar[tuple[str, ...]] = ("population", "gdppc", "stock_factor")
+    """Names of the parameters the extrapolation reads."""
+
     cfg: ModelSwitches
     """Configuration for the model."""
     historic_stocks: fd.FlodymArray
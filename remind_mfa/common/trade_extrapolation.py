@@ -6,6 +6,7 @@ from pydantic import model_validator, ConfigDict
 from remind_mfa.common.data_transformations import broadcast_trailing_dimensions
 from remind_mfa.common.trade import Trade
 from remind_mfa.common.helpers import RemindMFABaseModel
+from remind_mfa.common.profiling import profiled
 from remind_mfa.common.data_blending import blend
 
 
@@ -46,6 +47,7 @@ class TradeExtrapolator(RemindMFABaseModel):
             )
         return self
 
+    @profiled
     def run(self):
         self.set_direction()
         self.extract_attributes()
@@ -2,10 +2,7 @@ import flodym as fd
 import numpy as np
 import pandas as pd
 
-import plotly.graph_objects as go
 from typing import TYPE_CHECKING
-import flodym.export as fde
-import plotly.express as px
 
 from remind_mfa.common.common_visualization import CommonVisualizer
 
@@ -133,6 +130,8 @@ class PlasticsVisualizer(CommonVisualizer):
         )
 
     def compare_demand(self, mfa: fd.MFASystem):
+        import plotly.express as px
+
         df = pd.read_csv("data/plastics/input/validation.csv", sep=";")
 
         # Convert year to numeric
@@ -173,6 +172,9 @@ class PlasticsVisualizer(CommonVisualizer):
         super().visualize_trade(mfa, linecolor_dims=linecolor_dims)
 
     def visualize_sankey(self, mfa: fd.MFASystem):
+        import flodym.export as fde
+        import plotly.graph_objects as go
+
         # Define colors for each stage
         production_color = "#EDC948"
         use_color = "#9EC3D5"
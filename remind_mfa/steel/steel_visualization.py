@@ -1,11 +1,7 @@
 import numpy as np
 import os
-from plotly import colors as plc
-import plotly.graph_objects as go
-import pyam
 import flodym as fd
 from typing import TYPE_CHECKING
-import flodym.export as fde
 
 from remind_mfa.common.common_visualization import CommonVisualizer
 from remind_mfa.steel.steel_config import SteelVisualizationCfg
@@ -37,6 +33,9 @@ class SteelVisualizer(CommonVisualizer):
         )
 
     def visualize_sankey(self, mfa: fd.MFASystem):
+        import flodym.export as fde
+        import plotly.graph_objects as go
+
         good_colors = [f"hsl({190 + 10 *i},40,{77-5*i})" for i in range(4)]
         production_color = "hsl(50,40,70)"
         scrap_color = "hsl(120,40,70)"
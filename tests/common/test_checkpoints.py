@@ -0,0 +1,88 @@
+import flodym as fd
+import numpy as np
+
+from remind_mfa.common.checkpoints import CheckpointStore, fingerprint
+from remind_mfa.common.lazy_parameters import LazyParameters
+from remind_mfa.common.pipeline import Pipeline, Stage
+
+
+def make_parameter(values) -> fd.Parameter:
+    dims = fd.DimensionSet(dim_list=[fd.Dimension(name="Time", letter="t", items=[2000, 2001])])
+    return fd.Parameter(dims=dims, values=np.array(values, dtype=float))
+
+
+def test_fingerprint_depends_on_content_only():
+    a = {"lifetime": make_parameter([1.0, 2.0]), "switch": "LogNormalLifetime"}
+    b = {"switch": "LogNormalLifetime", "lifetime": make_parameter([1.0, 2.0])}
+    c = {"lifetime": make_parameter([1.0, 2.5]), "switch": "LogNormalLifetime"}
+
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint(c)
+
+
+def test_store_keeps_latest_checkpoint_per_stage(tmp_path):
+    store = CheckpointStore(path=str(tmp_path))
+    store.save("historic_mfa", "old", {"parameters": {"a": make_parameter([1.0, 2.0])}})
+    store.save("historic_mfa", "new", {"parameters": {"a": make_parameter([1.0, 3.0])}})
+
+    assert not store.has("historic_mfa", "old")
+    assert store.has("historic_mfa", "new")
+    np.testing.assert_array_equal(
+        store.load("historic_mfa", "new")["parameters"]["a"].values, [1.0, 3.0]
+    )
+
+
+def test_pipeline_recomputes_only_dirty_stages(tmp_path):
+    class Model:
+        prm = 1.0
+
+    stages = [
+        Stage(name="scenario", produces=("scenario_parameters",)),
+        Stage(name="historic", consumes=("scenario_parameters",), produces=("historic",)),
+        Stage(name="future", consumes=("historic",), produces=("future",)),
+    ]
+    calls = []
+
+    def run_all(model):
+        pipeline = Pipeline(stages, store=CheckpointStore(path=str(tmp_path)), reuse=True)
+        pipeline.run(
+            model,
+            "scenario",
+            lambda: setattr(model, "scenario_parameters", {"a": 1.0}),
+            lambda: model.prm,
+        )
+        pipeline.run(
+            model, "historic", lambda: calls.append("historic") or setattr(model, "historic", 2)
+        )
+        pipeline.run(model, "future", lambda: calls.append("future") or setattr(model, "future", 3))
+
+    run_all(Model())
+    model = Model()
+    run_all(model)
+    assert calls == ["historic", "future"]
+    assert model.future == 3
+
+    model.prm = 2.0  # changes the scenario key, but not its output
+    run_all(model)
+    assert calls == ["historic", "future"]
+
+
+def test_pipeline_neither_hashes_nor_reads_lazy_parameters(tmp_path):
+    loads = []
+
+    class Model:
+        pass
+
+    def read(model):
+        model.parameters = LazyParameters(["a", "b"], lambda name: loads.append(name))
+
+    stages = [Stage(name="read", produces=("parameters",))]
+    model = Model()
+    pipeline = Pipeline(stages, store=CheckpointStore(path=str(tmp_path)), reuse=True)
+    pipeline.run(model, "read", lambda: read(model))
+    model = Model()
+    pipeline = Pipeline(stages, store=CheckpointStore(path=str(tmp_path)), reuse=True)
+    pipeline.run(model, "read", lambda: read(model))
+
+    assert loads == [] and list(model.parameters) == ["a", "b"]
+    assert not model.parameters.is_bound
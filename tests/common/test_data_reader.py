@@ -0,0 +1,228 @@
+import tarfile
+from types import SimpleNamespace
+
+import flodym as fd
+import numpy as np
+import pytest
+
+from remind_mfa.common.archive_reader import ArchiveReader
+from remind_mfa.common.common_data_reader import (
+    CommonDataReader,
+    MadratParameterReader,
+    clear_shared_drivers,
+)
+from remind_mfa.common.common_model import CommonModel
+from remind_mfa.common.helpers import ModelNames
+from remind_mfa.common.parameter_cache import ParameterCache
+
+DIMS = fd.DimensionSet(
+    dim_list=[
+        fd.Dimension(name="Region", letter="r", items=["EUR", "USA"]),
+        fd.Dimension(name="Time", letter="t", items=[2000, 2001]),
+    ]
+)
+
+
+def write_cs4r(path, values):
+    rows = [
+        f"{r},{t},{v}"
+        for (r, t), v in zip([("EUR", 2000), ("EUR", 2001), ("USA", 2000), ("USA", 2001)], values)
+    ]
+    path.write_text(
+        "* description: test\n* dimensions: (Region, Time, value)\n" + "\n".join(rows) + "\n"
+    )
+
+
+def test_cached_values_are_reused_until_file_changes(tmp_path, monkeypatch):
+    source = tmp_path / "st_lifetime.cs4r"
+    write_cs4r(source, [1, 2, 3, 4])
+    reader = MadratParameterReader(
+        {"lifetime": str(source)}, cache=ParameterCache(str(tmp_path / "cache"))
+    )
+    first = reader.read_parameter_values("lifetime", DIMS)
+
+    def fail(*args):
+        raise AssertionError("parsed although cached")
+
+    with monkeypatch.context() as m:
+        m.setattr(MadratParameterReader, "parse_parameter_values", fail)
+        cached = reader.read_parameter_values("lifetime", DIMS)
+        np.testing.assert_array_equal(cached.values, first.values)
+        with pytest.raises(AssertionError):
+            reader.read_parameter_values("lifetime", DIMS[("r",)])
+
+    write_cs4r(source, [1, 2, 3, 5])
+    np.testing.assert_array_equal(
+        reader.read_parameter_values("lifetime", DIMS).values, [[1, 2], [3, 5]]
+    )
+
+
+def test_drivers_are_shared_between_models(tmp_path, monkeypatch):
+    clear_shared_drivers()
+    for prefix in ("st", "ce", "pl"):
+        write_cs4r(
+            tmp_path / f"{prefix}_population.cs4r", [1, 2, 3, 4] if prefix != "pl" else [5] * 4
+        )
+    steel, cement, plastics = (
+        MadratParameterReader(
+            {"population": str(tmp_path / f"{prefix}_population.cs4r")}, shared=["population"]
+        )
+        for prefix in ("st", "ce", "pl")
+    )
+    first = steel.read_parameter_values("population", DIMS)
+
+    def fail(*args):
+        raise AssertionError("parsed although shared")
+
+    monkeypatch.setattr(cement, "parse_parameter_values", fail)
+    second = cement.read_parameter_values("population", DIMS)
+    assert second.values is first.values
+    assert not second.values.flags.writeable
+    # other content is read on its own
+    np.testing.assert_array_equal(plastics.read_parameter_values("population", DIMS).values, 5)
+    clear_shared_drivers()
+
+
+def test_shared_drivers_are_sliced_to_the_scenario_as_views():
+    scenario = fd.Dimension(name="Scenario", letter="S", items=["SSP1", "SSP2"])
+    dims = fd.DimensionSet(dim_list=[*DIMS.dim_list, scenario])
+    values = np.arange(np.prod(dims.shape), dtype=float).reshape(dims.shape)
+    shared = fd.Parameter(dims=dims, name="gdppc", values=values.copy())
+    shared.values.flags.writeable = False
+
+    selected = CommonModel.select_scenario_slice(shared, "SSP2")
+    assert np.shares_memory(selected.values, shared.values)
+    assert not selected.values.flags.writeable
+    np.testing.assert_array_equal(selected.values, values[..., 1])
+    # the values of a single model are copied, such that the full array can be freed
+    own = CommonModel.select_scenario_slice(fd.Parameter(dims=dims, values=values), "SSP2")
+    assert not np.shares_memory(own.values, values)
+
+
+def test_threaded_read_matches_sequential_read(tmp_path):
+    files = {}
+    for i in range(8):
+        files[f"p{i}"] = str(tmp_path / f"st_p{i}.cs4r")
+        write_cs4r(tmp_path / f"st_p{i}.cs4r", [i, i + 1, i + 2, i + 3])
+    definitions = [fd.ParameterDefinition(name=name, dim_letters=("r", "t")) for name in files]
+
+    sequential = MadratParameterReader(files).read_parameters(definitions, DIMS)
+    threaded = MadratParameterReader(files, threads=4).read_parameters(definitions, DIMS)
+
+    assert list(threaded) == list(files)
+    for name in files:
+        np.testing.assert_array_equal(threaded[name].values, sequential[name].values)
+
+
+def test_archive_members_are_read_without_extracting(tmp_path):
+    write_cs4r(tmp_path / "st_lifetime.cs4r", [1, 2, 3, 4])
+    (tmp_path / "regionmapping.csv").write_text("Country;RegionCode\nDEU;EUR\n")
+    archive_path = tmp_path / "rev1_h12_abc_mfa.tgz"
+    with tarfile.open(archive_path, "w:gz") as tar:
+        tar.add(tmp_path / "regionmapping.csv", arcname="regionmapping.csv")
+        tar.add(tmp_path / "st_lifetime.cs4r", arcname="./st_lifetime.cs4r")
+
+    archive = ArchiveReader(str(archive_path))
+    assert archive.member_names() == ["regionmapping.csv", "st_lifetime.cs4r"]
+    reader = MadratParameterReader({"lifetime": "st_lifetime.cs4r"}, archive=archive)
+    parameter = reader.read_parameter_values("lifetime", DIMS)
+
+    np.testing.assert_array_equal(parameter.values, [[1, 2], [3, 4]])
+    assert list(tmp_path.glob("**/*.cs4r")) == [tmp_path / "st_lifetime.cs4r"]
+    with pytest.raises(FileNotFoundError):
+        archive.read("st_missing.cs4r")
+
+
+def write_archive(path, contents: dict[str, str]):
+    with tarfile.open(path, "w:gz") as tar:
+        for name, content in contents.items():
+            (path.parent / name).write_text(content)
+            tar.add(path.parent / name, arcname=name)
+
+
+def extracting_reader(revision: str) -> CommonDataReader:
+    reader = CommonDataReader.__new__(CommonDataReader)
+    reader.model_class = ModelNames.STEEL
+    reader.input_data_revision, reader.region_mapping = revision, "h12"
+    reader.force_extract = False
+    reader.definition = SimpleNamespace(
+        dimensions=[fd.DimensionDefinition(name="Region", letter="r", dtype=str)],
+        parameters=[fd.ParameterDefinition(name="lifetime", dim_letters=("r",))],
+    )
+    return reader
+
+
+def test_extraction_is_limited_to_the_selected_model(tmp_path):
+    archive_path = tmp_path / "rev1_h12_abc_mfa.tgz"
+    write_archive(
+        archive_path,
+        {"st_lifetime.cs4r": "1", "pl_lifetime.cs4r": "1", "regionmapping.csv": "EUR"},
+    )
+    reader = extracting_reader("1")
+    target = tmp_path / "input_data"
+    assert reader.extraction_needed(str(target), reader.required_members())
+
+    reader._extract_and_record(str(archive_path), str(target), route_docs=False)
+    assert sorted(path.name for path in target.glob("*.c*")) == [
+        "regionmapping.csv",
+        "st_lifetime.cs4r",
+    ]
+    assert not reader.extraction_needed(str(target), reader.required_members())
+
+    reader.model_class = ModelNames.PLASTICS
+    assert reader.extraction_needed(str(target), reader.required_members())
+
+
+def test_new_revision_rewrites_only_changed_files(tmp_path):
+    target = tmp_path / "input_data"
+    write_archive(
+        tmp_path / "rev1_h12_abc_mfa.tgz", {"st_lifetime.cs4r": "1", "regionmapping.csv": "EUR"}
+    )
+    extracting_reader("1")._extract_and_record(
+        str(tmp_path / "rev1_h12_abc_mfa.tgz"), str(target), route_docs=False
+    )
+    unchanged = (target / "regionmapping.csv").stat().st_mtime_ns
+    # left over by an interrupted extraction
+    (target / ".extract_abc").write_text("partial")
+
+    write_archive(
+        tmp_path / "rev2_h12_abc_mfa.tgz", {"st_lifetime.cs4r": "2", "regionmapping.csv": "EUR"}
+    )
+    reader = extracting_reader("2")
+    assert reader.extraction_needed(str(target), reader.required_members())
+    reader._extract_and_record(str(tmp_path / "rev2_h12_abc_mfa.tgz"), str(target), False)
+
+    assert (target / "st_lifetime.cs4r").read_text() == "2"
+    assert (target / "regionmapping.csv").stat().st_mtime_ns == unchanged
+    assert not list(target.glob(".extract_*"))
+    assert not reader.extraction_needed(str(target), reader.required_members())
+
+
+def test_fast_alignment_matches_flodym(tmp_path, monkeypatch):
+    dims = fd.DimensionSet(
+        dim_list=[
+            fd.Dimension(name="Region", letter="r", items=["EUR", "USA"]),
+            fd.Dimension(name="Scenario", letter="s", items=["SSP2"]),
+            fd.Dimension(name="Time", letter="t", items=[2000, 2001, 2002]),
+        ]
+    )
+    source = tmp_path / "st_p.cs4r"
+    source.write_text(
+        "* dimensions: (t, region, value)\n"
+        "2002,USA,6\n2000,EUR,1\n2001, USA,5\n2000,USA,4\n2002,EUR,3\n2001,EUR,2\n"
+    )
+    reader = MadratParameterReader({"p": str(source)})
+    with monkeypatch.context() as m:
+        m.setattr(fd.Parameter, "from_df", None)
+        fast = reader.read_parameter_values("p", dims)
+    np.testing.assert_array_equal(fast.values, [[[1, 2, 3]], [[4, 5, 6]]])
+
+    # duplicate entries are left to flodym, which raises
+    source.write_text("* dimensions: (t, region, value)\n2000,EUR,1\n2000,EUR,2\n")
+    with pytest.raises(ValueError):
+        reader.read_parameter_values("p", dims)
+    reader.allow_missing_values = True
+    source.write_text("* dimensions: (t, region, value)\n2000,EUR,1\n2002,USA,\n")
+    np.testing.assert_array_equal(
+        reader.read_parameter_values("p", dims).values, [[[1, 0, 0]], [[0, 0, 0]]]
+    )
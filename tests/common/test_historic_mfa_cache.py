@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+from typing import Any
+
+import flodym as fd
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
+from remind_mfa.common.historic_mfa_cache import HistoricMFACache
+from remind_mfa.common.lazy_parameters import LazyParameters
+
+H = fd.Dimension(name="Historic Time", letter="h", items=[2000, 2001])
+R = fd.Dimension(name="Region", letter="r", items=["EUR", "USA"])
+DIMS = fd.DimensionSet(dim_list=[H, R])
+
+
+class HistoricMFA(BaseModel):
+    """Stand-in for a historic MFA system, reading 'a' and 'b', scaling 'b' in place and adding
+    'c'."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    parameters: Any
+    flows: dict = {}
+    stocks: dict = {}
+    trade_set: Any = None
+
+    def compute(self):
+        self.parameters["b"].values[...] *= 2
+        self.parameters["c"] = self.parameters["a"] * self.parameters["b"]
+
+
+def make_model(values: dict[str, float], loads: list[str]) -> SimpleNamespace:
+    def load(name):
+        loads.append(name)
+        return fd.Parameter(dims=DIMS["r",], name=name, values=np.full(2, values[name]))
+
+    parameters = LazyParameters(list(values), load)
+    return SimpleNamespace(
+        cfg=SimpleNamespace(model_dump=lambda **kwargs: {}),
+        dims=DIMS,
+        parameters=parameters,
+        make_mfa=lambda historic: HistoricMFA(parameters=parameters.copy()),
+    )
+
+
+def test_reuse_reads_only_used_parameters():
+    cache = HistoricMFACache(max_entries=1)
+    loads = []
+    first = make_model({"a": 1.0, "b": 2.0, "unused": 0.0}, loads)
+    mfa = cache.get_or_compute(first)
+
+    entry = cache.entries[0]
+    assert entry.read_parameters == ["a", "b"] and sorted(loads) == ["a", "b"]
+    assert entry.written_parameters == ["b", "c"] and entry.mutated_parameters == ["b"]
+    np.testing.assert_array_equal(mfa.parameters["c"].values, [4.0, 4.0])
+
+    loads.clear()
+    second = make_model({"a": 1.0, "b": 2.0, "unused": 0.0}, loads)
+    mfa = cache.get_or_compute(second)
+    assert cache.entries == [entry] and sorted(loads) == ["a", "b"]
+    # the in-place change of the first run is applied to the parameters of the second
+    np.testing.assert_array_equal(second.parameters["b"].values, [4.0, 4.0])
+    np.testing.assert_array_equal(mfa.parameters["c"].values, [4.0, 4.0])
+
+    # other inputs are computed anew, dropping the least recently used entry
+    third = make_model({"a": 3.0, "b": 2.0, "unused": 0.0}, [])
+    np.testing.assert_array_equal(cache.get_or_compute(third).parameters["c"].values, [12, 12])
+    assert len(cache.entries) == 1 and cache.entries[0] is not entry
@@ -0,0 +1,45 @@
+import pickle
+
+import flodym as fd
+import numpy as np
+import pytest
+
+from remind_mfa.common.common_data_reader import InputData
+from remind_mfa.common.input_bundle import InputBundle
+
+
+def test_bundle_maps_parameters_and_files(tmp_path):
+    dims = fd.DimensionSet(
+        dim_list=[
+            fd.Dimension(name="Region", letter="r", items=["EUR", "USA"], dtype=str),
+            fd.Dimension(name="Time", letter="t", items=[2000, 2001, 2002], dtype=int),
+        ]
+    )
+    input_data = InputData(
+        dims=dims,
+        parameters={
+            "lifetime": fd.Parameter(
+                dims=dims, name="lifetime", values=np.arange(6.0).reshape(2, 3)
+            ),
+            "share": fd.Parameter(dims=dims["t",], name="share", values=np.full(3, 0.5)),
+        },
+    )
+    path = str(tmp_path / "rev1_h12.bundle")
+    InputBundle.write(path, {"steel": ("key", input_data)}, {"validation/a.csv": b"x,y\n"})
+
+    bundle = InputBundle(path)
+    assert bundle.input_data("steel", "other key") is None
+    assert bundle.input_data("cement", "key") is None
+    assert bundle.read_file("validation/a.csv") == b"x,y\n"
+    # as sent to a worker process
+    bundled = pickle.loads(pickle.dumps(bundle.input_data("steel", "key")))
+
+    assert bundled.dims["t"].items == [2000, 2001, 2002]
+    assert bundled.dims["r"].items == ["EUR", "USA"]
+    first = bundled.copy_parameters()
+    np.testing.assert_array_equal(first["lifetime"].values, np.arange(6.0).reshape(2, 3))
+    assert first["share"].dims.letters == ("t",)
+    first["lifetime"].values[0, 0] = 9.0
+    assert bundled.copy_parameters()["lifetime"].values[0, 0] == 0.0
+    with pytest.raises(ValueError):
+        bundled.parameters["share"].values[0] = 1.0
@@ -0,0 +1,59 @@
+import copy
+import pickle
+
+import flodym as fd
+import numpy as np
+import pytest
+
+from remind_mfa.common.lazy_parameters import LazyParameters
+
+DIMS = fd.DimensionSet(dim_list=[fd.Dimension(name="Region", letter="r", items=["EUR", "USA"])])
+
+
+def test_parameters_are_loaded_once_on_first_access():
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        return fd.Parameter(dims=DIMS, name=name, values=np.ones(2))
+
+    parameters = LazyParameters(["a", "b", "c"], load)
+    assert "c" in parameters and list(parameters) == ["a", "b", "c"] and loads == []
+
+    parameters.add_transform(lambda name, prm: prm * 2)
+    mfa_parameters = parameters.copy()
+    np.testing.assert_array_equal(mfa_parameters["a"].values, [2, 2])
+    assert parameters["a"] is mfa_parameters["a"]
+    assert list(parameters.loaded()) == ["a"]
+
+    snapshot = copy.deepcopy(parameters)
+    parameters["a"].values[...] = 0
+    np.testing.assert_array_equal(snapshot["a"].values, [2, 2])
+    snapshot["b"]
+    assert loads == ["a", "b"] and parameters.loaded_names == {"a", "b"}
+
+
+def double(name: str, prm: fd.Parameter) -> fd.Parameter:
+    return prm * 2
+
+
+def test_pickles_hold_loaded_parameters_and_read_others_once_bound():
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        return fd.Parameter(dims=DIMS, name=name, values=np.ones(2))
+
+    parameters = LazyParameters(["a", "b", "c"], load)
+    parameters.add_transform(double)
+    parameters["a"]
+    restored = pickle.loads(pickle.dumps(parameters))
+    assert loads == ["a"] and list(restored) == ["a", "b", "c"] and not restored.is_bound
+    np.testing.assert_array_equal(restored["a"].values, [2, 2])
+    with pytest.raises(RuntimeError, match="not bound"):
+        restored["b"]
+
+    source = LazyParameters(["a", "b", "c"], load)
+    restored.bind(source)
+    np.testing.assert_array_equal(restored["b"].values, [2, 2])
+    assert loads == ["a", "b"] and source.loaded_names == {"a", "b"}
@@ -0,0 +1,52 @@
+import pickle
+
+import flodym as fd
+import numpy as np
+
+from remind_mfa.common.lazy_parameters import LazyParameters
+from remind_mfa.common.parameter_store import ParameterStore
+
+DIMS = fd.DimensionSet(dim_list=[fd.Dimension(name="Region", letter="r", items=["EUR", "USA"])])
+
+
+def parameter(name: str, value: float) -> fd.Parameter:
+    return fd.Parameter(dims=DIMS, name=name, values=np.full(2, value))
+
+
+def test_snapshots_copy_only_written_parameters():
+    source = {"a": parameter("a", 1.0), "b": parameter("b", 2.0)}
+    parameters = ParameterStore(source)
+    snapshot = parameters.snapshot()
+    assert parameters["a"] is snapshot["a"] is source["a"]
+
+    written = parameters.writable("a")
+    written[...] = 5.0
+    assert parameters.writable("a") is written and parameters.diverged == {"a"}
+    np.testing.assert_array_equal(snapshot["a"].values, [1.0, 1.0])
+    np.testing.assert_array_equal(source["a"].values, [1.0, 1.0])
+    assert parameters["b"] is snapshot["b"]
+
+    # once snapshotted again, the copy is shared and is copied on the next write
+    later = parameters.snapshot()
+    parameters.writable("a")[...] = 7.0
+    np.testing.assert_array_equal(later["a"].values, [5.0, 5.0])
+
+    snapshot["c"] = parameter("c", 3.0)
+    assert "c" not in parameters and snapshot.diverged == {"c"}
+
+    restored = pickle.loads(pickle.dumps(parameters))
+    assert isinstance(restored, ParameterStore) and list(restored) == ["a", "b"]
+
+
+def test_lazy_parameters_stay_lazy():
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        return parameter(name, 1.0)
+
+    parameters = ParameterStore(LazyParameters(["a", "b"], load))
+    snapshot = parameters.snapshot()
+    snapshot["a"]
+    assert parameters["a"] is snapshot["a"] and loads == ["a"]
+    assert list(parameters.loaded()) == ["a"]
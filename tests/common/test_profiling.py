@@ -0,0 +1,67 @@
+import json
+
+import flodym as fd
+import numpy as np
+
+from remind_mfa.common.profiling import (
+    enable_profiling,
+    memory_records,
+    profile_records,
+    profile_section,
+    profiled,
+    trace_memory,
+    write_profile,
+)
+
+
+@profiled
+def fit():
+    return sum(range(1000))
+
+
+def test_nested_sections_are_recorded_per_stage(tmp_path):
+    enable_profiling()
+    try:
+        with profile_section("stock_projection"):
+            fit()
+            fit()
+        records = {record["section"]: record for record in profile_records()}
+        write_profile(str(tmp_path / "profile.json"))
+    finally:
+        enable_profiling(False)
+
+    assert set(records) == {"stock_projection", "stock_projection > fit"}
+    assert records["stock_projection > fit"]["calls"] == 2
+    assert (
+        records["stock_projection"]["wall_time"] >= records["stock_projection > fit"]["wall_time"]
+    )
+    with open(tmp_path / "profile.json") as f:
+        assert [record["section"] for record in json.load(f)["sections"]][0] == "stock_projection"
+
+
+def test_sections_are_not_recorded_when_disabled():
+    enable_profiling(False)
+    with profile_section("read"):
+        fit()
+    assert profile_records() == []
+
+
+def test_memory_is_traced_per_stage():
+    dims = fd.DimensionSet(
+        dim_list=[
+            fd.Dimension(name="Time", letter="t", items=list(range(100))),
+            fd.Dimension(name="Region", letter="r", items=list(range(1000))),
+        ]
+    )
+    arrays = {"small": fd.FlodymArray(dims=dims[("t",)])}
+    enable_profiling(trace_memory=True)
+    try:
+        with trace_memory("historic_mfa", arrays=lambda: arrays):
+            arrays["large"] = fd.FlodymArray(dims=dims, values=np.ones((100, 1000)))
+        record = memory_records()[0]
+    finally:
+        enable_profiling(False)
+
+    assert record["section"] == "historic_mfa"
+    assert record["peak_memory"] >= record["retained_memory"] >= 800_000
+    assert [array["name"] for array in record["largest_arrays"]] == ["large", "small"]
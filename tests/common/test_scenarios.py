@@ -0,0 +1,147 @@
+import flodym as fd
+import numpy as np
+import pytest
+
+from remind_mfa.common.common_definition import ExtrapolationDefinition, PlainDataPointDefinition
+from remind_mfa.common.helpers import ModelNames
+from remind_mfa.common import scenarios
+from remind_mfa.common.scenarios import ScenarioReader
+
+
+def test_inline_rows_are_applied_after_scenario_chain(tmp_path):
+    (tmp_path / "inheritance.csv").write_text("scenario,parent\nBASE,\nSSP2,BASE\n")
+    (tmp_path / "BASE.csv").write_text("parameter,models,value\nsaturation_level,all,10\n")
+    (tmp_path / "SSP2.csv").write_text("parameter,models,value\ndriver_scen,all,SSP2\n")
+    reader = ScenarioReader(
+        name="SSP2",
+        base_path=str(tmp_path),
+        model=ModelNames.STEEL,
+        dims=fd.DimensionSet(dim_list=[]),
+        parameter_definitions=[
+            PlainDataPointDefinition(name="driver_scen"),
+            PlainDataPointDefinition(name="saturation_level"),
+        ],
+        rows=[
+            {"parameter": "saturation_level", "value": 12},
+            {"parameter": "saturation_level", "models": "plastics", "value": 3},
+        ],
+    )
+
+    parameters = reader.get_parameters()
+
+    assert parameters["driver_scen"] == "SSP2"
+    assert parameters["saturation_level"] == 12
+
+
+def test_compiled_scenarios_are_reused_until_a_file_changes(tmp_path, monkeypatch):
+    (tmp_path / "inheritance.csv").write_text("scenario,parent\nBASE,\nSSP2,BASE\n")
+    (tmp_path / "BASE.csv").write_text("parameter,models,value\nsaturation_level,all,10\n")
+    (tmp_path / "SSP2.csv").write_text("parameter,models,value\ndriver_scen,all,SSP2\n")
+
+    def make_reader(**kwargs):
+        return ScenarioReader(
+            name="SSP2",
+            base_path=str(tmp_path),
+            model=ModelNames.STEEL,
+            dims=fd.DimensionSet(dim_list=[]),
+            parameter_definitions=[
+                PlainDataPointDefinition(name="driver_scen"),
+                PlainDataPointDefinition(name="saturation_level"),
+            ],
+            cache_path=str(tmp_path / "cache"),
+            **kwargs,
+        )
+
+    assert make_reader().get_parameters()["saturation_level"] == 10
+    # as in a new process, from the cache file
+    scenarios._compiled_scenarios.clear()
+
+    def fail(*args):
+        raise AssertionError("parsed although compiled")
+
+    with monkeypatch.context() as m:
+        m.setattr(ScenarioReader, "_parse_csv_row", staticmethod(fail))
+        parameters = make_reader().get_parameters()
+    assert parameters == {"driver_scen": "SSP2", "saturation_level": 10}
+    rows = [{"parameter": "saturation_level", "value": 12}]
+    assert make_reader(rows=rows).get_parameters()["saturation_level"] == 12
+
+    (tmp_path / "BASE.csv").write_text("parameter,models,value\nsaturation_level,all,11\n")
+    assert make_reader().get_parameters()["saturation_level"] == 11
+
+
+def test_compiled_scenarios_are_cached_per_model(tmp_path, monkeypatch):
+    (tmp_path / "inheritance.csv").write_text("scenario,parent\nSSP2,\n")
+    (tmp_path / "SSP2.csv").write_text(
+        "parameter,models,value\nsaturation_level,steel,10\nsaturation_level,cement,20\n"
+    )
+
+    def make_reader(model: ModelNames) -> ScenarioReader:
+        return ScenarioReader(
+            name="SSP2",
+            base_path=str(tmp_path),
+            model=model,
+            dims=fd.DimensionSet(dim_list=[]),
+            parameter_definitions=[PlainDataPointDefinition(name="saturation_level")],
+            cache_path=str(tmp_path / "cache"),
+        )
+
+    models = {ModelNames.STEEL: 10, ModelNames.CEMENT: 20}
+    for model, value in models.items():
+        assert make_reader(model).get_parameters()["saturation_level"] == value
+    # as in a new process, both from their cache files
+    scenarios._compiled_scenarios.clear()
+
+    def fail(*args):
+        raise AssertionError("compiled although cached")
+
+    monkeypatch.setattr(ScenarioReader, "compile_parameters", fail)
+    for model, value in models.items():
+        assert make_reader(model).get_parameters()["saturation_level"] == value
+
+
+def test_bulk_rows_match_row_by_row_assignment():
+    dims = fd.DimensionSet(
+        dim_list=[
+            fd.Dimension(name="Region", letter="r", items=["EUR", "USA", "CHA"]),
+            fd.Dimension(name="Time", letter="t", items=[2020, 2030]),
+            fd.Dimension(name="Good", letter="g", items=["Construction", "Transport"]),
+        ]
+    )
+    rng = np.random.default_rng(0)
+    indices = []
+    for _ in range(200):
+        index = {"Region": str(rng.choice(dims["r"].items))}
+        if rng.random() < 0.7:
+            index["Time"] = int(rng.choice(dims["t"].items))
+        if rng.random() < 0.2:
+            index = {}
+        indices.append(index)
+    indices.append({"r": ["EUR", "CHA"], "Good": "Transport"})
+    values = list(rng.random(len(indices)))
+
+    expected = fd.Parameter(dims=dims)
+    for value, index in zip(values, indices):
+        expected[index if index else ...] = value
+    bulk = fd.Parameter(dims=dims)
+    scenarios.assign_rows(bulk, values, indices)
+
+    np.testing.assert_array_equal(bulk.values, expected.values)
+
+
+def test_invalid_rows_are_reported_together():
+    dims = fd.DimensionSet(dim_list=[fd.Dimension(name="Region", letter="r", items=["EUR"])])
+    parameter = scenarios.ExtrapolationScenarioParameter(
+        definition=ExtrapolationDefinition(name="stock_factor", dim_letters=("r",)),
+        value=fd.Parameter(name="stock_factor", dims=dims, values=np.zeros(1, dtype=object)),
+    )
+    scenario = scenarios.Scenario(
+        name="SSP2",
+        data=[
+            scenarios.ScenarioDataPoint(parameter="stock_factor", value=1, index={"Region": "XYZ"}),
+            scenarios.ScenarioDataPoint(parameter="stock_factor", value=1, index={"Time": 2020}),
+            scenarios.ScenarioDataPoint(parameter="unknown", value=1),
+        ],
+    )
+    with pytest.raises(ValueError, match="3 invalid row"):
+        scenario.apply({"stock_factor": parameter})
@@ -0,0 +1,36 @@
+import pickle
+
+import flodym as fd
+import numpy as np
+import pytest
+
+from remind_mfa.common.common_data_reader import InputData
+from remind_mfa.common.shared_parameters import SharedInputData
+
+
+def test_runs_change_only_their_own_copy(tmp_path):
+    dims = fd.DimensionSet(
+        dim_list=[
+            fd.Dimension(name="Region", letter="r", items=["EUR", "USA"]),
+            fd.Dimension(name="Time", letter="t", items=[2000, 2001]),
+        ]
+    )
+    input_data = InputData(
+        dims=dims,
+        parameters={"lifetime": fd.Parameter(dims=dims, name="lifetime", values=np.ones((2, 2)))},
+    )
+    shared = SharedInputData.publish(input_data, directory=str(tmp_path))
+    # as sent to a worker process
+    shared = pickle.loads(pickle.dumps(shared))
+
+    first = shared.copy_parameters()
+    first["lifetime"].values[0, :] = 5.0
+    second = shared.copy_parameters()
+
+    np.testing.assert_array_equal(first["lifetime"].values, [[5, 5], [1, 1]])
+    np.testing.assert_array_equal(second["lifetime"].values, np.ones((2, 2)))
+    with pytest.raises(ValueError):
+        shared.parameters["lifetime"].values[0, 0] = 5.0
+
+    shared.close()
+    assert not tmp_path.joinpath(shared.path).exists()
@@ -0,0 +1,35 @@
+import pytest
+
+from remind_mfa.cli.batch import BatchSpec, batch_runs
+from remind_mfa.common.config_loader import CONFIG_DIR
+
+
+def test_matrix_and_runs_expand_to_validated_run_configs():
+    spec = BatchSpec(
+        name="sensitivity",
+        model="steel",
+        matrix={
+            "model_switches.regress_over": ["loggdppc", "loggdppc_time"],
+            "model_switches.scenario": ["SSP1", "SSP2"],
+        },
+        runs=[{"model_switches.stock_extrapolation_class_name": "GompertzExtrapolation"}],
+    )
+
+    runs = batch_runs(spec, config_dir=CONFIG_DIR)
+
+    assert [run.name for run in runs] == [f"run_{i:03d}" for i in range(5)]
+    assert runs[1].overrides == {
+        "model_switches.regress_over": "loggdppc",
+        "model_switches.scenario": "SSP2",
+    }
+    assert runs[1].config["model_switches"]["scenario"] == "SSP2"
+    assert runs[1].config["export"]["path"].endswith("sensitivity/run_001")
+    # overrides of model switches do not change the input data, so all runs share it
+    assert len({run.input_data_key for run in runs}) == 1
+
+
+def test_invalid_override_fails_before_any_run():
+    spec = BatchSpec(name="typo", model="steel", runs=[{"model_switches.regres_over": "x"}])
+
+    with pytest.raises(ValueError, match="run_000"):
+        batch_runs(spec, config_dir=CONFIG_DIR)
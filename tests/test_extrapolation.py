@@ -9,11 +9,13 @@ full time 2000-2010, endpoint year 2008 with a linear blend (thirds as midpoints
 """
 
 import logging
+from types import SimpleNamespace
 
 import numpy as np
 import flodym as fd
 import pytest
 
+from remind_mfa.common.assumptions_doc import clear_assumptions, recorded_assumptions
 from remind_mfa.common.common_definition import ExtrapolationDefinition
 from remind_mfa.common.data_blending import (
     BLEND_TYPES,
@@ -21,6 +23,7 @@ from remind_mfa.common.data_blending import (
     blend,
     blending_factor,
 )
+from remind_mfa.common.extrapolation_cache import ExtrapolationCache
 from remind_mfa.common.parameter_extrapolation import (
     ParameterExtrapolation,
     ParameterExtrapolationManager,
@@ -274,6 +277,34 @@ def test_manager_dependency_order():
     assert result["p_c"] is parameters["p_c"]  # non-extrapolated parameters untouched
 
 
+def test_manager_runs_levels_concurrently_with_deterministic_docs():
+    parameters = {name: h_param(name) for name in ("p_a", "p_b", "p_c", "p_d")}
+    # p_a and p_c reference p_b, so p_b and p_d form the first level
+    scenario_parameters = {
+        "p_a": manager_scn("p_a", "p_b"),
+        "p_b": manager_scn("p_b", 4.0),
+        "p_c": manager_scn("p_c", "p_b"),
+        "p_d": manager_scn("p_d", 2.0, ext_type="factor"),
+    }
+    assert ParameterExtrapolationManager._processing_levels(scenario_parameters) == [
+        ["p_b", "p_d"],
+        ["p_a", "p_c"],
+    ]
+
+    results = []
+    for threads in (1, 4):
+        clear_assumptions()
+        manager = ParameterExtrapolationManager(historic_time=H, extended_time=T, threads=threads)
+        result = manager.apply_prm_extrapolation(parameters, scenario_parameters)
+        names = [assumption.name for assumption in recorded_assumptions()]
+        # documented in the order of processing one by one, not by level
+        assert names == [f"Extrapolation of {n}" for n in ("p_b", "p_c", "p_d", "p_a")]
+        results.append(result)
+    clear_assumptions()
+    for name in parameters:
+        np.testing.assert_array_equal(results[0][name].values, results[1][name].values)
+
+
 def test_manager_circular_reference_raises():
     manager = ParameterExtrapolationManager(historic_time=H, extended_time=T)
     parameters = {"p_a": h_param("p_a"), "p_b": h_param("p_b")}
@@ -300,6 +331,108 @@ def test_manager_create_new():
         manager.apply_prm_extrapolation({}, {"absent": scn})
 
 
+def test_manager_stacked_scenarios_match_single_runs():
+    manager = ParameterExtrapolationManager(historic_time=H, extended_time=T)
+    parameters = {"p_a": h_param("p_a"), "p_b": h_param("p_b")}
+    factor = ExtrapolationDefinition(name="new_factor", dim_letters=("r",), create_new=True)
+    # scenarios differ in values, types, references and which regions they set
+    scenarios = {
+        "low": {
+            "p_a": manager_scn("p_a", "p_b"),
+            "p_b": manager_scn("p_b", 4.0),
+            "new_factor": make_scn(
+                factor, dimset(R), [(0.5, {}, {"year": 2008, "type": "factor"})]
+            ),
+        },
+        "high": {
+            "p_a": manager_scn("p_a", 2.0, ext_type="factor"),
+            "p_b": make_scn(
+                ExtrapolationDefinition(name="p_b", dim_letters=("r",)),
+                dimset(R),
+                rows=[(30.0, {"Region": "B"}, {"year": 2010, "type": "target"})],
+            ),
+            "new_factor": make_scn(
+                factor, dimset(R), [(3.0, {}, {"year": 2010, "type": "target"})]
+            ),
+        },
+    }
+    stacked = manager.apply_stacked_prm_extrapolation(parameters, scenarios)
+
+    assert stacked["p_a"].dims.letters == ("x", "t", "r")
+    for scenario, scenario_parameters in scenarios.items():
+        expected = manager.apply_prm_extrapolation(parameters, scenario_parameters)
+        selected = manager.select_scenario(stacked, scenario)
+        for name, parameter in expected.items():
+            assert selected[name].dims.letters == parameter.dims.letters
+            np.testing.assert_allclose(selected[name].values, parameter.values)
+
+    split = {
+        "a": {"split": split_scn(target=0.8)},
+        "b": {"split": split_scn(target=0.6, balancing_item="Z")},
+    }
+    # stacked scenario parameters need equal definitions
+    with pytest.raises(ValueError, match="different definitions"):
+        manager.apply_stacked_prm_extrapolation({"split": split_param()}, split)
+    split["b"] = {"split": split_scn(target=0.6)}
+    stacked = manager.apply_stacked_prm_extrapolation({"split": split_param()}, split)
+    for scenario, target in (("a", 0.8), ("b", 0.6)):
+        result = manager.select_scenario(stacked, scenario)["split"]
+        np.testing.assert_allclose(
+            result.values, extrapolate(split_param(), split_scn(target)).values
+        )
+
+
+def cache_model(scenario, parameters, scenario_parameters):
+    """Stand-in for a model after its historic MFA, as seen by `ExtrapolationCache`."""
+    return SimpleNamespace(
+        dims=dimset(H, T, R),
+        parameters=parameters,
+        scenario_parameters=scenario_parameters,
+        cfg=SimpleNamespace(
+            model_switches=SimpleNamespace(scenario=scenario, extrapolation_threads=1)
+        ),
+    )
+
+
+def test_extrapolation_cache_matches_single_runs():
+    manager = ParameterExtrapolationManager(historic_time=H, extended_time=T)
+    scenarios = {
+        "low": {"p_a": manager_scn("p_a", "p_b"), "p_b": manager_scn("p_b", 4.0)},
+        "high": {"p_a": manager_scn("p_a", 2.0, ext_type="factor"), "p_b": manager_scn("p_b", 8.0)},
+    }
+    parameters = {"p_a": h_param("p_a"), "p_b": h_param("p_b"), "p_c": h_param("p_c")}
+    cache = ExtrapolationCache(scenarios)
+    # the first run extrapolates all scenarios, documenting none of them
+    clear_assumptions()
+    assert cache.get(cache_model("high", parameters, scenarios["high"])) is not None
+    assert cache.entries.keys() == scenarios.keys() and recorded_assumptions() == []
+
+    for scenario, scenario_parameters in scenarios.items():
+        model = cache_model(scenario, parameters, scenario_parameters)
+        clear_assumptions()
+        expected = manager.apply_prm_extrapolation(parameters, scenario_parameters)
+        expected_docs = [(a.name, a.description) for a in recorded_assumptions()]
+        clear_assumptions()
+        extrapolated = cache.get(model)
+        result = manager.apply_precomputed_extrapolation(
+            parameters, scenario_parameters, extrapolated
+        )
+        assert [(a.name, a.description) for a in recorded_assumptions()] == expected_docs
+        assert result["p_c"] is parameters["p_c"]
+        for name in ("p_a", "p_b"):
+            assert result[name].dims.letters == expected[name].dims.letters
+            np.testing.assert_allclose(result[name].values, expected[name].values)
+            # runs get their own copy, the cached parameters stay reusable
+            assert result[name] is not extrapolated[name]
+    clear_assumptions()
+
+    # runs whose inputs differ from those of the first run extrapolate on their own
+    changed = {**parameters, "p_b": h_param("p_b", per_region=(1.0, 2.0))}
+    assert cache.get(cache_model("low", changed, scenarios["low"])) is None
+    assert cache.get(cache_model("low", parameters, scenarios["high"])) is None
+    assert cache.get(cache_model("other", parameters, scenarios["low"])) is None
+
+
 # --- F. split renormalization -------------------------------------------------------
 
 
@@ -0,0 +1,117 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+import flodym as fd
+import numpy as np
+import pytest
+
+from remind_mfa.cli import server
+from remind_mfa.common import common_data_reader
+from remind_mfa.common.helpers import ModelNames, get_model_class
+from remind_mfa.common.historic_mfa_cache import HistoricMFACache
+
+DIMS = fd.DimensionSet(
+    dim_list=[
+        fd.Dimension(name="Time", letter="t", items=[2020, 2030]),
+        fd.Dimension(name="Region", letter="r", items=["EUR", "USA"]),
+    ]
+)
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Stub out reading the input data and running the model, recording both."""
+    recorded = SimpleNamespace(reads=[], runs=[])
+
+    def read_input_data(cls, cfg):
+        input_data = SimpleNamespace(region_mapping=cfg.input.region_mapping)
+        recorded.reads.append(input_data)
+        return input_data
+
+    def run_scenario(config, input_data, historic_mfa_cache, scenario_rows=None):
+        recorded.runs.append((config, input_data, historic_mfa_cache, scenario_rows))
+        flow = fd.FlodymArray(dims=DIMS, values=np.array([[1.0, 2.0], [3.0, 4.0]]))
+        return SimpleNamespace(named_arrays=lambda: {"future_mfa.flows.demand": flow})
+
+    model_class = get_model_class(ModelNames.STEEL)
+    monkeypatch.setattr(model_class, "read_input_data", classmethod(read_input_data))
+    monkeypatch.setattr(server, "run_scenario", run_scenario)
+    return recorded
+
+
+def test_runs_reuse_input_data_and_return_summaries(runs):
+    model_server = server.ModelServer()
+    result = model_server.run(
+        {
+            "model": "steel",
+            "scenario": "SSP1",
+            "name": "first",
+            "summary": {"future_mfa.flows.demand": ["r"]},
+        }
+    )
+    assert result["export_path"].endswith("first")
+    assert result["summary"] == {
+        "future_mfa.flows.demand": {"dims": {"r": ["EUR", "USA"]}, "values": [4.0, 6.0]}
+    }
+
+    scenario_rows = [{"parameter": "saturation_level", "value": 2.0}]
+    result = model_server.run({"model": "steel", "scenario_rows": scenario_rows})
+    assert result["summary"] == {}
+    # the second run reads no input data and shares the historic MFA cache of the first
+    assert len(runs.reads) == 1
+    (first_config, first_input, first_cache, _), (config, input_data, cache, rows) = runs.runs
+    assert first_config["model_switches"]["scenario"] == "SSP1"
+    assert input_data is first_input and cache is first_cache and rows == scenario_rows
+    assert model_server.status() == {"input_data": 1, "historic_mfas": {"steel": 0}}
+
+    with pytest.raises(ValueError, match="Unknown summary array"):
+        model_server.run({"model": "steel", "summary": {"future_mfa.flows.unknown": None}})
+
+
+def test_clear_drops_input_data_drivers_and_historic_mfas(runs, monkeypatch):
+    model_server = server.ModelServer()
+    model_server.run({"model": "steel"})
+    monkeypatch.setitem(common_data_reader._shared_drivers, "gdppc", np.ones(2))
+    assert isinstance(model_server.historic_mfa_caches[ModelNames.STEEL], HistoricMFACache)
+
+    model_server.clear()
+    assert model_server.input_data == {} and model_server.historic_mfa_caches == {}
+    assert common_data_reader._shared_drivers == {}
+
+    model_server.run({"model": "steel"})
+    assert len(runs.reads) == 2
+
+
+def test_http_handler(runs):
+    with server.ModelHTTPServer(("127.0.0.1", 0)) as http_server:
+        thread = threading.Thread(target=http_server.serve_forever)
+        thread.start()
+        url = f"http://127.0.0.1:{http_server.server_port}"
+
+        def request(path, body=None):
+            data = None if body is None else json.dumps(body).encode()
+            try:
+                with urllib.request.urlopen(url + path, data=data) as response:
+                    return response.status, json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                return e.code, json.loads(e.read())
+
+        try:
+            status, body = request(
+                "/run", {"model": "steel", "summary": {"future_mfa.flows.demand": None}}
+            )
+            assert status == 200
+            assert body["summary"]["future_mfa.flows.demand"]["values"] == [[1.0, 2.0], [3.0, 4.0]]
+            assert request("/status") == (200, {"input_data": 1, "historic_mfas": {"steel": 0}})
+
+            status, body = request("/run", {"model": "unknown"})
+            assert status == 500 and "ValueError" in body["error"]
+            assert request("/unknown")[0] == 404
+
+            assert request("/clear", {}) == (200, {"input_data": 0, "historic_mfas": {}})
+        finally:
+            http_server.shutdown()
+            thread.join()
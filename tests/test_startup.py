@@ -0,0 +1,43 @@
+"""Startup guard: importing the models and the CLI must not load the export and plotting backends.
+
+These are imported where they are used, such that runs with export and visualization switched
+off, and every worker process of a pool, start without them. Run this file with `-s` to print
+the import times.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["pyam", "ixmp4", "plotly", "matplotlib", "statsmodels", "flodym.export"]
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "loaded": [name for name in {heavy} if name in sys.modules],
+}}))
+"""
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "remind_mfa.plastics.plastics_model",
+        "remind_mfa.steel.steel_model",
+        "remind_mfa.cement.cement_model",
+        "remind_mfa.cli.sweep",
+    ],
+)
+def test_import_does_not_load_backends(module):
+    script = STARTUP_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    startup = json.loads(result.stdout.strip().splitlines()[-1])
+    print(f"import {module}: {startup['seconds']:.2f} s")
+    assert startup["loaded"] == []